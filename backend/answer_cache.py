@@ -0,0 +1,118 @@
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+
+# Semantic answer cache: answers keyed by the question embedding.
+# A question whose cosine similarity to a cached one reaches the threshold
+# (with the same n_results, the same collection and the same years and teams
+# mentioned) gets the stored answer and sources without retrieval or an LLM
+# call. MiniLM barely separates "Brazil in 2014" from "Brazil in 2018", so
+# the entities are compared exactly rather than trusted to the embedding.
+# Entries live in a small in-memory matrix searched with one matrix-vector
+# product; when full, the least recently used entry is replaced. Any change
+# of the collection fingerprint (a re-ingest) empties the cache.
+#
+# ANSWER_CACHE_SIZE       entries (default 512, 0 disables)
+# ANSWER_CACHE_THRESHOLD  minimum cosine similarity for a hit (default 0.95)
+
+CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class AnswerCache:
+    def __init__(self, max_size=CACHE_SIZE, threshold=CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.vectors = None
+        self.entries = []
+        self.last_used = np.zeros(max(max_size, 0), dtype=np.int64)
+        self.clock = 0
+        self.fingerprint = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def check_fingerprint(self, fingerprint):
+        """Drop every entry when the collection the answers came from has changed"""
+        if fingerprint != self.fingerprint:
+            if self.entries:
+                self.invalidations += 1
+            self.entries = []
+            self.fingerprint = fingerprint
+
+    def lookup(self, question_embedding, n_results, fingerprint, entities=None):
+        """Tagged response for the most similar cached question naming the same entities, or None"""
+        if self.max_size <= 0:
+            return None
+        query = unit(question_embedding)
+        with self.lock:
+            self.check_fingerprint(fingerprint)
+            if self.entries:
+                sims = self.vectors[:len(self.entries)] @ query
+                sims[[e["n_results"] != n_results or e["entities"] != entities for e in self.entries]] = -1
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    self.clock += 1
+                    self.last_used[best] = self.clock
+                    self.hits += 1
+                    entry = self.entries[best]
+                    return {
+                        "answer": entry["answer"],
+                        "sources": entry["sources"],
+                        "cache": {
+                            "hit": True,
+                            "similarity": round(float(sims[best]), 4),
+                            "matched_question": entry["question"],
+                            "cached_at": entry["cached_at"],
+                            "collection": fingerprint,
+                        },
+                    }
+            self.misses += 1
+        return None
+
+    def put(self, question, question_embedding, n_results, answer, sources, fingerprint, entities=None):
+        if self.max_size <= 0:
+            return
+        vector = unit(question_embedding)
+        entry = {
+            "question": question,
+            "n_results": n_results,
+            "entities": entities,
+            "answer": answer,
+            "sources": sources,
+            "cached_at": datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        with self.lock:
+            self.check_fingerprint(fingerprint)
+            if self.vectors is None:
+                self.vectors = np.zeros((self.max_size, len(vector)), dtype=np.float32)
+            if len(self.entries) < self.max_size:
+                slot = len(self.entries)
+                self.entries.append(entry)
+            else:
+                slot = int(np.argmin(self.last_used))
+                self.entries[slot] = entry
+            self.vectors[slot] = vector
+            self.clock += 1
+            self.last_used[slot] = self.clock
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from datetime import datetime, timezone
+
+# Versioned artifact registry for the prediction model.
+# Each training run publishes a complete directory
+#   data/model/versions/v0007/  match_predictor.pkl, match_predictor.npz, team_stats.pkl,
+#                               teams_list.json, snapshot.pkl, prediction_matrix.bin, manifest.json
+# where manifest.json records the sha256 and size of every file, plus run
+# metadata. data/model/active.json names the version the API serves.
+# publish() fills a staging directory, renames it into place and only then
+# moves the pointer, so a reader never sees a half-written version; the API
+# verifies the checksums before it switches (see main.py).
+#
+# ARTIFACT_KEEP_VERSIONS  published versions kept on disk, the active one always included (default 5)
+
+MANIFEST = "manifest.json"
+ACTIVE = "active.json"
+VERSIONS_DIR = "versions"
+VERSION_PATTERN = re.compile(r"^v(\d{4,})$")
+KEEP_VERSIONS = int(os.getenv("ARTIFACT_KEEP_VERSIONS", "5"))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def versions(registry):
+    """Published versions, oldest first"""
+    try:
+        names = os.listdir(os.path.join(registry, VERSIONS_DIR))
+    except OSError:
+        return []
+    return sorted((n for n in names if VERSION_PATTERN.match(n)), key=lambda n: int(n[1:]))
+
+
+def version_dir(registry, version):
+    return os.path.join(registry, VERSIONS_DIR, version)
+
+
+def active_file(registry, name):
+    """Path of a file of the active version, or the flat legacy file before the first publish"""
+    version = active_version(registry)
+    return os.path.join(version_dir(registry, version) if version is not None else registry, name)
+
+
+def active_version(registry):
+    """Version named by active.json, or None when nothing was published"""
+    try:
+        with open(os.path.join(registry, ACTIVE), 'r') as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def stage(registry):
+    """Empty staging directory for the files of the next version"""
+    path = os.path.join(registry, VERSIONS_DIR, f".staging-{os.getpid()}-{time.time_ns()}")
+    os.makedirs(path)
+    return path
+
+
+def publish(registry, staging, metadata=None, keep=KEEP_VERSIONS):
+    """Checksum the staged files, move them in as the next version and make it active"""
+    files = {}
+    for name in sorted(os.listdir(staging)):
+        path = os.path.join(staging, name)
+        if os.path.isfile(path) and name != MANIFEST:
+            files[name] = {"sha256": file_sha256(path), "bytes": os.path.getsize(path)}
+
+    existing = versions(registry)
+    version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+    write_json_atomic(os.path.join(staging, MANIFEST), {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "files": files,
+        "metadata": metadata or {},
+    })
+    os.replace(staging, version_dir(registry, version))
+    activate(registry, version)
+
+    for old in existing[:max(len(existing) + 1 - keep, 0)]:
+        shutil.rmtree(version_dir(registry, old), ignore_errors=True)
+    return version
+
+
+def activate(registry, version):
+    """Point active.json at a published version (also how to roll back)"""
+    verify(version_dir(registry, version))
+    write_json_atomic(os.path.join(registry, ACTIVE), {
+        "version": version,
+        "activated_at": datetime.now(timezone.utc).isoformat(),
+    })
+
+
+def verify(directory):
+    """The manifest, after checking every file it lists; ValueError on any mismatch"""
+    try:
+        with open(os.path.join(directory, MANIFEST), 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{directory}: unreadable manifest ({e})") from e
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), dict):
+        raise ValueError(f"{directory}: manifest does not list its files")
+    for name, expected in manifest["files"].items():
+        if not isinstance(expected, dict) or not {"sha256", "bytes"} <= expected.keys():
+            raise ValueError(f"{directory}: manifest entry for {name} has no checksum")
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            raise ValueError(f"{directory}: {name} is missing")
+        if os.path.getsize(path) != expected["bytes"] or file_sha256(path) != expected["sha256"]:
+            raise ValueError(f"{directory}: {name} does not match its checksum")
+    return manifest
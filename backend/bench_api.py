@@ -0,0 +1,312 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import zip_longest
+import numpy as np
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+# End-to-end benchmark of the API, in-process: the FastAPI app is driven
+# through httpx's ASGI transport (no sockets), with stand-ins swapped into
+# the lazy resources before warm-up:
+#   - a deterministic fake LLM (same answers as fake_llm_server.py) behind the
+#     real LLMGateway, with configurable time-to-first-token and per-token delay
+#   - optionally the fixed MLP embedder from bench_embedding_batcher.py
+#   - with --synthetic, also a generated match corpus (NumPy + BM25 indexes in
+#     a temp dir) and a random forest over random team stats, so no data,
+#     model download or API key is needed
+# /teams, /predict and /ask are run at each concurrency level; throughput,
+# p50/p95/p99 latency, errors, /ask routes and peak RSS go to a JSON file.
+# With --baseline, a run fails (exit 1) when p95 latency or throughput is
+# more than --max-regression worse than the baseline's.
+#   cd backend && python bench_api.py --synthetic
+#   cd backend && python bench_api.py --synthetic --baseline ../data/bench/baseline.json
+#
+# Answer and embedding caches are off unless --cache is given, so every /ask
+# pays for the full pipeline.
+
+RESULTS_DIR = "../data/bench"
+SCENARIOS = ("teams", "predict", "ask")
+CORPUS_TEAMS = ["Brazil", "Germany", "Italy", "Argentina", "France", "Uruguay", "England", "Spain",
+                "Netherlands", "Croatia", "Belgium", "Mexico", "Sweden", "Portugal", "Chile", "Poland"]
+CORPUS_YEARS = list(range(1930, 2023, 4))
+BENCH_COLLECTION = "bench_api"
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# ── Stand-ins ──
+def fake_llm(ttft_ms, token_ms):
+    from llm import LLMClient
+    from fake_llm_server import fake_tokens, N_TOKENS
+
+    class FakeLLM(LLMClient):
+        """In-process fake_llm_server: same deterministic answer, same latency model"""
+
+        def complete(self, prompt, timeout=None):
+            tokens = fake_tokens(prompt, N_TOKENS)
+            time.sleep((ttft_ms + token_ms * len(tokens)) / 1000)
+            return "".join(tokens)
+
+        async def stream(self, prompt, timeout=None):
+            await asyncio.sleep(ttft_ms / 1000)
+            for i, token in enumerate(fake_tokens(prompt, N_TOKENS)):
+                if i:
+                    await asyncio.sleep(token_ms / 1000)
+                yield token
+
+    return FakeLLM()
+
+
+def synthetic_corpus(directory, embedder, n_chunks, seed=0):
+    """Match chunks shaped like create_chunks.py output, indexed as the active collection"""
+    from vector_index import write_index
+    from lexical_index import write_lexical_index
+
+    rng = np.random.default_rng(seed)
+    ids, docs, metas = [], [], []
+    for i in range(n_chunks):
+        home, away = rng.choice(CORPUS_TEAMS, 2, replace=False)
+        year = str(CORPUS_YEARS[i % len(CORPUS_YEARS)])
+        home_goals, away_goals = rng.integers(0, 5, 2)
+        ids.append(f"match_{i}")
+        docs.append(f"Match: {home} vs {away}\nYear: {year}\nStage: Group {'ABCDEFGH'[i % 8]}\n"
+                    f"Score: {home} {home_goals} - {away_goals} {away}\nAttendance: {rng.integers(5000, 90000)}")
+        metas.append({"type": "match", "year": year, "home_team": str(home), "away_team": str(away)})
+    embeddings = np.concatenate([np.asarray(embedder.encode(docs[i:i + 512]), dtype=np.float32)
+                                 for i in range(0, len(docs), 512)])
+
+    write_index(os.path.join(directory, "vector_index", BENCH_COLLECTION), ids, docs, metas, embeddings)
+    write_lexical_index(os.path.join(directory, "lexical_index", f"{BENCH_COLLECTION}.json"), ids, docs, metas)
+    with open(os.path.join(directory, "active.json"), 'w') as f:
+        json.dump({"collection": BENCH_COLLECTION}, f)
+
+
+def install_stand_ins(args):
+    """Environment before the app is imported, then loaders swapped on its lazy resources"""
+    os.environ["WARMUP"] = "0"
+    if not args.cache:
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+        os.environ["EMBEDDING_CACHE_SIZE"] = "0"
+        os.environ["EMBEDDING_CACHE_PATH"] = ""
+    if args.synthetic:
+        os.environ["RETRIEVAL_BACKEND"] = "numpy"
+
+    import rag
+    import main
+    from llm_gateway import LLMGateway
+
+    if args.llm == "fake":
+        rag.llm.loader = lambda: LLMGateway(fake_llm(args.ttft_ms, args.token_ms))
+    if args.embedder == "synthetic":
+        from bench_embedding_batcher import SyntheticEmbedder
+        rag.embedding_model.loader = SyntheticEmbedder
+
+    if args.synthetic:
+        from bench_predict import synthetic_artifacts
+        from predictor import Predictor
+
+        directory = args.corpus_dir = tempfile.mkdtemp(prefix="bench_api_")
+        synthetic_corpus(directory, rag.embedding_model.get(), args.corpus)
+        rag.ACTIVE_PATH = os.path.join(directory, "active.json")
+        rag.VECTOR_INDEX_PATH = os.path.join(directory, "vector_index")
+        rag.LEXICAL_INDEX_PATH = os.path.join(directory, "lexical_index")
+        rag.facts.loader = lambda: None
+        model, team_stats = synthetic_artifacts()
+        main.prediction.loader = lambda: Predictor(model, team_stats)
+    return main
+
+
+# ── Load ──
+def ask_questions(n, seed=0):
+    """Distinct questions, half open-ended (dense + hybrid), half keyword lookups"""
+    from bench_embedding_batcher import questions
+
+    rng = np.random.default_rng(seed)
+    keyword = [f"{' vs '.join(rng.choice(CORPUS_TEAMS, 2, replace=False))} {rng.choice(CORPUS_YEARS)}"
+               for _ in range(n // 2)]
+    return [q for pair in zip_longest(questions(n - n // 2), keyword) for q in pair if q is not None]
+
+
+def request_factory(scenario, teams, n, seed=0):
+    """(method, path, json body or None) for each of the n requests"""
+    rng = np.random.default_rng(seed)
+    if scenario == "teams":
+        return [("GET", "/teams", None)] * n
+    if scenario == "predict":
+        pairs = [rng.choice(teams, 2, replace=False) for _ in range(n)]
+        return [("POST", "/predict", {"home_team": str(h), "away_team": str(a)}) for h, a in pairs]
+    return [("POST", "/ask", {"question": q, "n_results": 5}) for q in ask_questions(n, seed)]
+
+
+async def run_scenario(client, requests, concurrency):
+    latencies, statuses, routes = [], {}, {}
+    pending = iter(requests)
+
+    async def worker():
+        for method, path, body in pending:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if path == "/ask" and response.status_code == 200:
+                route = response.json().get("route") or "unknown"
+                routes[route] = routes.get(route, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(requests),
+        "errors": sum(n for status, n in statuses.items() if status >= 400),
+        "statuses": {str(s): n for s, n in sorted(statuses.items())},
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(requests) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+        **({"routes": routes} if routes else {}),
+    }
+
+
+async def run_all(app_module, args):
+    import httpx
+    from lazy import warm_up
+
+    start = time.perf_counter()
+    warm_up(app_module.WARMUP_ORDER)
+    print(f"⏱️ Warm-up finished in {time.perf_counter() - start:.2f}s\n")
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    results = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        teams = (await client.get("/teams")).json()["teams"]
+        if len(teams) < 2 and "predict" in args.scenarios:
+            print("⚠️ Fewer than two teams loaded — skipping /predict")
+            args.scenarios = [s for s in args.scenarios if s != "predict"]
+
+        print(f"{'scenario':<10}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'errors':>8}{'rss MB':>9}")
+        for scenario in args.scenarios:
+            requests = request_factory(scenario, teams, args.requests)
+            # One short untimed pass so lazy paths (index pages, thread pool) are warm
+            await run_scenario(client, requests[:min(10, len(requests))], 1)
+            for concurrency in args.concurrency:
+                result = await run_scenario(client, requests, concurrency)
+                result.update(scenario=scenario, concurrency=concurrency, peak_rss_mb=peak_rss_mb())
+                results.append(result)
+                print(f"{scenario:<10}{concurrency:>6}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}"
+                      f"{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}{result['errors']:>8}"
+                      f"{result['peak_rss_mb'] or 0:>9.1f}")
+    return results
+
+
+# ── Regression Check ──
+def compare(results, baseline, max_regression):
+    """Lines describing each regression against the baseline (empty when within the threshold)"""
+    previous = {(r["scenario"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        base = previous.get((r["scenario"], r["concurrency"]))
+        if base is None:
+            continue
+        name = f"{r['scenario']}@{r['concurrency']}"
+        if r["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {base['p95_ms']:.2f} → {r['p95_ms']:.2f} ms")
+        if r["throughput_rps"] < base["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {base['throughput_rps']:.1f} → {r['throughput_rps']:.1f} req/s")
+        if r["errors"] > base["errors"]:
+            regressions.append(f"{name}: errors {base['errors']} → {r['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Generated corpus, fixed embedder and random forest (no data or models needed)')
+    parser.add_argument('--llm', choices=['fake', 'live'], default='fake')
+    parser.add_argument('--embedder', choices=['model', 'synthetic'], default=None,
+                        help='default: synthetic with --synthetic, otherwise the real model')
+    parser.add_argument('--ttft-ms', type=float, default=50.0, help='fake LLM delay before the first token')
+    parser.add_argument('--token-ms', type=float, default=0.5, help='fake LLM delay per token')
+    parser.add_argument('--corpus', type=int, default=5000, help='synthetic chunks')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated levels')
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario and level')
+    parser.add_argument('--cache', action='store_true', help='Keep the answer and embedding caches on')
+    parser.add_argument('--output', help=f'results JSON (default {RESULTS_DIR}/api_<timestamp>.json)')
+    parser.add_argument('--baseline', help='earlier results JSON to check against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='allowed fractional p95 increase / throughput drop vs the baseline')
+    args = parser.parse_args()
+    args.embedder = args.embedder or ("synthetic" if args.synthetic else "model")
+    args.scenarios = [s for s in args.scenarios.split(',') if s]
+    args.concurrency = [int(c) for c in args.concurrency.split(',')]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    args.corpus_dir = None
+    try:
+        app_module = install_stand_ins(args)
+        results = asyncio.run(run_all(app_module, args))
+    finally:
+        if args.corpus_dir:
+            shutil.rmtree(args.corpus_dir, ignore_errors=True)
+
+    created = datetime.now(timezone.utc)
+    output = args.output or os.path.join(RESULTS_DIR, f"api_{created.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "corpus_dir")}
+    with open(output, 'w') as f:
+        json.dump({
+            "created_at": created.isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": config,
+            "results": results,
+        }, f, indent=2)
+    print(f"\n✅ Results saved to {output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(f"⚠️ {len(regressions)} regression(s) beyond {args.max_regression:.0%} vs {args.baseline}:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print(f"✅ Within {args.max_regression:.0%} of {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import threading
+import time
+import zlib
+import numpy as np
+from embedding_batcher import MicroBatcher
+
+# Load test for the embedding micro-batcher: N threads each embed their own
+# stream of distinct questions (no cache), first one encode call per
+# question, then through MicroBatcher at a few wait windows.
+#   cd backend && python bench_embedding_batcher.py
+#   cd backend && python bench_embedding_batcher.py --synthetic   (fixed MLP embedder, no model download)
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+TEMPLATES = [
+    "How did {} perform at the {} World Cup?",
+    "Who scored for {} in {}?",
+    "Tell me about {} in the {} tournament",
+    "What was {}'s best result before {}?",
+]
+TEAMS = ["Brazil", "Germany", "Italy", "Argentina", "France", "Uruguay", "England", "Spain", "Netherlands"]
+YEARS = list(range(1930, 2023, 4))
+
+
+class SyntheticEmbedder:
+    """Hashed bag of words through a fixed two-layer MLP: cost grows with weights read, like a real encoder"""
+
+    def __init__(self, vocab=8192, hidden=1024, dim=384, seed=0):
+        rng = np.random.default_rng(seed)
+        self.vocab = vocab
+        self.w1 = rng.standard_normal((vocab, hidden)).astype(np.float32) / np.sqrt(vocab)
+        self.w2 = rng.standard_normal((hidden, dim)).astype(np.float32) / np.sqrt(hidden)
+
+    def encode(self, texts, **kwargs):
+        x = np.zeros((len(texts), self.vocab), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                x[i, zlib.crc32(word.encode()) % self.vocab] += 1
+        return np.tanh(x @ self.w1) @ self.w2
+
+
+def questions(n, offset=0):
+    return [TEMPLATES[i % len(TEMPLATES)].format(TEAMS[(i // 4) % len(TEAMS)], YEARS[(i + offset) % len(YEARS)])
+            + f" #{offset + i}" for i in range(n)]
+
+
+def run_load(embed, threads, per_thread):
+    """(questions/sec, latencies in ms) with `threads` clients embedding concurrently"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads + 1)
+
+    def client(k):
+        mine = questions(per_thread, offset=k * per_thread)
+        barrier.wait()
+        local = []
+        for q in mine:
+            start = time.perf_counter()
+            embed(q)
+            local.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=client, args=(k,)) for k in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for w in workers:
+        w.join()
+    return threads * per_thread / (time.perf_counter() - start), latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', action='store_true', help='Use a fixed MLP embedder instead of the model')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=20, help='questions per thread')
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--waits', default='0,2,5', help='comma-separated wait windows in ms')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        model = SyntheticEmbedder()
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(EMBEDDING_MODEL)
+
+    def encode_batch(texts):
+        return model.encode(texts, batch_size=len(texts), show_progress_bar=False)
+
+    encode_batch(questions(8))   # warm-up
+    print(f"{args.threads} threads x {args.requests} questions, max batch {args.batch_size}\n")
+    print(f"{'mode':<18}{'q/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'mean batch':>12}")
+
+    rate, lat = run_load(lambda q: encode_batch([q])[0], args.threads, args.requests)
+    baseline = rate
+    print(f"{'direct':<18}{rate:>10.1f}{np.percentile(lat, 50):>10.2f}{np.percentile(lat, 95):>10.2f}{1:>12.2f}")
+
+    for wait in [float(w) for w in args.waits.split(',')]:
+        batcher = MicroBatcher(encode_batch, max_batch=args.batch_size, max_wait_ms=wait)
+        rate, lat = run_load(batcher.encode, args.threads, args.requests)
+        stats = batcher.stats()
+        print(f"{f'batched {wait:g} ms':<18}{rate:>10.1f}{np.percentile(lat, 50):>10.2f}"
+              f"{np.percentile(lat, 95):>10.2f}{stats['mean_batch_size']:>12.2f}   x{rate / baseline:.1f}")
+    print(f"\nbatch sizes (last run): {stats['batch_size_histogram']}")
+    print(f"queue depth (last run): {stats['queue_depth_histogram']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import numpy as np
+from forest import export_forest, FlatForest
+import artifacts
+
+# Flat-array forest vs sklearn: probability parity, artifact load time and
+# predict_proba latency for single rows and batches.
+#   cd backend && python bench_forest.py
+#   cd backend && python bench_forest.py --synthetic   (no trained artifacts needed)
+
+# The active published version (see artifacts.py), or the legacy flat file
+MODEL_REGISTRY = "../data/model"
+
+
+def best_ms(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', action='store_true', help='Use a random 200-tree, depth-8 forest')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from bench_predict import synthetic_artifacts
+        model, _ = synthetic_artifacts(10)
+    else:
+        model_path = artifacts.active_file(MODEL_REGISTRY, "match_predictor.pkl")
+        print(f"Model: {model_path}")
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+
+    workdir = tempfile.mkdtemp()
+    pkl_path = os.path.join(workdir, 'model.pkl')
+    npz_path = os.path.join(workdir, 'model.npz')
+    with open(pkl_path, 'wb') as f:
+        pickle.dump(model, f)
+    export_forest(model, npz_path)
+
+    # ── Parity ──
+    flat = FlatForest.load(npz_path)
+    X = np.random.default_rng(0).random((5000, model.n_features_in_)) * 3
+    diff = np.abs(flat.predict_proba(X) - model.predict_proba(X)).max()
+    assert diff < 1e-9, f"max abs difference {diff}"
+    assert list(flat.classes_) == list(model.classes_)
+    print(f"✅ Parity: max abs difference {diff:.2e} over {len(X)} rows")
+
+    # ── Load time (the pickle also needs sklearn imported, already paid here) ──
+    def load_pickle():
+        with open(pkl_path, 'rb') as f:
+            pickle.load(f)
+    print(f"\nload  pickle {best_ms(load_pickle, 5):8.2f} ms  ({os.path.getsize(pkl_path) / 1e6:.1f} MB)")
+    print(f"load  flat   {best_ms(lambda: FlatForest.load(npz_path), 5):8.2f} ms  "
+          f"({os.path.getsize(npz_path) / 1e6:.1f} MB)")
+
+    # ── Latency ──
+    print(f"\n{'rows':>6}{'sklearn ms':>14}{'flat ms':>12}")
+    for n in (1, 10, 100, 1000):
+        rows = X[:n]
+        sk = best_ms(lambda: model.predict_proba(rows), args.repeat)
+        fl = best_ms(lambda: flat.predict_proba(rows), args.repeat)
+        print(f"{n:>6}{sk:>14.3f}{fl:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import argparse
+import pickle
+import time
+import numpy as np
+from predictor import Predictor, get_team_features, get_power
+import artifacts
+
+# Per-fixture latency of the batch prediction path vs one call per fixture,
+# plus a parity check against the original single-fixture /predict math.
+#   cd backend && python bench_predict.py
+#   cd backend && python bench_predict.py --synthetic   (no trained artifacts needed)
+
+# The active published version (see artifacts.py), or the legacy flat files
+MODEL_REGISTRY = "../data/model"
+
+
+def legacy_probabilities(model, team_stats, home, away):
+    """The calibration predict_match ran before the batch path existed"""
+    features = np.array([get_team_features(home, team_stats) + get_team_features(away, team_stats)
+                         + [0.33, 0.33, 0.33]])
+    probs = model.predict_proba(features)[0]
+    prob_map = {c: float(p) for c, p in zip(model.classes_, probs)}
+    home_win_prob = prob_map.get(0, 0.33)
+    draw_prob = prob_map.get(1, 0.33)
+    away_win_prob = prob_map.get(2, 0.33)
+
+    power_diff = get_power(home, team_stats) - get_power(away, team_stats)
+    home_win_prob = max(0.05, home_win_prob + power_diff)
+    away_win_prob = max(0.05, away_win_prob - power_diff)
+    draw_prob = max(0.05, draw_prob - abs(power_diff * 0.5))
+
+    total = home_win_prob + draw_prob + away_win_prob
+    return (round((home_win_prob / total) * 100, 1),
+            round((draw_prob / total) * 100, 1),
+            round((away_win_prob / total) * 100, 1))
+
+
+def synthetic_artifacts(n_teams=300, seed=0):
+    """A 200-tree, depth-8 forest and random team stats shaped like the real ones"""
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    team_stats = {}
+    for i in range(n_teams):
+        played = int(rng.integers(1, 900))
+        wins = int(rng.integers(0, played + 1))
+        draws = int(rng.integers(0, played - wins + 1))
+        scored, conceded = float(rng.gamma(2, 0.7)), float(rng.gamma(2, 0.7))
+        team_stats[f"Team {i:03d}"] = {
+            'played': played, 'win_rate': wins / played, 'draw_rate': draws / played,
+            'loss_rate': (played - wins - draws) / played,
+            'avg_goals_scored': scored, 'avg_goals_conceded': conceded,
+        }
+    X = rng.random((5000, 15))
+    y = rng.integers(0, 3, 5000)
+    model = RandomForestClassifier(n_estimators=200, max_depth=8, min_samples_split=5, random_state=42)
+    model.fit(X, y)
+    return model, team_stats
+
+
+def per_fixture_ms(fn, n_fixtures, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best / n_fixtures * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', action='store_true', help='Use a random forest and random team stats')
+    parser.add_argument('--sizes', default='1,10,100,500,1000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        model, team_stats = synthetic_artifacts()
+    else:
+        model_path = artifacts.active_file(MODEL_REGISTRY, "match_predictor.pkl")
+        print(f"Model: {model_path}")
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        with open(artifacts.active_file(MODEL_REGISTRY, "team_stats.pkl"), 'rb') as f:
+            team_stats = pickle.load(f)
+    predictor = Predictor(model, team_stats)
+
+    rng = np.random.default_rng(1)
+    teams = list(team_stats) + ["Atlantis"]
+    sizes = [int(n) for n in args.sizes.split(',')]
+    pairs = [tuple(rng.choice(teams, 2, replace=False)) for _ in range(max(sizes))]
+
+    # ── Parity with the single-fixture path ──
+    check = pairs[:200]
+    batch = predictor.predict(check)
+    for (home, away), out in zip(check, batch):
+        expected = legacy_probabilities(model, team_stats, home, away)
+        actual = (out['home_win_probability'], out['draw_probability'], out['away_win_probability'])
+        assert actual == expected, f"{home} vs {away}: {actual} != {expected}"
+    print(f"✅ Parity: {len(check)} fixtures match the single /predict numbers")
+
+    # ── Latency ──
+    print(f"\n{'N':>6}{'loop ms/fixture':>18}{'batch ms/fixture':>18}{'speedup':>10}")
+    for n in sizes:
+        subset = pairs[:n]
+        loop = per_fixture_ms(lambda: [predictor.predict([p]) for p in subset], n, args.repeat)
+        batched = per_fixture_ms(lambda: predictor.predict(subset), n, args.repeat)
+        print(f"{n:>6}{loop:>18.3f}{batched:>18.3f}{loop / batched:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
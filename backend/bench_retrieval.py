@@ -0,0 +1,101 @@
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from vector_index import VectorIndex, export_collection
+
+# NumPy exact index vs ChromaDB on the same queries: overlap of the top-k
+# ids (Chroma's HNSW is approximate), and query latency for single queries,
+# one batched call and a metadata pre-filter.
+#   cd backend && python bench_retrieval.py                  (live collection)
+#   cd backend && python bench_retrieval.py --synthetic 5000 (random vectors)
+
+QUESTIONS = [
+    "Who won the 2014 FIFA World Cup?",
+    "Brazil World Cup history",
+    "France vs Croatia final",
+    "How many goals were scored in the 1954 World Cup?",
+    "Which team hosted the 1978 World Cup?",
+    "Germany against Argentina",
+    "Italy titles",
+    "Biggest attendance at a World Cup match",
+]
+
+
+def percentile_ms(fn, repeat, q=50):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.percentile(times, q)) * 1000
+
+
+def synthetic_collection(client, n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    collection = client.create_collection(name="bench_retrieval", metadata={"hnsw:space": "cosine"})
+    types = np.array(["match", "tournament", "team_history"])
+    for start in range(0, n, 5000):
+        size = min(5000, n - start)
+        collection.add(
+            ids=[f"chunk_{i}" for i in range(start, start + size)],
+            embeddings=rng.standard_normal((size, dim)).astype(np.float32).tolist(),
+            documents=[f"chunk {i}" for i in range(start, start + size)],
+            metadatas=[{"type": str(types[i % 3]), "year": str(1930 + 4 * (i % 22))}
+                       for i in range(start, start + size)]
+        )
+    queries = rng.standard_normal((64, dim)).astype(np.float32)
+    return collection, queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, metavar='N', help='Benchmark N random 384-d chunks instead')
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    import chromadb
+    if args.synthetic:
+        collection, queries = synthetic_collection(chromadb.EphemeralClient(), args.synthetic, 384)
+    else:
+        from rag import active_collection_name, load_embedding_model, CHROMA_PATH
+        collection = chromadb.PersistentClient(path=CHROMA_PATH).get_collection(active_collection_name())
+        queries = np.asarray(load_embedding_model().encode(QUESTIONS), dtype=np.float32)
+
+    directory = os.path.join(tempfile.mkdtemp(), "index")
+    start = time.perf_counter()
+    export_collection(collection, directory)
+    export_s = time.perf_counter() - start
+    start = time.perf_counter()
+    index = VectorIndex(directory)
+    print(f"{len(index)} chunks, {len(queries)} queries, k={args.k}")
+    print(f"export {export_s * 1000:.1f} ms, open {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # ── Agreement ──
+    chroma_ids = collection.query(query_embeddings=queries.tolist(), n_results=args.k)['ids']
+    exact_ids = index.query(queries, args.k)['ids']
+    overlap = np.mean([len(set(c) & set(e)) / args.k for c, e in zip(chroma_ids, exact_ids)])
+    print(f"Top-{args.k} overlap chroma vs exact: {overlap:.3f}")
+
+    # ── Latency ──
+    where = {"type": "match"}
+    cases = [
+        ("single query", lambda: collection.query(query_embeddings=[queries[0].tolist()], n_results=args.k),
+         lambda: index.query(queries[:1], args.k)),
+        (f"batch of {len(queries)}", lambda: collection.query(query_embeddings=queries.tolist(), n_results=args.k),
+         lambda: index.query(queries, args.k)),
+        ("single + where", lambda: collection.query(query_embeddings=[queries[0].tolist()], n_results=args.k,
+                                                    where=where),
+         lambda: index.query(queries[:1], args.k, where)),
+    ]
+    print(f"\n{'case':<16}{'chroma p50 ms':>15}{'numpy p50 ms':>15}{'speedup':>10}")
+    for label, chroma_fn, numpy_fn in cases:
+        chroma_ms = percentile_ms(chroma_fn, args.repeat)
+        numpy_ms = percentile_ms(numpy_fn, args.repeat)
+        print(f"{label:<16}{chroma_ms:>15.3f}{numpy_ms:>15.3f}{chroma_ms / numpy_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import httpx
+from memory import memory_usage, child_pids
+
+# Memory of a gunicorn deployment with 1/4/8 workers, with and without
+# PRELOAD: starts gunicorn.conf.py, waits until every worker finished its
+# warm-up, sends some /predict and /ask traffic (reference counting touches
+# shared pages, so idle numbers flatter copy-on-write), then sums RSS and
+# PSS over the master and its workers from /proc. Linux only.
+#   cd backend && python bench_workers.py
+#   cd backend && python bench_workers.py --synthetic   (bench_api.py stand-ins, no data or models)
+#
+# PSS is the number to compare: RSS counts shared pages once per worker.
+
+SYNTHETIC_ENV = "BENCH_WORKERS_SYNTHETIC"
+
+
+def synthetic_app():
+    """main.app with bench_api.py's stand-ins; the gunicorn target for --synthetic"""
+    from bench_api import install_stand_ins
+
+    args = argparse.Namespace(synthetic=True, llm="fake", embedder="synthetic", ttft_ms=5.0, token_ms=0.0,
+                              corpus=5000, cache=False)
+    main = install_stand_ins(args)
+    main.WARMUP = True   # install_stand_ins turns it off for in-process runs
+    return main.app
+
+
+if os.getenv(SYNTHETIC_ENV) == "1":
+    app = synthetic_app()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure(workers, preload, synthetic, requests, timeout, tmpdir):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PRELOAD="1" if preload else "0", PORT=str(port),
+               TMPDIR=tmpdir, PYTHONUNBUFFERED="1")
+    if synthetic:
+        env[SYNTHETIC_ENV] = "1"
+    target = "bench_workers:app" if synthetic else "main:app"
+    process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", target],
+                               env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+
+    # Every worker prints "Warm-up finished" once its resources are loaded
+    warmed = threading.Semaphore(0)
+    log = []
+
+    def read_output():
+        for line in process.stdout:
+            log.append(line)
+            if "Warm-up finished" in line:
+                warmed.release()
+
+    threading.Thread(target=read_output, daemon=True).start()
+    try:
+        deadline = time.monotonic() + timeout
+        for _ in range(workers):
+            if not warmed.acquire(timeout=max(deadline - time.monotonic(), 0)):
+                raise RuntimeError(f"workers did not warm up within {timeout}s:\n{''.join(log[-20:])}")
+
+        base = f"http://127.0.0.1:{port}"
+        with httpx.Client(base_url=base, timeout=60) as client:
+            teams = client.get("/teams").json()["teams"]
+            for i in range(requests):
+                if len(teams) >= 2:
+                    client.post("/predict", json={"home_team": teams[i % len(teams)],
+                                                  "away_team": teams[(i + 1) % len(teams)]})
+                client.post("/ask", json={"question": f"How did {teams[i % len(teams)] if teams else 'Brazil'} "
+                                                      f"do in {1930 + 4 * (i % 23)}?"})
+        time.sleep(1)
+
+        master = memory_usage(process.pid)
+        children = [memory_usage(pid) for pid in child_pids(process.pid)]
+        children = [c for c in children if c]
+        if master is None or not children:
+            raise RuntimeError("no /proc/<pid>/smaps_rollup — this benchmark needs Linux")
+        return {
+            "workers": workers,
+            "preload": preload,
+            "master_rss_mb": master["rss_mb"],
+            "master_pss_mb": master["pss_mb"],
+            "worker_rss_mb": round(sum(c["rss_mb"] for c in children) / len(children), 1),
+            "worker_pss_mb": round(sum(c["pss_mb"] for c in children) / len(children), 1),
+            "total_rss_mb": round(master["rss_mb"] + sum(c["rss_mb"] for c in children), 1),
+            "total_pss_mb": round(master["pss_mb"] + sum(c["pss_mb"] for c in children), 1),
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', action='store_true', help="Serve bench_api.py's stand-ins")
+    parser.add_argument('--workers', default='1,4,8', help='comma-separated worker counts')
+    parser.add_argument('--requests', type=int, default=50, help='/predict + /ask pairs sent before measuring')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds to wait for all workers to warm up')
+    parser.add_argument('--output', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="bench_workers_")
+    results = []
+    print(f"{'workers':>8}{'preload':>9}{'worker RSS':>12}{'worker PSS':>12}{'total RSS':>11}{'total PSS':>11}")
+    try:
+        for workers in [int(w) for w in args.workers.split(',')]:
+            for preload in (False, True):
+                r = measure(workers, preload, args.synthetic, args.requests, args.timeout, tmpdir)
+                results.append(r)
+                print(f"{workers:>8}{'on' if preload else 'off':>9}{r['worker_rss_mb']:>12.0f}"
+                      f"{r['worker_pss_mb']:>12.0f}{r['total_rss_mb']:>11.0f}{r['total_pss_mb']:>11.0f}")
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    print("(MB; worker columns are per-worker averages, totals include the master)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import re
+
+# Context assembly for the LLM prompt. Retrieved chunks are cleaned
+# (placeholder fields such as "Attendance: 0" or "Venue: Unknown, …" are
+# dropped), near-identical chunks are removed (the same match can appear
+# from both the Kaggle file and results.csv), and the rest is packed into a
+# token budget in relevance order. A chunk that does not fit is skipped so a
+# shorter, less relevant one can still use the space.
+#
+# Token counts are an estimate (words and punctuation marks), close enough
+# to the LLM tokenizer to size prompts without loading it.
+#
+# CONTEXT_TOKEN_BUDGET  max estimated tokens of retrieved context (default 600)
+
+TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+# A chunk whose word bigrams are this much contained in a kept chunk's (or vice versa) is dropped
+NEAR_DUPLICATE = 0.9
+PLACEHOLDERS = {"", "nan", "none", "unknown", "n/a", "-"}
+# Fields where 0 means "not recorded" rather than a real count
+ZERO_IS_MISSING = {"attendance", "total attendance"}
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+FIELD_PATTERN = re.compile(r"^([^:\n]{1,40}):\s*(.*)$")
+
+
+def count_tokens(text):
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def is_placeholder(field, value):
+    value = value.strip().lower()
+    return value in PLACEHOLDERS or (field.lower() in ZERO_IS_MISSING and value in ("0", "0.0"))
+
+
+def clean_chunk(text):
+    """Drop 'Field: value' lines whose value is empty or a placeholder, and placeholder parts of lists"""
+    lines = []
+    for line in text.splitlines():
+        match = FIELD_PATTERN.match(line.strip())
+        if match is None:
+            if line.strip():
+                lines.append(line.rstrip())
+            continue
+        field, value = match.groups()
+        if not value:
+            lines.append(line.rstrip())   # a heading such as "Brazil FIFA World Cup History:"
+            continue
+        parts = [p.strip() for p in value.split(',')]
+        kept = [p for p in parts if not is_placeholder(field, p)]
+        if not kept:
+            continue
+        lines.append(f"{field}: {', '.join(kept)}" if len(kept) != len(parts) else line.rstrip())
+    return "\n".join(lines)
+
+
+def shingles(text):
+    """Word bigrams, so 'France vs Croatia' and 'Croatia vs France' differ"""
+    words = re.findall(r"\w+", text.lower())
+    return set(zip(words, words[1:])) or set(words)
+
+
+def overlap(a, b):
+    """Share of the smaller shingle set found in the other (1.0 when one chunk restates the other)"""
+    return len(a & b) / min(len(a), len(b))
+
+
+def match_key(text, meta):
+    """The same match from two sources (Kaggle file and results.csv): year, teams and score line"""
+    if not isinstance(meta, dict) or meta.get("type") != "match":
+        return None
+    score = re.search(r"^Score:.*$", text, re.MULTILINE)
+    return meta.get("year"), meta.get("home_team"), meta.get("away_team"), score.group(0) if score else None
+
+
+def build_context(docs, metas, token_budget=TOKEN_BUDGET):
+    """(docs, metas) cleaned, deduplicated and packed into the budget, in relevance order"""
+    packed_docs, packed_metas, seen, matches = [], [], [], set()
+    used = 0
+    for doc, meta in zip(docs, metas):
+        text = clean_chunk(doc)
+        words = shingles(text)
+        key = match_key(text, meta)
+        if not words or key in matches or any(overlap(words, other) >= NEAR_DUPLICATE for other in seen):
+            continue
+        tokens = count_tokens(text)
+        if used + tokens > token_budget and packed_docs:
+            continue    # the most relevant chunk is always kept, even over budget
+        packed_docs.append(text)
+        packed_metas.append(meta)
+        seen.append(words)
+        if key is not None:
+            matches.add(key)
+        used += tokens
+    return packed_docs, packed_metas
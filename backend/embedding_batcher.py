@@ -0,0 +1,109 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+# Cross-request micro-batching in front of the embedding model.
+# Concurrent /ask requests each need one question embedded; encoding them
+# one string at a time wastes the batched matrix kernels and has threads
+# fight over the same cores. encode() queues the text and blocks; a single
+# worker thread takes the first pending text, waits up to the window for
+# more (or until the batch is full), encodes the batch in one call and
+# hands each vector back to its waiting request.
+#
+# EMBED_BATCH_WAIT_MS  how long to hold a batch open for more questions (default 2)
+# EMBED_BATCH_SIZE     max questions per encode call (default 32, 1 disables batching)
+
+BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "2"))
+BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+
+
+def histogram_bucket(value):
+    """Power-of-two upper bound: 1, 2, 4, 8, ..."""
+    bucket = 1
+    while bucket < value:
+        bucket *= 2
+    return bucket
+
+
+class MicroBatcher:
+    def __init__(self, encode_batch, max_batch=BATCH_SIZE, max_wait_ms=BATCH_WAIT_MS):
+        self.encode_batch = encode_batch
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.worker = None
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = {}
+        self.queue_depths = {}
+
+    def encode(self, text):
+        """Embedding of one text, encoded together with whatever else is pending"""
+        if self.max_batch == 1:
+            return np.asarray(self.encode_batch([text])[0])
+        self.start()
+        future = Future()
+        self.queue.put((text, future))
+        return future.result()
+
+    def start(self):
+        if self.worker is None:
+            with self.lock:
+                if self.worker is None:
+                    self.worker = threading.Thread(target=self.run, name="embedding-batcher", daemon=True)
+                    self.worker.start()
+
+    def collect(self):
+        """Block for the first pending text, then gather more until full or the window closes"""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            depth = self.queue.qsize()
+
+            # Identical texts in one batch are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = self.encode_batch(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            by_text = {text: np.asarray(vector) for text, vector in zip(texts, vectors)}
+            for text, future in batch:
+                future.set_result(by_text[text])
+
+            with self.lock:
+                self.batches += 1
+                self.items += len(batch)
+                size_bucket = histogram_bucket(len(batch))
+                self.batch_sizes[size_bucket] = self.batch_sizes.get(size_bucket, 0) + 1
+                depth_bucket = histogram_bucket(depth) if depth else 0
+                self.queue_depths[depth_bucket] = self.queue_depths.get(depth_bucket, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "queue_depth": self.queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                # bucket upper bound -> batches (queue depth is what was still waiting after each dispatch)
+                "batch_size_histogram": {str(b): n for b, n in sorted(self.batch_sizes.items())},
+                "queue_depth_histogram": {str(b): n for b, n in sorted(self.queue_depths.items())},
+            }
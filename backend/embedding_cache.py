@@ -0,0 +1,137 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+# Two-tier cache in front of SentenceTransformer.encode for question text.
+#   tier 1: in-process LRU with a size and TTL limit
+#   tier 2: optional SQLite file (WAL) that survives restarts and is shared
+#           by every worker on the host
+# Keys are normalized question text, so "Who won the 2014 World Cup?" and
+# "who won the 2014 world cup" share one embedding.
+#
+# EMBEDDING_CACHE_SIZE  entries kept in memory (default 1024, 0 disables)
+# EMBEDDING_CACHE_TTL   seconds an in-memory entry stays valid (default 3600)
+# EMBEDDING_CACHE_PATH  SQLite file for tier 2 (empty string disables)
+
+CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))
+CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "../data/cache/embeddings.sqlite3")
+
+
+def normalize_question(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip(" ?!.")
+
+
+class DiskStore:
+    """SQLite table of float32 vectors keyed by (model, normalized text)"""
+
+    def __init__(self, path, model_name):
+        self.path = path
+        self.model_name = model_name
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # rag builds the store at import, which under gunicorn preload is the
+        # master: create the schema on a throwaway connection so no SQLite
+        # handle is open when the workers fork
+        conn = sqlite3.connect(path, timeout=5)
+        try:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL,"
+                    " created_at REAL NOT NULL, PRIMARY KEY (model, key))"
+                )
+        finally:
+            conn.close()
+
+    def connect(self):
+        # One connection per thread and process (a connection must not cross
+        # a fork); WAL lets workers read while one writes
+        conn, pid = getattr(self.local, "conn", (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = (conn, os.getpid())
+        return conn
+
+    def get(self, key):
+        row = self.connect().execute(
+            "SELECT vector FROM embeddings WHERE model = ? AND key = ?", (self.model_name, key)
+        ).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, key, vector):
+        with self.connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                (self.model_name, key, vector.astype(np.float32).tobytes(), time.time())
+            )
+
+
+class EmbeddingCache:
+    def __init__(self, encode, model_name, max_size=CACHE_SIZE, ttl=CACHE_TTL, disk_path=CACHE_PATH):
+        self.encode = encode
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.disk = DiskStore(disk_path, model_name) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, question):
+        """float32 embedding for a question, encoding only on a miss in both tiers"""
+        key = normalize_question(question)
+        now = time.monotonic()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        vector = self.disk.get(key) if self.disk else None
+        if vector is not None:
+            with self.lock:
+                self.disk_hits += 1
+        else:
+            vector = np.asarray(self.encode(key), dtype=np.float32)
+            if self.disk:
+                self.disk.put(key, vector)
+            with self.lock:
+                self.misses += 1
+
+        self.remember(key, vector, now)
+        return vector
+
+    def remember(self, key, vector, now):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (vector, now)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "disk": self.disk.path if self.disk else None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,273 @@
+import csv
+import os
+import re
+from collections import defaultdict
+
+# Structured fast path for factual World Cup questions.
+# matches_clean.csv and cups_clean.csv are indexed in memory by year, team,
+# stage and team pair; a small intent + entity matcher routes recognizable
+# questions ("who won 2014", "how many World Cups has Brazil won", "score of
+# the 2022 final", "France vs Croatia") to a lookup that answers in well under
+# a millisecond with the rows it used as sources. Anything it does not
+# recognize returns None and goes through the RAG pipeline.
+
+MATCHES_PATH = "../data/matches_clean.csv"
+CUPS_PATH = "../data/cups_clean.csv"
+MAX_SOURCES = 10
+
+# Lowercase query name -> dataset names (historic and results.csv spellings)
+ALIASES = {
+    "germany": ["Germany", "Germany FR"],
+    "west germany": ["Germany FR"],
+    "usa": ["USA", "United States"],
+    "united states": ["USA", "United States"],
+    "holland": ["Netherlands"],
+    "south korea": ["Korea Republic", "South Korea"],
+    "korea": ["Korea Republic", "South Korea"],
+    "iran": ["IR Iran", "Iran"],
+    "ivory coast": ["Côte d'Ivoire", "Ivory Coast"],
+    "cote d'ivoire": ["Côte d'Ivoire", "Ivory Coast"],
+    "soviet union": ["Soviet Union"],
+    "ussr": ["Soviet Union"],
+}
+
+YEAR_PATTERN = re.compile(r"\b(19[3-9]\d|20[0-9]\d)\b")
+# Year-only questions are answered here only when the whole question is one of
+# these phrasings about the men's World Cup itself (normalized: lowercase,
+# punctuation dropped, the year replaced by <year>). Anything else that merely
+# mentions a year and "who won" (the Ballon d'Or, the women's or the Club World
+# Cup, the third place match, where the final was played) goes to retrieval.
+TOURNAMENT = r"(the )?(<year> )?(fifa )?(mens )?(world cup|tournament)( (in|of) <year>| <year>)?"
+FINAL = r"(the )?(<year> )?(fifa )?(mens )?(world cup )?final( (in|of) <year>| <year>)?"
+TITLE = r"(winners?|champions?)"
+YEAR_INTENTS = [(intent, re.compile(rf"^(?:{pattern})$")) for intent, pattern in [
+    ("final", rf"(what was )?(the )?(score|result|scoreline) (of|in) {FINAL}"),
+    ("final", rf"{FINAL} (score|result|scoreline)"),
+    ("host", rf"(who|which country|which nation) (hosted|held) {TOURNAMENT}"),
+    ("host", rf"where (was|were) {TOURNAMENT}( (held|hosted|played))?"),
+    ("host", rf"(who was the )?host( country| nation)? (of|for) {TOURNAMENT}"),
+    ("host", rf"{TOURNAMENT} host( country| nation)?"),
+    ("runner_up", rf"who (was|were) (the )?runners? up (in|of|at) {TOURNAMENT}"),
+    ("runner_up", rf"who (lost|finished second (in|at)) {FINAL}"),
+    ("runner_up", rf"who finished second (in|at) {TOURNAMENT}"),
+    ("winner", rf"(who|which (team|country|nation)) won {TOURNAMENT}"),
+    ("winner", rf"(who|which (team|country|nation)) won {FINAL}"),
+    ("winner", rf"who (was|were) (the )?{TITLE} (of|in|at) {TOURNAMENT}"),
+    ("winner", rf"({TITLE} (of|in|at) )?{TOURNAMENT}( {TITLE})?"),
+]]
+
+
+def year_intent(text, year):
+    """Which YEAR_INTENTS phrasing the question is, or None"""
+    normalized = " ".join(re.sub(r"[^a-z0-9]+", " ", re.sub(r"['’]", "", text)).split())
+    normalized = re.sub(rf"\b{year}\b", "<year>", normalized)
+    for intent, pattern in YEAR_INTENTS:
+        if pattern.match(normalized):
+            return intent
+    return None
+
+
+def clean_team(name):
+    # A few rows of the Kaggle matches file carry HTML residue like 'rn">Team'
+    return name.split('>')[-1].strip()
+
+
+def to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+class FactEngine:
+    def __init__(self, matches, cups):
+        self.cups_by_year = {}
+        self.titles = defaultdict(list)
+        for row in cups:
+            year = to_int(row['Year'])
+            self.cups_by_year[year] = row
+            self.titles[row['Winner']].append(year)
+
+        self.matches = []
+        self.by_year = defaultdict(list)
+        self.by_team = defaultdict(list)
+        self.by_stage = defaultdict(list)
+        self.by_pair = defaultdict(list)
+        for row in matches:
+            match = {
+                "year": to_int(row['Year']),
+                "stage": row['Stage'],
+                "home_team": clean_team(row['Home Team Name']),
+                "away_team": clean_team(row['Away Team Name']),
+                "home_goals": to_int(row['Home Team Goals']),
+                "away_goals": to_int(row['Away Team Goals']),
+                "win_conditions": (row.get('Win conditions') or '').strip(),
+                "venue": f"{row.get('Stadium', '')}, {row.get('City', '')}".strip(', '),
+            }
+            i = len(self.matches)
+            self.matches.append(match)
+            self.by_year[match['year']].append(i)
+            self.by_team[match['home_team']].append(i)
+            self.by_team[match['away_team']].append(i)
+            self.by_stage[(match['year'], match['stage'].lower())].append(i)
+            self.by_pair[frozenset((match['home_team'], match['away_team']))].append(i)
+
+        # Entity matcher: every known name and alias, longest first
+        self.names = {}
+        for team in set(self.by_team) | set(self.titles):
+            self.names.setdefault(team.lower(), [team])
+        for alias, teams in ALIASES.items():
+            self.names[alias] = teams
+        pattern = '|'.join(re.escape(n) for n in sorted(self.names, key=len, reverse=True))
+        self.team_pattern = re.compile(r"\b(" + pattern + r")\b")
+
+    # ── Entities ──
+    def entities(self, question):
+        """Known years and teams mentioned in the question, in order"""
+        text = question.lower()
+        years = [int(y) for y in YEAR_PATTERN.findall(text) if int(y) in self.cups_by_year]
+        teams = []
+        for name in self.team_pattern.findall(text):
+            if self.names[name] not in teams:
+                teams.append(self.names[name])
+        return text, years, teams
+
+    # ── Sources ──
+    def tournament_source(self, year):
+        row = self.cups_by_year[year]
+        return {"type": "tournament", "year": str(year), "winner": row['Winner'], "host": row['Country'],
+                "runner_up": row['Runners-Up'], "third": row['Third']}
+
+    def match_source(self, i):
+        m = self.matches[i]
+        return {"type": "match", "year": str(m['year']), "stage": m['stage'],
+                "home_team": m['home_team'], "away_team": m['away_team'],
+                "score": f"{m['home_goals']} - {m['away_goals']}"}
+
+    def score_text(self, i):
+        m = self.matches[i]
+        text = f"{m['home_team']} {m['home_goals']} - {m['away_goals']} {m['away_team']}"
+        if m['win_conditions']:
+            text += f" ({m['win_conditions']})"
+        return text
+
+    def final_match(self, year):
+        """The final of a year: the 'Final' stage row, else the last winner vs runner-up meeting"""
+        finals = self.by_stage.get((year, 'final'))
+        if finals:
+            return finals[-1]
+        row = self.cups_by_year[year]
+        meetings = [i for i in self.by_pair.get(frozenset((row['Winner'], row['Runners-Up'])), [])
+                    if self.matches[i]['year'] == year]
+        return meetings[-1] if meetings else None
+
+    # ── Intents ──
+    def titles_answer(self, teams):
+        names = teams[0]
+        years = sorted(y for name in names for y in self.titles.get(name, []))
+        label = names[0]
+        if not years:
+            answer = f"{label} has not won a World Cup."
+        else:
+            answer = (f"{label} has won {len(years)} World Cup{'s' if len(years) != 1 else ''}: "
+                      f"{', '.join(map(str, years))}.")
+        return answer, [self.tournament_source(y) for y in years]
+
+    def winner_answer(self, year):
+        row = self.cups_by_year[year]
+        answer = f"{row['Winner']} won the {year} FIFA World Cup, beating {row['Runners-Up']} in the final."
+        final = self.final_match(year)
+        sources = [self.tournament_source(year)]
+        if final is not None:
+            answer = f"{row['Winner']} won the {year} FIFA World Cup. Final: {self.score_text(final)}."
+            sources.append(self.match_source(final))
+        return answer, sources
+
+    def final_answer(self, year):
+        final = self.final_match(year)
+        if final is None:
+            return None
+        row = self.cups_by_year[year]
+        answer = f"The {year} World Cup final: {self.score_text(final)}. {row['Winner']} won the title."
+        return answer, [self.match_source(final), self.tournament_source(year)]
+
+    def host_answer(self, year):
+        row = self.cups_by_year[year]
+        return f"The {year} FIFA World Cup was held in {row['Country']}.", [self.tournament_source(year)]
+
+    def runner_up_answer(self, year):
+        row = self.cups_by_year[year]
+        answer = f"{row['Runners-Up']} were runners-up at the {year} World Cup, losing the final to {row['Winner']}."
+        return answer, [self.tournament_source(year)]
+
+    def head_to_head_answer(self, teams, years):
+        side_a, side_b = set(teams[0]), set(teams[1])
+        found = sorted({i for a in side_a for b in side_b for i in self.by_pair.get(frozenset((a, b)), [])},
+                       key=lambda i: (self.matches[i]['year'], i))
+        if years:
+            found = [i for i in found if self.matches[i]['year'] in years]
+        label_a, label_b = teams[0][0], teams[1][0]
+        if not found:
+            return f"{label_a} and {label_b} have not met at a World Cup in this dataset.", []
+
+        wins_a = wins_b = draws = 0
+        for i in found:
+            m = self.matches[i]
+            a_goals, b_goals = ((m['home_goals'], m['away_goals']) if m['home_team'] in side_a
+                                else (m['away_goals'], m['home_goals']))
+            if a_goals > b_goals:
+                wins_a += 1
+            elif a_goals < b_goals:
+                wins_b += 1
+            else:
+                draws += 1
+        meetings = "; ".join(f"{self.matches[i]['year']} {self.matches[i]['stage']}: {self.score_text(i)}"
+                             for i in found[-MAX_SOURCES:])
+        answer = (f"{label_a} vs {label_b} at the World Cup: {len(found)} match{'es' if len(found) != 1 else ''} — "
+                  f"{label_a} {wins_a} wins, {label_b} {wins_b} wins, {draws} draws. {meetings}.")
+        return answer, [self.match_source(i) for i in found[-MAX_SOURCES:]]
+
+    def answer(self, question):
+        """{"answer", "sources"} for a recognized factual question, otherwise None"""
+        text, years, teams = self.entities(question)
+
+        if len(teams) == 1 and not years and re.search(r"\bhow many\b.*\b(world cups?|titles?|times)\b", text) \
+                and re.search(r"\bw[io]n\b", text):
+            result = self.titles_answer(teams)
+        elif len(teams) >= 2 and re.search(r"\b(vs\.?|versus|against|head to head|head-to-head|record)\b", text):
+            result = self.head_to_head_answer(teams, years)
+        elif len(years) == 1 and not teams:
+            year = years[0]
+            intent = year_intent(text, year)
+            if intent == "final":
+                result = self.final_answer(year)
+            elif intent == "host":
+                result = self.host_answer(year)
+            elif intent == "runner_up":
+                result = self.runner_up_answer(year)
+            elif intent == "winner":
+                result = self.winner_answer(year)
+            else:
+                result = None
+        else:
+            result = None
+
+        if result is None:
+            return None
+        answer, sources = result
+        return {"answer": answer, "sources": sources}
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def load_fact_engine():
+    """FactEngine over the cleaned CSVs, or None when they are not deployed"""
+    if not (os.path.exists(MATCHES_PATH) and os.path.exists(CUPS_PATH)):
+        print("⚠️ matches_clean.csv / cups_clean.csv not found — structured answers disabled")
+        return None
+    engine = FactEngine(read_rows(MATCHES_PATH), read_rows(CUPS_PATH))
+    print(f"✅ Fact engine indexed {len(engine.matches)} matches, {len(engine.cups_by_year)} tournaments")
+    return engine
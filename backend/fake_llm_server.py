@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import random
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Local OpenAI-compatible stand-in for the Groq API, for offline load tests.
+#   cd backend && uvicorn fake_llm_server:app --port 8001
+#   LLM_BASE_URL=http://localhost:8001/v1 uvicorn main:app --port 8000
+#
+# FAKE_LLM_TTFT_MS   delay before the first token (default 300)
+# FAKE_LLM_TOKEN_MS  delay between tokens (default 10)
+# FAKE_LLM_TOKENS    tokens per answer (default 120)
+# FAKE_LLM_JITTER    +/- fraction applied to every delay, e.g. 0.5 (default 0)
+# FAKE_LLM_ERROR_RATE  share of requests answered 503 (default 0)
+# FAKE_LLM_HANG_RATE   share of requests that never answer, to exercise deadlines (default 0)
+
+TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", "300"))
+TOKEN_MS = float(os.getenv("FAKE_LLM_TOKEN_MS", "10"))
+N_TOKENS = int(os.getenv("FAKE_LLM_TOKENS", "120"))
+JITTER = float(os.getenv("FAKE_LLM_JITTER", "0"))
+ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+HANG_RATE = float(os.getenv("FAKE_LLM_HANG_RATE", "0"))
+
+app = FastAPI(title="Fake LLM")
+
+
+def fake_tokens(prompt, max_tokens):
+    """Deterministic answer built from the prompt so responses are repeatable"""
+    words = prompt.split() or ["answer"]
+    return [words[i % len(words)] + " " for i in range(min(N_TOKENS, max_tokens))]
+
+
+def delay(ms):
+    return max(0.0, ms * (1 + random.uniform(-JITTER, JITTER))) / 1000
+
+
+def completion_chunk(model, content, finish_reason=None):
+    return {
+        "id": "fake-completion",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": {"content": content} if content else {},
+                     "finish_reason": finish_reason}],
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    prompt = body["messages"][-1]["content"]
+    tokens = fake_tokens(prompt, body.get("max_tokens", N_TOKENS))
+
+    fault = random.random()
+    if fault < ERROR_RATE:
+        await asyncio.sleep(delay(TTFT_MS) / 4)
+        return JSONResponse(status_code=503, content={"error": {"message": "fake overload"}})
+    if fault < ERROR_RATE + HANG_RATE:
+        await asyncio.sleep(3600)
+
+    if not body.get("stream"):
+        await asyncio.sleep(delay(TTFT_MS + TOKEN_MS * len(tokens)))
+        return JSONResponse({
+            "id": "fake-completion",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens)},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens)},
+        })
+
+    async def events():
+        await asyncio.sleep(delay(TTFT_MS))
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(delay(TOKEN_MS))
+            yield f"data: {json.dumps(completion_chunk(model, token))}\n\n"
+        yield f"data: {json.dumps(completion_chunk(model, None, 'stop'))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
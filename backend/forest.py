@@ -0,0 +1,77 @@
+import numpy as np
+
+# RandomForestClassifier flattened into contiguous arrays.
+# All trees share one node table; leaves point to themselves, so a batch of
+# rows walks every tree in lock-step for max_depth steps with plain NumPy
+# indexing and no per-tree Python dispatch, validation or joblib machinery.
+
+
+def export_forest(model, path):
+    """Write a fitted RandomForestClassifier as an uncompressed .npz of node arrays"""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+
+        features.append(np.where(leaf, 0, tree.feature))
+        thresholds.append(np.where(leaf, 0.0, tree.threshold))
+        lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+        rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+
+        # Per-tree predict_proba normalizes the node's class weights
+        value = tree.value[:, 0, :].astype(np.float64)
+        total = value.sum(axis=1, keepdims=True)
+        values.append(value / np.where(total == 0, 1, total))
+
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    np.savez(
+        path,
+        feature=np.concatenate(features).astype(np.int32),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        left=np.concatenate(lefts).astype(np.int32),
+        right=np.concatenate(rights).astype(np.int32),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.int32),
+        classes=np.asarray(model.classes_),
+        max_depth=np.int32(max_depth),
+        n_features=np.int32(model.n_features_in_),
+    )
+
+
+class FlatForest:
+    """Drop-in for the predict_proba / classes_ part of a RandomForestClassifier"""
+
+    def __init__(self, arrays):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.classes_ = arrays['classes']
+        self.max_depth = int(arrays['max_depth'])
+        self.n_features_in_ = int(arrays['n_features'])
+        # [right, left] per node, so one gather picks the branch taken
+        self.children = np.stack([self.right, self.left], axis=1).ravel()
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def predict_proba(self, X):
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        row_starts = (np.arange(len(X)) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.max_depth):
+            go_left = flat_X[row_starts + self.feature[node]] <= self.threshold[node]
+            node = self.children[node * 2 + go_left]
+        return self.value[node].mean(axis=1)
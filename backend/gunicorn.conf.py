@@ -0,0 +1,27 @@
+import os
+
+# gunicorn settings for multi-worker deployments (uvicorn workers).
+#   cd backend && gunicorn -c gunicorn.conf.py main:app
+#
+# With PRELOAD on, the master imports the app and loads
+# main.PRELOAD_RESOURCES (prediction model, team stats, fact engine, BM25
+# index, embedding model) once before forking, then freezes them out of the
+# garbage collector; every worker shares those pages copy-on-write instead of
+# loading its own copy. bench_workers.py measures the difference.
+#
+# WEB_CONCURRENCY  worker processes (default 1)
+# PORT             listen port (default 7860, the Hugging Face Spaces port)
+# PRELOAD          load shared artifacts in the master before forking (default 1, 0 disables)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '7860')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("PRELOAD", "1") != "0"
+timeout = 120
+
+
+def when_ready(server):
+    # Runs in the master after the app is imported and before any worker forks
+    if preload_app:
+        from main import preload
+        preload()
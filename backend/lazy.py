@@ -0,0 +1,59 @@
+import threading
+import time
+
+# Heavy resources (models, clients, indexes) are loaded on first use or by
+# the background warm-up in main.py, never at import time, so uvicorn can
+# answer /health the moment a worker starts. Every resource registers
+# itself here so /ready can report what is loaded and how long it took.
+
+RESOURCES = {}
+
+
+class LazyResource:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+        self.seconds = None
+        self.error = None
+        self.lock = threading.Lock()
+        RESOURCES[name] = self
+
+    def get(self):
+        if self.loaded:
+            return self.value
+        with self.lock:
+            if not self.loaded:
+                start = time.perf_counter()
+                try:
+                    self.value = self.loader()
+                except Exception as e:
+                    self.error = str(e)
+                    print(f"⚠️ {self.name} failed to load after {time.perf_counter() - start:.2f}s: {e}")
+                    raise
+                self.seconds = time.perf_counter() - start
+                self.error = None
+                self.loaded = True
+                print(f"⏱️ {self.name} loaded in {self.seconds:.2f}s")
+        return self.value
+
+    def status(self):
+        return {
+            "loaded": self.loaded,
+            "seconds": round(self.seconds, 3) if self.seconds is not None else None,
+            "error": self.error,
+        }
+
+
+def warm_up(names=None):
+    """Load resources in order, continuing past failures"""
+    for name in names or list(RESOURCES):
+        try:
+            RESOURCES[name].get()
+        except Exception:
+            pass
+
+
+def status():
+    return {name: resource.status() for name, resource in RESOURCES.items()}
@@ -0,0 +1,163 @@
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+import numpy as np
+from fact_engine import ALIASES
+
+# BM25 inverted index over chunk text + metadata values, built at ingestion
+# time next to the vector index (data/lexical_index/<collection>.json).
+#
+# Besides ranking, it recognizes the team names and years a question
+# mentions (from the chunk metadata, plus the fact engine's aliases). They
+# become a Chroma-style `where` pre-filter for dense search, and decide
+# whether the question is a keyword lookup ("France vs Croatia final",
+# "Brazil 1970") that the lexical ranking answers on its own: the top hit
+# covers every entity and at most a couple of other words are left.
+
+K1 = 1.2
+B = 0.75
+TEAM_FIELDS = ("home_team", "away_team", "team", "winner", "host")
+YEAR_PATTERN = re.compile(r"\b(1[89]\d\d|20\d\d)\b")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Ignored when counting the words a keyword query has besides its entities
+STOPWORDS = {
+    "a", "an", "and", "are", "at", "did", "do", "does", "for", "from", "game", "games", "in", "is", "match",
+    "matches", "me", "of", "on", "or", "show", "tell", "the", "to", "v", "vs", "versus", "was", "were",
+    "what", "when", "which", "who", "with", "world", "cup", "cups", "fifa", "about",
+}
+
+
+def fold(text):
+    """Lowercase without diacritics: 'Côte d'Ivoire' -> 'cote d'ivoire'"""
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(fold(text))
+
+
+def chunk_tokens(text, metadata):
+    return tokenize(text + " " + " ".join(str(v) for v in metadata.values()))
+
+
+def write_lexical_index(path, ids, documents, metadatas):
+    """Build the BM25 postings and write them atomically"""
+    postings = defaultdict(list)
+    doc_len = []
+    for row, (text, metadata) in enumerate(zip(documents, metadatas)):
+        counts = Counter(chunk_tokens(text, metadata))
+        doc_len.append(sum(counts.values()))
+        for term, tf in counts.items():
+            postings[term].append([row, tf])
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({"ids": list(ids), "documents": list(documents), "metadatas": list(metadatas),
+                   "doc_len": doc_len, "postings": postings}, f)
+    os.replace(tmp_path, path)
+
+
+class LexicalIndex:
+    def __init__(self, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self.ids = data["ids"]
+        self.documents = data["documents"]
+        self.metadatas = data["metadatas"]
+        doc_len = np.asarray(data["doc_len"], dtype=np.float32)
+        n = len(self.ids)
+        avgdl = float(doc_len.mean()) if n else 1.0
+        self.length_norm = K1 * (1 - B + B * doc_len / max(avgdl, 1e-9))
+
+        self.postings = {}
+        for term, pairs in data["postings"].items():
+            pairs = np.asarray(pairs, dtype=np.int64)
+            idf = math.log(1 + (n - len(pairs) + 0.5) / (len(pairs) + 0.5))
+            self.postings[term] = (pairs[:, 0], idf, pairs[:, 1].astype(np.float32))
+
+        # Entity vocabulary: folded name -> dataset names, longest names matched first
+        self.names = {}
+        for metadata in self.metadatas:
+            for field in TEAM_FIELDS:
+                if metadata.get(field):
+                    self.names.setdefault(fold(metadata[field]), {metadata[field]})
+        for alias, teams in ALIASES.items():
+            known = {t for t in teams if fold(t) in self.names}
+            if known:
+                self.names[alias] = self.names.get(alias, set()) | known
+        pattern = '|'.join(re.escape(n) for n in sorted(self.names, key=len, reverse=True))
+        self.team_pattern = re.compile(r"\b(" + pattern + r")\b") if self.names else None
+        self.years = {m["year"] for m in self.metadatas if m.get("year")}
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ── Ranking ──
+    def scores(self, tokens):
+        scores = np.zeros(len(self), dtype=np.float32)
+        for term in set(tokens):
+            if term in self.postings:
+                rows, idf, tf = self.postings[term]
+                scores[rows] += idf * tf * (K1 + 1) / (tf + self.length_norm[rows])
+        return scores
+
+    def search(self, question, k):
+        """[(row, score)] best first, only rows sharing at least one term"""
+        # Aliases ("ivory coast") also search for the dataset spelling of the team
+        teams, _ = self.entities(question)
+        tokens = tokenize(question) + [t for group in teams for name in group for t in tokenize(name)]
+        scores = self.scores(tokens)
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    # ── Entities ──
+    def entities(self, question):
+        """(team groups, years) mentioned in the question; each group holds one team's dataset names"""
+        text = fold(question)
+        teams = []
+        if self.team_pattern is not None:
+            for name in self.team_pattern.findall(text):
+                if self.names[name] not in teams:
+                    teams.append(self.names[name])
+        years = [y for y in dict.fromkeys(YEAR_PATTERN.findall(text)) if y in self.years]
+        return teams, years
+
+    def covers(self, row, teams, years):
+        metadata = self.metadatas[row]
+        present = {metadata.get(field) for field in TEAM_FIELDS}
+        return all(group & present for group in teams) and all(metadata.get("year") == y for y in years)
+
+    def extra_terms(self, question, teams, years):
+        """Words of the question that are neither entities nor stopwords"""
+        text = fold(question)
+        if self.team_pattern is not None:
+            text = self.team_pattern.sub(" ", text)
+        return [t for t in tokenize(text) if t not in STOPWORDS and t not in years]
+
+
+def where_filter(teams, years):
+    """Chroma-style where clause restricting to chunks about all given teams and years"""
+    clauses = []
+    for group in teams:
+        clauses.append({"$or": [{field: name} for name in sorted(group) for field in TEAM_FIELDS]})
+    if len(years) == 1:
+        clauses.append({"year": years[0]})
+    elif years:
+        clauses.append({"year": {"$in": years}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Ids ordered by sum of 1 / (k + rank) over the rankings they appear in"""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            fused[chunk_id] += 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda chunk_id: -fused[chunk_id])
@@ -0,0 +1,131 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import httpx
+
+# Pluggable chat-completion clients for the RAG pipeline.
+# Set LLM_BASE_URL to any OpenAI-compatible server (e.g. fake_llm_server.py)
+# to run /ask and /ask/stream without the Groq API; otherwise Groq is used.
+# get_llm() wraps the client in llm_gateway.LLMGateway (concurrency limit,
+# deadlines, retries, circuit breaker). Clients keep one pooled keep-alive
+# connection set for the life of the process instead of a TLS handshake per call.
+#
+# LLM_POOL_SIZE  max open connections to the LLM server (default 16)
+
+LLM_MODEL = os.getenv("LLM_MODEL", "llama-3.1-8b-instant")
+TEMPERATURE = 0.1
+MAX_TOKENS = 500
+POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+DEFAULT_TIMEOUT = 60.0
+
+
+class LLMClient(ABC):
+    """What the RAG pipeline needs from a chat model"""
+
+    @abstractmethod
+    def complete(self, prompt: str, timeout: float = None) -> str:
+        """The whole answer text"""
+
+    @abstractmethod
+    async def stream(self, prompt: str, timeout: float = None):
+        """Async iterator over answer text fragments as they are generated"""
+        yield
+
+
+def pool_limits():
+    return httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+
+
+def chat_messages(prompt):
+    return [{"role": "user", "content": prompt}]
+
+
+class GroqLLM(LLMClient):
+    def __init__(self, api_key=None):
+        from groq import Groq, AsyncGroq
+
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        # Retries are the gateway's job; the SDK's own would run past its deadline
+        self.client = Groq(api_key=api_key, max_retries=0,
+                           http_client=httpx.Client(limits=pool_limits()))
+        self.async_client = AsyncGroq(api_key=api_key, max_retries=0,
+                                      http_client=httpx.AsyncClient(limits=pool_limits()))
+
+    def complete(self, prompt, timeout=None):
+        response = self.client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=chat_messages(prompt),
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            timeout=timeout or DEFAULT_TIMEOUT
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, prompt, timeout=None):
+        response = await self.async_client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=chat_messages(prompt),
+            temperature=TEMPERATURE,
+            max_tokens=MAX_TOKENS,
+            stream=True,
+            timeout=timeout or DEFAULT_TIMEOUT
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class OpenAICompatibleLLM(LLMClient):
+    """Plain HTTP client for /chat/completions on an OpenAI-compatible server"""
+
+    def __init__(self, base_url, api_key=None, timeout=DEFAULT_TIMEOUT):
+        self.url = base_url.rstrip('/') + "/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key or 'none'}"}
+        self.timeout = timeout
+        self.client = httpx.Client(limits=pool_limits(), headers=self.headers)
+        self.async_client = None
+
+    def shared_async_client(self):
+        # Created on first use so it binds to the serving event loop
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(limits=pool_limits(), headers=self.headers)
+        return self.async_client
+
+    def payload(self, prompt, stream):
+        return {
+            "model": LLM_MODEL,
+            "messages": chat_messages(prompt),
+            "temperature": TEMPERATURE,
+            "max_tokens": MAX_TOKENS,
+            "stream": stream,
+        }
+
+    def complete(self, prompt, timeout=None):
+        response = self.client.post(self.url, json=self.payload(prompt, False),
+                                    timeout=timeout or self.timeout)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream(self, prompt, timeout=None):
+        client = self.shared_async_client()
+        async with client.stream("POST", self.url, json=self.payload(prompt, True),
+                                 timeout=timeout or self.timeout) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                delta = json.loads(data)["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+
+
+def get_llm() -> LLMClient:
+    from llm_gateway import LLMGateway
+
+    base_url = os.getenv("LLM_BASE_URL")
+    if base_url:
+        return LLMGateway(OpenAICompatibleLLM(base_url, os.getenv("LLM_API_KEY")))
+    return LLMGateway(GroqLLM())
@@ -0,0 +1,288 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import httpx
+from llm import LLMClient
+
+# Gateway in front of the LLM client so a slow or failing upstream cannot
+# stall the API:
+#   - at most LLM_MAX_CONCURRENCY calls in flight; callers wait up to
+#     LLM_QUEUE_TIMEOUT for a slot, then get a 503 (backpressure)
+#   - every call has an overall LLM_DEADLINE, retries included
+#   - retryable failures (connection errors, timeouts, 429, 5xx) are retried
+#     up to LLM_RETRIES times with full-jitter exponential backoff; a stream
+#     is only retried before its first token
+#   - after LLM_BREAKER_THRESHOLD consecutive upstream failures the circuit
+#     opens and calls fail fast with a 503 for LLM_BREAKER_COOLDOWN seconds,
+#     then a single trial call decides whether it closes again
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "5"))
+DEADLINE = float(os.getenv("LLM_DEADLINE", "30"))
+RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.25"))
+BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+
+class LLMUnavailable(Exception):
+    """The LLM cannot take the call right now; main.py answers 503 with Retry-After"""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def status_code(error):
+    """HTTP status of an httpx / groq SDK error, None when there was no response"""
+    response = getattr(error, "response", None)
+    return getattr(error, "status_code", None) or getattr(response, "status_code", None)
+
+
+def is_retryable(error):
+    """Connection problems, timeouts, rate limits and server errors; not bad requests"""
+    status = status_code(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    # asyncio.TimeoutError is not the builtin TimeoutError before Python 3.11
+    if isinstance(error, (httpx.TransportError, TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    # groq SDK errors without a status code
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def backoff(attempt):
+    return random.uniform(0, RETRY_BACKOFF * 2 ** attempt)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.opens = 0
+
+    def allow(self):
+        """"closed", "trial" (one call let through after the cooldown) or None to fail fast"""
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial_running:
+                return None
+            self.trial_running = True
+            return "trial"
+
+    def end_trial(self):
+        """A trial call that ended without a verdict on the upstream (rejected, cancelled, unparseable)"""
+        with self.lock:
+            self.trial_running = False
+
+    def retry_after(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            # A failed trial re-opens the circuit for another cooldown
+            if self.trial_running or (self.opened_at is None and self.failures >= self.threshold):
+                self.opens += 1
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+
+class Slots:
+    """Counting limit shared by sync and async callers"""
+
+    def __init__(self, size):
+        self.size = size
+        self.in_use = 0
+        self.condition = threading.Condition()
+
+    def try_acquire(self):
+        with self.condition:
+            if self.in_use < self.size:
+                self.in_use += 1
+                return True
+            return False
+
+    def acquire(self, timeout):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.in_use < self.size, timeout=max(timeout, 0)):
+                return False
+            self.in_use += 1
+            return True
+
+    async def acquire_async(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.005)
+        return True
+
+    def release(self):
+        with self.condition:
+            self.in_use -= 1
+            self.condition.notify()
+
+
+class LLMGateway(LLMClient):
+    def __init__(self, client, max_concurrency=MAX_CONCURRENCY, queue_timeout=QUEUE_TIMEOUT,
+                 deadline=DEADLINE, retries=RETRIES):
+        self.client = client
+        self.slots = Slots(max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.breaker = CircuitBreaker()
+        self.lock = threading.Lock()
+        self.counts = {"calls": 0, "succeeded": 0, "retries": 0, "failed": 0, "rejected": 0, "short_circuited": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def admit(self):
+        """Breaker verdict for a new call: "closed" or "trial"; raises when the circuit is open"""
+        self.count("calls")
+        verdict = self.breaker.allow()
+        if verdict is None:
+            self.count("short_circuited")
+            raise LLMUnavailable("LLM circuit open after repeated upstream failures",
+                                 retry_after=self.breaker.retry_after())
+        return verdict
+
+    def rejected(self):
+        self.count("rejected")
+        return LLMUnavailable(f"LLM busy: {self.slots.size} calls in flight", retry_after=1.0)
+
+    def not_retryable(self, error):
+        # A 4xx answer (e.g. 400) shows the upstream is up and the request was
+        # wrong. Auth failures and errors without a status (an unparseable body,
+        # a bug) say nothing about its health, so they leave the breaker alone.
+        status = status_code(error)
+        if status is not None and 400 <= status < 500 and status not in (401, 403):
+            self.breaker.record_success()
+        self.count("failed")
+
+    def failure(self, error, attempt, deadline):
+        """Record a failed attempt; True when it is worth retrying"""
+        if not is_retryable(error):
+            return False
+        self.breaker.record_failure()
+        return (attempt < self.retries and self.breaker.state() == "closed"
+                and deadline - time.monotonic() > 0)
+
+    def exhausted(self, error):
+        self.count("failed")
+        return LLMUnavailable(f"LLM upstream failed: {str(error) or type(error).__name__}", retry_after=self.breaker.retry_after() or 1.0)
+
+    def complete(self, prompt, timeout=None):
+        deadline = time.monotonic() + (timeout or self.deadline)
+        trial = self.admit() == "trial"
+        try:
+            if not self.slots.acquire(min(self.queue_timeout, deadline - time.monotonic())):
+                raise self.rejected()
+            try:
+                attempt = 0
+                while True:
+                    try:
+                        answer = self.client.complete(prompt, timeout=max(deadline - time.monotonic(), 0.001))
+                    except Exception as e:
+                        if not is_retryable(e):
+                            self.not_retryable(e)
+                            raise
+                        if not self.failure(e, attempt, deadline):
+                            raise self.exhausted(e) from e
+                        self.count("retries")
+                        time.sleep(min(backoff(attempt), max(deadline - time.monotonic(), 0)))
+                        attempt += 1
+                        continue
+                    self.breaker.record_success()
+                    self.count("succeeded")
+                    return answer
+            finally:
+                self.slots.release()
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+    async def stream(self, prompt, timeout=None):
+        deadline = time.monotonic() + (timeout or self.deadline)
+        trial = self.admit() == "trial"
+        try:
+            if not await self.slots.acquire_async(min(self.queue_timeout, deadline - time.monotonic())):
+                raise self.rejected()
+            try:
+                attempt = 0
+                while True:
+                    started = False
+                    tokens = self.client.stream(prompt, timeout=max(deadline - time.monotonic(), 0.001))
+                    try:
+                        while True:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                raise TimeoutError(f"LLM deadline of {self.deadline:g}s exceeded")
+                            try:
+                                token = await asyncio.wait_for(tokens.__anext__(), remaining)
+                            except StopAsyncIteration:
+                                break
+                            except asyncio.TimeoutError:
+                                raise TimeoutError(f"LLM deadline of {self.deadline:g}s exceeded") from None
+                            started = True
+                            yield token
+                    except Exception as e:
+                        if not is_retryable(e):
+                            self.not_retryable(e)
+                            raise
+                        # Tokens already sent cannot be taken back: only retry before the first one
+                        if started:
+                            self.breaker.record_failure()
+                            raise self.exhausted(e) from e
+                        if not self.failure(e, attempt, deadline):
+                            raise self.exhausted(e) from e
+                        self.count("retries")
+                        await asyncio.sleep(min(backoff(attempt), max(deadline - time.monotonic(), 0)))
+                        attempt += 1
+                        continue
+                    finally:
+                        await tokens.aclose()
+                    self.breaker.record_success()
+                    self.count("succeeded")
+                    return
+            finally:
+                self.slots.release()
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        return {
+            **counts,
+            "in_flight": self.slots.in_use,
+            "max_concurrency": self.slots.size,
+            "circuit": self.breaker.state(),
+            "circuit_opens": self.breaker.opens,
+        }
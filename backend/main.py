@@ -1,57 +1,402 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from rag import query_fifa
+from rag import (query_fifa, stream_fifa, embedding_cache, embedding_batcher, answer_cache, llm, index_version,
+                 MAX_N_RESULTS, RETRIEVAL_BACKEND)
+from llm_gateway import LLMUnavailable
+from predictor import Predictor
+from prediction_matrix import PredictionMatrix, artifact_fingerprint
+from forest import FlatForest
+from lazy import LazyResource, warm_up, status as resource_status
+from memory import memory_usage, describe as describe_memory
+from simulator import pair_table, simulate, GROUP_SIZE
+from team_search import TeamIndex, DEFAULT_LIMIT, MAX_LIMIT
+import artifacts
+import metrics
+import profiling
+from profiling import profiled
 import pickle
+import asyncio
+import gc
+import hashlib
+import hmac
 import json
-import numpy as np
 import os
-
-app = FastAPI(title="FIFA AI Analyst API")
+import random
+import threading
+import time
+
+# X-Admin-Token for /admin/* (profile downloads, model reloads); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+# Set WARMUP=0 to load everything on first use instead of in the background
+WARMUP = os.getenv("WARMUP", "1") != "0"
+# Prediction first, so /teams and /predict serve while the RAG stack still loads
+WARMUP_ORDER = ["predictor", "facts", "lexical", "embedding_model", "retriever", "llm"]
+# Loaded once in the gunicorn master before it forks (PRELOAD=1, see
+# gunicorn.conf.py) and shared copy-on-write by the workers. Only read-only
+# state: the Chroma client (SQLite handles, background threads) and the LLM
+# client (connection pools) are always opened per worker; the NumPy index is
+# a memory map, so it is shared either way.
+PRELOAD_RESOURCES = ["predictor", "facts", "lexical", "embedding_model"] + (
+    ["retriever"] if RETRIEVAL_BACKEND == "numpy" else [])
+
+
+def background_warm_up():
+    start = time.perf_counter()
+    warm_up(WARMUP_ORDER)
+    print(f"⏱️ Warm-up finished in {time.perf_counter() - start:.2f}s — worker {os.getpid()}: "
+          f"{describe_memory(memory_usage())}")
+
+
+def preload():
+    """Load PRELOAD_RESOURCES in this (master) process and keep the garbage collector off their pages"""
+    # HF tokenizers' thread pool does not survive fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    start = time.perf_counter()
+    warm_up(PRELOAD_RESOURCES)
+    # Everything loaded so far lives as long as the process. Frozen objects are
+    # never scanned, so collections in the workers do not write to (and copy)
+    # the shared pages they sit on.
+    gc.collect()
+    gc.freeze()
+    print(f"🧊 Preloaded {', '.join(PRELOAD_RESOURCES)} in {time.perf_counter() - start:.2f}s — "
+          f"{describe_memory(memory_usage())}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    print(f"🧠 Worker {os.getpid()} started — {describe_memory(memory_usage())}")
+    if WARMUP:
+        threading.Thread(target=background_warm_up, name="warm-up", daemon=True).start()
+    if ARTIFACT_POLL_INTERVAL > 0:
+        threading.Thread(target=watch_artifacts, name="artifact-watcher", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="FIFA AI Analyst API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Model-Version", "X-Index-Version"]
 )
 
-# ── Load Model & Stats on Startup ──
+
+class VersionHeaders:
+    """X-Model-Version / X-Index-Version on every response: which artifacts answered it"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_versions(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                for name, version in ((b"x-model-version", model_version()), (b"x-index-version", index_version())):
+                    if version is not None:
+                        headers.append((name, version.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_versions)
+
+
+app.add_middleware(VersionHeaders)
+# /teams, /metrics and batch / simulation results compress well; SSE streams are left alone
+GZIP_MIN_BYTES = int(os.getenv("GZIP_MIN_BYTES", "1024"))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+
+# ── Metrics ──
+# Per-endpoint latency and status counts; per-stage timings come from
+# metrics.span() in rag.py and predictor.py
+if metrics.ENABLED:
+    @app.middleware("http")
+    async def record_request(request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # The route template, not the raw path, so label values stay bounded
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            metrics.observe("http_request_seconds", time.perf_counter() - start,
+                            method=request.method, path=path)
+            metrics.count("http_requests_total", method=request.method, path=path, status=status)
+
+
+# ── Profiling ──
+# Only installed when a profile can be requested or sampled (see profiling.py)
+if profiling.ENABLED:
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        capture = profiling.requested_capture(request.headers, request.query_params)
+        if capture is None:
+            return await call_next(request)
+        token = profiling.current.set(capture)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            profiling.current.reset(token)
+        if capture.data is not None:
+            name = await asyncio.to_thread(profiling.save, capture, request.method, request.url.path,
+                                           time.perf_counter() - start)
+            response.headers["X-Profile"] = name
+            print(f"🔬 Profiled {request.method} {request.url.path} ({capture.reason}) → {name}")
+        return response
+
+
+def cache_metrics():
+    """Cache hit rates and LLM gateway state as scrape-time samples"""
+    for cache, stats in (("embedding", embedding_cache.stats()), ("answer", answer_cache.stats())):
+        hits = stats["hits"] + stats.get("disk_hits", 0)
+        yield "cache_lookups_total", "counter", "Cache lookups by result", {"cache": cache, "result": "hit"}, hits
+        yield "cache_lookups_total", "counter", None, {"cache": cache, "result": "miss"}, stats["misses"]
+        yield "cache_hit_ratio", "gauge", "Hits / lookups since start", {"cache": cache}, stats["hit_rate"]
+        yield "cache_entries", "gauge", "Entries held in memory", {"cache": cache}, stats["size"]
+    batcher = embedding_batcher.stats()
+    yield "embedding_batch_size_mean", "gauge", "Mean questions per encode call", {}, batcher["mean_batch_size"]
+    if llm.loaded:
+        gateway = llm.value.stats()
+        for name in ("calls", "succeeded", "retries", "failed", "rejected", "short_circuited"):
+            yield "llm_calls_total", "counter", "LLM gateway calls by outcome", {"outcome": name}, gateway[name]
+        yield "llm_in_flight", "gauge", "LLM calls holding a concurrency slot", {}, gateway["in_flight"]
+        yield "llm_circuit_open", "gauge", "1 while the LLM circuit breaker fails fast", {}, \
+            int(gateway["circuit"] != "closed")
+
+
+metrics.registry.register(cache_metrics)
+metrics.registry.describe("http_request_seconds", "Request latency by endpoint")
+metrics.registry.describe("http_requests_total", "Requests by endpoint and status")
+metrics.registry.describe("ask_answers_total", "/ask and /ask/stream answers by route")
+metrics.registry.describe("artifact_reloads_total", "Hot swaps of the model / indexes by result")
+
+# ── Model & Stats (loaded lazily / by the warm-up) ──
+# Training publishes versioned, checksummed directories under MODEL_REGISTRY
+# (see artifacts.py) and moves its active.json; before the first published
+# version the flat legacy files below are served.
+MODEL_REGISTRY = "../data/model"
 MODEL_PATH = "../data/model/match_predictor.pkl"
 STATS_PATH = "../data/model/team_stats.pkl"
 TEAMS_PATH = "../data/model/teams_list.json"
-
-try:
-    with open(MODEL_PATH, 'rb') as f:
-        model = pickle.load(f)
-    with open(STATS_PATH, 'rb') as f:
-        team_stats = pickle.load(f)
-    with open(TEAMS_PATH, 'r') as f:
-        teams_list = json.load(f)
-    print(f"✅ Prediction model loaded — {len(teams_list)} teams available")
-except Exception as e:
-    print(f"⚠️ Could not load model: {e}")
-    model = None
-    team_stats = {}
-    teams_list = []
-
-
-# ── Helper Functions ──
-def get_team_features(team):
-    if team in team_stats:
-        s = team_stats[team]
-        return [
-            s['win_rate'],
-            s['draw_rate'],
-            s['loss_rate'],
-            s['avg_goals_scored'],
-            s['avg_goals_conceded'],
-            s['played']
-        ]
-    return [0.33, 0.33, 0.33, 1.0, 1.0, 0]
-
-def get_h2h_neutral():
-    return [0.33, 0.33, 0.33]
+SNAPSHOT_PATH = "../data/features/snapshot.pkl"
+MATRIX_PATH = "../data/model/prediction_matrix.bin"
+FOREST_PATH = "../data/model/match_predictor.npz"
+UNVERSIONED = "unversioned"
+
+# "flat" walks the exported node arrays (no sklearn import or per-call overhead),
+# "sklearn" unpickles the RandomForestClassifier, "auto" prefers flat if exported
+PREDICTOR_BACKEND = os.getenv("PREDICTOR_BACKEND", "auto")
+# Seconds between checks of the registry's active.json (0: only POST /admin/reload switches)
+ARTIFACT_POLL_INTERVAL = float(os.getenv("ARTIFACT_POLL_INTERVAL", "10"))
+
+
+def artifact_paths(version):
+    """Paths of the prediction artifacts of a published version, or of the legacy flat files"""
+    if version is None:
+        return {"model": MODEL_PATH, "forest": FOREST_PATH, "stats": STATS_PATH, "teams": TEAMS_PATH,
+                "snapshot": SNAPSHOT_PATH, "matrix": MATRIX_PATH}
+    directory = artifacts.version_dir(MODEL_REGISTRY, version)
+    return {key: os.path.join(directory, os.path.basename(path)) for key, path in artifact_paths(None).items()}
+
+
+def load_model(paths):
+    if PREDICTOR_BACKEND == "flat" or (PREDICTOR_BACKEND == "auto" and os.path.exists(paths["forest"])):
+        return FlatForest.load(paths["forest"]), "flat"
+    with open(paths["model"], 'rb') as f:
+        return pickle.load(f), "sklearn"
+
+
+def load_predictor(version=None):
+    """Predictor for a published version (default: the active one), checksums verified first"""
+    version = version or artifacts.active_version(MODEL_REGISTRY)
+    manifest = artifacts.verify(artifacts.version_dir(MODEL_REGISTRY, version)) if version is not None else None
+    paths = artifact_paths(version)
+
+    model, model_backend = load_model(paths)
+    if os.path.exists(paths["snapshot"]):
+        # Latest feature store snapshot (scripts/feature_store.py) — includes
+        # results folded in after the model was trained
+        with open(paths["snapshot"], 'rb') as f:
+            snapshot = pickle.load(f)
+        team_stats = snapshot['team_stats']
+        stats_source = paths["snapshot"]
+        teams_list = sorted(team_stats.keys())
+        print(f"✅ Team stats from feature store snapshot as of {snapshot['as_of']}")
+    else:
+        with open(paths["stats"], 'rb') as f:
+            team_stats = pickle.load(f)
+        stats_source = paths["stats"]
+        with open(paths["teams"], 'r') as f:
+            teams_list = json.load(f)
+    print(f"✅ Prediction model {version or UNVERSIONED} loaded ({model_backend}) — "
+          f"{len(teams_list)} teams available")
+
+    # ── Precomputed All-Pairs Matrix ──
+    # Memory-mapped so /predict is a lookup; only used when it was built from the
+    # exact model and stats loaded above, otherwise every fixture goes to the model.
+    matrix = None
+    if os.path.exists(paths["matrix"]):
+        try:
+            matrix = PredictionMatrix(paths["matrix"])
+            if matrix.fingerprint != artifact_fingerprint([paths["model"], stats_source]):
+                print("⚠️ Prediction matrix is stale — using the live model")
+                matrix = None
+            else:
+                print(f"✅ Prediction matrix mapped — {len(matrix.teams)} teams")
+        except Exception as e:
+            print(f"⚠️ Could not map prediction matrix: {e}")
+            matrix = None
+
+    predictor = Predictor(model, team_stats, matrix, teams=teams_list)
+    predictor.version = version or UNVERSIONED
+    # Content hash of what the predictions come from; the seed of every ETag (see http_cache)
+    if manifest is not None:
+        predictor.fingerprint = hashlib.sha256(json.dumps(manifest["files"], sort_keys=True).encode()).hexdigest()
+    else:
+        predictor.fingerprint = artifact_fingerprint(
+            [p for p in (paths["model"], paths["forest"], stats_source) if os.path.exists(p)])
+    predictor.search = TeamIndex(teams_list)
+    return predictor
+
+
+prediction = LazyResource("predictor", load_predictor)
+
+
+def get_predictor():
+    """The loaded Predictor, or None when the model artifacts cannot be loaded"""
+    try:
+        return prediction.get()
+    except Exception:
+        return None
+
+
+def team_index(predictor):
+    """Prefix index for /teams/search, built with the Predictor (or on first use for one built elsewhere)"""
+    index = getattr(predictor, "search", None)
+    if index is None:
+        index = predictor.search = TeamIndex(predictor.teams)
+    return index
+
+
+def model_version():
+    """Version of the Predictor being served, None before it is loaded"""
+    return getattr(prediction.value, "version", UNVERSIONED) if prediction.loaded else None
+
+
+# ── Hot Swap ──
+# A new version is loaded next to the one being served, and only replaces it
+# once it has loaded completely. Requests hold on to the Predictor they got
+# from get_predictor(), so each is answered by exactly one version; a version
+# that fails to verify or load is reported and the old one keeps serving.
+reload_lock = threading.Lock()
+failed_version = None
+
+
+def reload_model(version=None, activate=False):
+    """Load the active (or the given published) version and swap it in; returns what happened.
+
+    With activate, active.json is moved to the version only once it is serving
+    here, so a version that fails to load is never handed to other or restarted workers.
+    """
+    global failed_version
+    with reload_lock:
+        target = version or artifacts.active_version(MODEL_REGISTRY) or UNVERSIONED
+        serving = model_version()
+        if target == serving:
+            if activate:
+                artifacts.activate(MODEL_REGISTRY, target)
+            return {"result": "unchanged", "version": serving}
+        start = time.perf_counter()
+        try:
+            predictor = load_predictor(None if target == UNVERSIONED else target)
+        except Exception as e:
+            failed_version = target
+            metrics.count("artifact_reloads_total", kind="model", result="failed")
+            print(f"⚠️ Model {target} failed to load, still serving {serving}: {e}")
+            return {"result": "failed", "version": serving, "requested": target, "error": str(e)}
+        with prediction.lock:
+            prediction.value = predictor
+            prediction.loaded = True
+            prediction.error = None
+        if activate:
+            # Inside reload_lock, so the watcher never sees the old pointer and swaps back
+            artifacts.activate(MODEL_REGISTRY, target)
+        failed_version = None
+        metrics.count("artifact_reloads_total", kind="model", result="swapped")
+        seconds = time.perf_counter() - start
+        print(f"🔄 Model {serving} → {target} in {seconds:.2f}s")
+        return {"result": "swapped", "version": target, "previous": serving, "seconds": round(seconds, 3)}
+
+
+def watch_artifacts():
+    """Swap in a newly published model version once the registry's active.json moves"""
+    while True:
+        time.sleep(ARTIFACT_POLL_INTERVAL)
+        # Before the first load the warm-up / first request picks up the active version anyway
+        if not prediction.loaded:
+            continue
+        active = artifacts.active_version(MODEL_REGISTRY)
+        if active is not None and active not in (model_version(), failed_version):
+            reload_model(active)
+
+
+def artifact_metrics():
+    """Versions being served, as info-style gauges"""
+    for kind, version in (("model", model_version()), ("index", index_version())):
+        if version is not None:
+            yield "artifact_info", "gauge", "Artifact version being served", {"kind": kind, "version": version}, 1
+
+
+metrics.registry.register(artifact_metrics)
+
+
+# ── HTTP Caching ──
+# Responses that only depend on the model artifacts (/teams, /teams/search,
+# GET /predict) carry an ETag over the served artifacts' content hash and the
+# request URL, so browsers and CDNs revalidate with If-None-Match and get a
+# 304 until another version is swapped in. max-age stays short because a hot
+# swap changes the answer behind the same URL.
+CACHE_MAX_AGE = int(os.getenv("CACHE_MAX_AGE", "300"))
+
+
+def etag_for(request, predictor):
+    """Weak ETag (gzip and identity bodies are equivalent) for this URL under this Predictor"""
+    seed = getattr(predictor, "fingerprint", None) or getattr(predictor, "version", UNVERSIONED)
+    digest = hashlib.sha256(f"{seed}\0{request.url.path}\0{request.url.query}".encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def cached_json(request, predictor, build):
+    """304 when If-None-Match names the current ETag, otherwise build() as JSON; both with cache headers"""
+    etag = etag_for(request, predictor)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CACHE_MAX_AGE}"}
+    # Vary: Accept-Encoding on every variant, so shared caches keep gzip and identity
+    # bodies apart. GZipMiddleware adds it itself to bodies of GZIP_MIN_BYTES or more.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        if "*" in tags or etag.removeprefix("W/") in tags:
+            return Response(status_code=304, headers=headers | {"Vary": "Accept-Encoding"})
+    response = JSONResponse(build(), headers=headers)
+    if len(response.body) < GZIP_MIN_BYTES:
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+MAX_BATCH_SIZE = 1000
+MAX_SIMULATIONS = 200_000
 
 
 # ── Request / Response Models ──
@@ -62,6 +407,8 @@ class QuestionRequest(BaseModel):
 class AnswerResponse(BaseModel):
     answer: str
     sources: list
+    cache: dict | None = None      # set when the answer came from the semantic answer cache
+    route: str | None = None       # "structured", "lexical", "answer_cache" or "rag"
 
 class PredictRequest(BaseModel):
     home_team: str
@@ -78,111 +425,240 @@ class PredictResponse(BaseModel):
     home_stats: dict
     away_stats: dict
 
+class BatchPredictRequest(BaseModel):
+    fixtures: list[PredictRequest]
+
+class BatchPredictResponse(BaseModel):
+    predictions: list[PredictResponse]
+    total: int
+
+class SimulateRequest(BaseModel):
+    teams: list[str]                 # group by group, four per group (32 or 48 teams)
+    n_simulations: int = 10_000
+    seed: int | None = None
+    workers: int = 1
+
+class SimulateResponse(BaseModel):
+    n_simulations: int
+    seed: int
+    stages: list[str]
+    teams: list[dict]
+
 
 # ── Routes ──
 @app.get("/health")
 def health():
     return {"status": "ok", "message": "FIFA AI Analyst is running"}
 
+@app.get("/ready")
+def ready(response: Response):
+    """Which heavy components are loaded; 503 until everything in WARMUP_ORDER is"""
+    components = resource_status()
+    # chroma_client / collection are only loaded behind the chroma retrieval backend
+    is_ready = all(components[name]["loaded"] for name in WARMUP_ORDER if name in components)
+    if not is_ready:
+        response.status_code = 503
+    return {"ready": is_ready, "components": components,
+            "versions": {"model": model_version(), "index": index_version()}}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"embedding": embedding_cache.stats(), "embedding_batcher": embedding_batcher.stats(),
+            "answer": answer_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus text format: counters, stage/endpoint latency histograms with p50/p95/p99, cache hit rates"""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/llm/stats")
+def llm_stats():
+    """Gateway counters, in-flight calls and circuit state (empty until the LLM client is loaded)"""
+    return llm.value.stats() if llm.loaded else {}
+
+def check_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (set ADMIN_TOKEN)")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiles")
+def list_profiles(x_admin_token: str | None = Header(default=None)):
+    """Stored request profiles, newest first"""
+    check_admin(x_admin_token)
+    profiles = profiling.list_profiles()
+    return {"profiles": profiles, "total": len(profiles), "keep": profiling.KEEP}
+
+@app.get("/admin/profiles/{name}")
+def download_profile(name: str, x_admin_token: str | None = Header(default=None)):
+    check_admin(x_admin_token)
+    path = profiling.profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile named {name}")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+@app.post("/admin/reload")
+def reload_artifacts(version: str | None = None, x_admin_token: str | None = Header(default=None)):
+    """Swap in the active model version now, or activate and swap in ?version= (also a rollback)"""
+    check_admin(x_admin_token)
+    if version is not None:
+        if not artifacts.VERSION_PATTERN.match(version):
+            raise HTTPException(status_code=400, detail=f"{version!r} is not a version name (v0001, v0002, ...)")
+        if version not in artifacts.versions(MODEL_REGISTRY):
+            raise HTTPException(status_code=404, detail=f"No published version {version}")
+    try:
+        # With ?version=, active.json moves after the swap, so the other workers' watchers follow
+        result = reload_model(version, activate=version is not None)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if result["result"] == "failed":
+        return JSONResponse(status_code=409, content=result)
+    return result
+
 @app.get("/teams")
-def get_teams():
-    return {"teams": teams_list, "total": len(teams_list)}
+def get_teams(request: Request):
+    predictor = get_predictor()
+    if predictor is None:
+        return {"teams": [], "total": 0}
+    return cached_json(request, predictor, lambda: {"teams": predictor.teams, "total": len(predictor.teams)})
+
+@app.get("/teams/search")
+def search_teams(request: Request, prefix: str = "", limit: int = DEFAULT_LIMIT):
+    """Autocomplete: teams whose name, a word of it or an alias starts with prefix (case and accents ignored)"""
+    if not 1 <= limit <= MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_LIMIT}")
+    predictor = get_predictor()
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Prediction model not loaded")
 
-@app.post("/ask", response_model=AnswerResponse)
-def ask_question(request: QuestionRequest):
+    def results():
+        teams, total = team_index(predictor).search(prefix, limit)
+        return {"prefix": prefix, "teams": teams, "total": total}
+
+    return cached_json(request, predictor, results)
+
+def check_question(request: QuestionRequest):
     if not request.question.strip():
         raise HTTPException(status_code=400, detail="Question cannot be empty")
-    result = query_fifa(request.question, request.n_results)
-    return AnswerResponse(answer=result["answer"], sources=result["sources"])
+    if not 1 <= request.n_results <= MAX_N_RESULTS:
+        raise HTTPException(status_code=400, detail=f"n_results must be between 1 and {MAX_N_RESULTS}")
 
-@app.post("/predict", response_model=PredictResponse)
-def predict_match(request: PredictRequest):
-    if model is None:
+@app.post("/ask", response_model=AnswerResponse)
+@profiled
+def ask_question(request: QuestionRequest):
+    check_question(request)
+    try:
+        result = query_fifa(request.question, request.n_results)
+    except LLMUnavailable as e:
+        metrics.count("ask_answers_total", route="unavailable")
+        return llm_unavailable(e)
+    metrics.count("ask_answers_total", route=result.get("route") or "unknown")
+    return AnswerResponse(answer=result["answer"], sources=result["sources"], cache=result.get("cache"),
+                          route=result.get("route"))
+
+def llm_unavailable(error):
+    """503 with Retry-After so clients back off instead of piling onto a struggling LLM"""
+    return JSONResponse(status_code=503, content={"detail": str(error)},
+                        headers={"Retry-After": str(max(1, round(error.retry_after)))})
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_question_stream(request: QuestionRequest):
+    """Server-sent events: `sources`, `cache` (answer-cache hits only), `token` events, then `done`"""
+    check_question(request)
+
+    async def events():
+        route = "unknown"
+        try:
+            async for event, data in stream_fifa(request.question, request.n_results):
+                if event == "route":
+                    route = data   # for ask_answers_total only, not sent to the client
+                    continue
+                yield sse(event, data)
+            metrics.count("ask_answers_total", route=route)
+            yield sse("done", {})
+        except LLMUnavailable as e:
+            metrics.count("ask_answers_total", route="unavailable")
+            # Headers are already sent: the status travels in the event
+            yield sse("error", {"detail": str(e), "status": 503, "retry_after": round(e.retry_after, 1)})
+        except Exception as e:
+            yield sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def check_fixture(predictor, home, away):
+    if predictor is None:
         raise HTTPException(status_code=503, detail="Prediction model not loaded")
-
-    home = request.home_team
-    away = request.away_team
-
     if home == away:
         raise HTTPException(status_code=400, detail="Teams must be different")
 
-    # Build features
-    home_features = get_team_features(home)
-    away_features = get_team_features(away)
-    h2h = get_h2h_neutral()
-    features = np.array([home_features + away_features + h2h])
-
-    # Get raw probabilities
-    probs = model.predict_proba(features)[0]
-    classes = model.classes_
-    prob_map = {c: float(p) for c, p in zip(classes, probs)}
-
-    home_win_prob = prob_map.get(0, 0.33)
-    draw_prob     = prob_map.get(1, 0.33)
-    away_win_prob = prob_map.get(2, 0.33)
-
-
-
-    # ── Probability Calibration ──
-    # The Random Forest generates conservative probabilities (~33% for everything).
-    # We apply a confidence multiplier based on the teams' historical power.
-    def get_power(t):
-        s = team_stats.get(t, {})
-        wr = s.get('win_rate', 0.33)
-        gd = s.get('avg_goals_scored', 1.0) - s.get('avg_goals_conceded', 1.0)
-        return wr + (gd * 0.1)
-
-    home_power = get_power(home)
-    away_power = get_power(away)
-    power_diff = home_power - away_power
-
-    # Aggressively shift probabilities based on power difference
-    home_win_prob = max(0.05, home_win_prob + power_diff)
-    away_win_prob = max(0.05, away_win_prob - power_diff)
-    draw_prob = max(0.05, draw_prob - abs(power_diff * 0.5))
-
-    # Normalize so all probs sum to 100
-    total = home_win_prob + draw_prob + away_win_prob
-    home_win_prob = round((home_win_prob / total) * 100, 1)
-    draw_prob     = round((draw_prob / total) * 100, 1)
-    away_win_prob = round((away_win_prob / total) * 100, 1)
-
-    # Determine prediction
-    max_prob = max(home_win_prob, draw_prob, away_win_prob)
-    if max_prob == home_win_prob:
-        prediction = f"{home} wins"
-    elif max_prob == draw_prob:
-        prediction = "Draw"
-    else:
-        prediction = f"{away} wins"
-
-    # Confidence label
-    if max_prob >= 60:
-        confidence = "High"
-    elif max_prob >= 45:
-        confidence = "Medium"
-    else:
-        confidence = "Low"
-
-    def format_stats(team):
-        if team in team_stats:
-            s = team_stats[team]
-            return {
-                "played": s['played'],
-                "win_rate": f"{round(s['win_rate'] * 100, 1)}%",
-                "avg_goals_scored": round(s['avg_goals_scored'], 2),
-                "avg_goals_conceded": round(s['avg_goals_conceded'], 2),
-            }
-        return {"played": 0, "win_rate": "N/A", "avg_goals_scored": 0, "avg_goals_conceded": 0}
-
-    return PredictResponse(
-        home_team=home,
-        away_team=away,
-        home_win_probability=home_win_prob,
-        draw_probability=draw_prob,
-        away_win_probability=away_win_prob,
-        prediction=prediction,
-        confidence=confidence,
-        home_stats=format_stats(home),
-        away_stats=format_stats(away)
-    )
\ No newline at end of file
+@app.post("/predict", response_model=PredictResponse)
+@profiled
+def predict_match(request: PredictRequest):
+    predictor = get_predictor()
+    check_fixture(predictor, request.home_team, request.away_team)
+    return PredictResponse(**predictor.predict([(request.home_team, request.away_team)])[0])
+
+@app.get("/predict", response_model=PredictResponse)
+@profiled
+def predict_match_cacheable(request: Request, home_team: str, away_team: str):
+    """POST /predict as a GET, so browsers and CDNs can cache it per model version"""
+    predictor = get_predictor()
+    check_fixture(predictor, home_team, away_team)
+    return cached_json(request, predictor,
+                       lambda: PredictResponse(**predictor.predict([(home_team, away_team)])[0]).model_dump())
+
+@app.post("/predict/batch", response_model=BatchPredictResponse)
+@profiled
+def predict_batch(request: BatchPredictRequest):
+    predictor = get_predictor()
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Prediction model not loaded")
+    if len(request.fixtures) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} fixtures per batch")
+
+    fixtures = [(f.home_team, f.away_team) for f in request.fixtures]
+    for i, (home, away) in enumerate(fixtures):
+        if home == away:
+            raise HTTPException(status_code=400, detail=f"Fixture {i}: teams must be different")
+
+    # One feature matrix, one predict_proba call, array calibration
+    predictions = predictor.predict(fixtures)
+    return BatchPredictResponse(
+        predictions=[PredictResponse(**p) for p in predictions],
+        total=len(predictions)
+    )
+
+@app.post("/simulate", response_model=SimulateResponse)
+@profiled
+def simulate_tournament(request: SimulateRequest):
+    predictor = get_predictor()
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Prediction model not loaded")
+    if len(request.teams) not in (32, 48):
+        raise HTTPException(status_code=400, detail="Provide 32 or 48 teams, listed group by group")
+    if len(set(request.teams)) != len(request.teams):
+        raise HTTPException(status_code=400, detail="Teams must be different")
+    if not 1 <= request.n_simulations <= MAX_SIMULATIONS:
+        raise HTTPException(status_code=400, detail=f"n_simulations must be between 1 and {MAX_SIMULATIONS}")
+
+    seed = request.seed if request.seed is not None else random.randrange(2**32)
+    table = pair_table(predictor, request.teams)
+    stages, probs = simulate(table, request.n_simulations, seed=seed, workers=request.workers)
+
+    teams = [
+        {
+            "team": team,
+            "group": chr(ord('A') + i // GROUP_SIZE),
+            "probabilities": {stage: round(float(p), 4) for stage, p in zip(stages, row)},
+        }
+        for i, (team, row) in enumerate(zip(request.teams, probs))
+    ]
+    teams.sort(key=lambda t: t["probabilities"]["champion"], reverse=True)
+    return SimulateResponse(n_simulations=request.n_simulations, seed=seed, stages=stages, teams=teams)
@@ -0,0 +1,55 @@
+import os
+
+# Process memory from /proc/<pid>/smaps_rollup (Linux). RSS counts a shared
+# page in every process that maps it, so with N forked workers it overstates
+# the real footprint; PSS charges each process its share of shared pages,
+# and the PSS of all processes adds up to what the deployment really uses.
+# Returns None where smaps_rollup is not available (macOS, Windows, old kernels).
+
+FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def memory_usage(pid="self"):
+    """{rss_mb, pss_mb, shared_*_mb, private_*_mb} for a process, or None"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    usage = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].rstrip(':') in FIELDS:
+            usage[FIELDS[parts[0].rstrip(':')]] = round(int(parts[1]) / 1024, 1)
+    return usage or None
+
+
+def describe(usage):
+    if usage is None:
+        return "memory n/a"
+    shared = usage.get("shared_clean_mb", 0) + usage.get("shared_dirty_mb", 0)
+    return f"RSS {usage['rss_mb']:.0f} MB, PSS {usage['pss_mb']:.0f} MB, shared {shared:.0f} MB"
+
+
+def child_pids(parent):
+    """Direct children of a process, from /proc/<pid>/stat"""
+    children = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", 'r') as f:
+                # The command name is in parentheses and may contain spaces
+                fields = f.read().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == parent:
+            children.append(int(name))
+    return children
@@ -0,0 +1,178 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# In-process metrics exported at /metrics in the Prometheus text format.
+# span("rag.embed") times one stage of a request into the fifa_stage_seconds
+# histogram; count() bumps a counter; collectors registered by main.py turn
+# the caches' and the LLM gateway's own stats into gauges at scrape time.
+# Besides the cumulative buckets, every histogram keeps its last WINDOW
+# observations and exports p50/p95/p99 over them as a summary, so recent
+# latency is readable without a Prometheus server doing histogram_quantile().
+#
+# METRICS_ENABLED  set to 0 to make span() and count() no-ops (default 1)
+
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+PREFIX = "fifa_"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 1024
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=WINDOW)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self):
+        """{q: value} over the recent window, nearest rank"""
+        values = sorted(self.recent)
+        if not values:
+            return {}
+        return {q: values[min(len(values) - 1, int(q * len(values)))] for q in QUANTILES}
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help = {}
+        self.counters = {}      # name -> {label key: value}
+        self.histograms = {}    # name -> {label key: Histogram}
+        self.buckets = {}       # name -> bucket bounds, for histograms not measured in seconds
+        self.collectors = []
+
+    def describe(self, name, text, buckets=None):
+        self.help[name] = text
+        if buckets is not None:
+            self.buckets[name] = buckets
+
+    def inc(self, name, labels, value=1):
+        key = label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        self.observe_key(name, label_key(labels), value)
+
+    def observe_key(self, name, key, value):
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(self.buckets.get(name, LATENCY_BUCKETS))
+            series[key].observe(value)
+
+    def register(self, collector):
+        """collector() yields (name, type, help, labels, value) samples at scrape time"""
+        self.collectors.append(collector)
+
+    def render(self):
+        lines = []
+
+        def header(name, kind, text=None):
+            text = text or self.help.get(name)
+            if text:
+                lines.append(f"# HELP {PREFIX}{name} {text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                header(name, "counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{PREFIX}{name}{format_labels(key)} {format_value(value)}")
+
+            for name, series in sorted(self.histograms.items()):
+                header(name, "histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        cumulative += n
+                        lines.append(f"{PREFIX}{name}_bucket{format_labels(key, [('le', bound)])} {cumulative}")
+                    lines.append(f"{PREFIX}{name}_bucket{format_labels(key, [('le', '+Inf')])} {hist.count}")
+                    lines.append(f"{PREFIX}{name}_sum{format_labels(key)} {format_value(hist.sum)}")
+                    lines.append(f"{PREFIX}{name}_count{format_labels(key)} {hist.count}")
+
+                header(f"{name}_recent", "summary", f"Quantiles of {name} over the last {WINDOW} observations")
+                for key, hist in sorted(series.items()):
+                    for q, value in hist.quantiles().items():
+                        lines.append(f"{PREFIX}{name}_recent{format_labels(key, [('quantile', q)])} "
+                                     f"{format_value(value)}")
+                    lines.append(f"{PREFIX}{name}_recent_sum{format_labels(key)} {format_value(sum(hist.recent))}")
+                    lines.append(f"{PREFIX}{name}_recent_count{format_labels(key)} {len(hist.recent)}")
+
+        samples = {}
+        for collector in self.collectors:
+            try:
+                for name, kind, text, labels, value in collector():
+                    samples.setdefault(name, (kind, text, []))[2].append((label_key(labels), value))
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+        for name, (kind, text, series) in sorted(samples.items()):
+            header(name, kind, text)
+            for key, value in series:
+                lines.append(f"{PREFIX}{name}{format_labels(key)} {format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe("stage_seconds", "Time spent in one stage of a request")
+
+
+class Span:
+    __slots__ = ("key", "start")
+
+    def __init__(self, stage):
+        self.key = (("stage", stage),)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        registry.observe_key("stage_seconds", self.key, time.perf_counter() - self.start)
+
+
+NOOP = nullcontext()
+
+
+def span(stage):
+    """Context manager timing one stage, e.g. with span("rag.retrieve"): ..."""
+    return Span(stage) if ENABLED else NOOP
+
+
+def count(name, value=1, **labels):
+    if ENABLED:
+        registry.inc(name, labels, value)
+
+
+def observe(name, value, **labels):
+    if ENABLED:
+        registry.observe(name, labels, value)
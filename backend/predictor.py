@@ -0,0 +1,166 @@
+import numpy as np
+from metrics import span
+
+# Match prediction for N fixtures at once: one (N x 15) feature matrix, one
+# predict_proba call and the power-difference calibration as array operations.
+# The single /predict endpoint is just N = 1.
+
+NEUTRAL_FEATURES = [0.33, 0.33, 0.33, 1.0, 1.0, 0]
+NEUTRAL_H2H = [0.33, 0.33, 0.33]
+NEUTRAL_POWER = 0.33
+
+
+def get_team_features(team, team_stats):
+    if team in team_stats:
+        s = team_stats[team]
+        return [
+            s['win_rate'],
+            s['draw_rate'],
+            s['loss_rate'],
+            s['avg_goals_scored'],
+            s['avg_goals_conceded'],
+            s['played']
+        ]
+    return NEUTRAL_FEATURES
+
+
+def get_power(team, team_stats):
+    s = team_stats.get(team, {})
+    wr = s.get('win_rate', 0.33)
+    gd = s.get('avg_goals_scored', 1.0) - s.get('avg_goals_conceded', 1.0)
+    return wr + (gd * 0.1)
+
+
+def format_stats(team, team_stats):
+    if team in team_stats:
+        s = team_stats[team]
+        return {
+            "played": s['played'],
+            "win_rate": f"{round(s['win_rate'] * 100, 1)}%",
+            "avg_goals_scored": round(s['avg_goals_scored'], 2),
+            "avg_goals_conceded": round(s['avg_goals_conceded'], 2),
+        }
+    return {"played": 0, "win_rate": "N/A", "avg_goals_scored": 0, "avg_goals_conceded": 0}
+
+
+def calibrate(raw, power_diff):
+    """Shift raw (N x 3) probabilities by the power difference and normalize to percentages
+
+    The Random Forest generates conservative probabilities (~33% for everything),
+    so we apply a confidence multiplier based on the teams' historical power.
+    """
+    home_win = np.maximum(0.05, raw[:, 0] + power_diff)
+    away_win = np.maximum(0.05, raw[:, 2] - power_diff)
+    draw = np.maximum(0.05, raw[:, 1] - np.abs(power_diff * 0.5))
+
+    total = home_win + draw + away_win
+    return np.column_stack([(home_win / total) * 100, (draw / total) * 100, (away_win / total) * 100])
+
+
+def describe(home, away, probs):
+    """Rounded probabilities, prediction and confidence label for one fixture"""
+    home_win_prob = round(float(probs[0]), 1)
+    draw_prob = round(float(probs[1]), 1)
+    away_win_prob = round(float(probs[2]), 1)
+
+    max_prob = max(home_win_prob, draw_prob, away_win_prob)
+    if max_prob == home_win_prob:
+        prediction = f"{home} wins"
+    elif max_prob == draw_prob:
+        prediction = "Draw"
+    else:
+        prediction = f"{away} wins"
+
+    if max_prob >= 60:
+        confidence = "High"
+    elif max_prob >= 45:
+        confidence = "Medium"
+    else:
+        confidence = "Low"
+
+    return {
+        "home_win_probability": home_win_prob,
+        "draw_probability": draw_prob,
+        "away_win_probability": away_win_prob,
+        "prediction": prediction,
+        "confidence": confidence,
+    }
+
+
+class Predictor:
+    """Model + team stats with per-team feature rows precomputed as arrays"""
+
+    def __init__(self, model, team_stats, matrix=None, teams=None):
+        self.model = model
+        self.team_stats = team_stats
+        self.matrix = matrix
+        self.teams = teams if teams is not None else sorted(team_stats)
+        self.team_index = {team: i for i, team in enumerate(team_stats)}
+
+        # Last row is the neutral fallback for unknown teams
+        teams = list(team_stats)
+        self.features = np.array([get_team_features(t, team_stats) for t in teams] + [NEUTRAL_FEATURES],
+                                 dtype=np.float64)
+        self.power = np.array([get_power(t, team_stats) for t in teams] + [NEUTRAL_POWER], dtype=np.float64)
+
+        # Map model classes (0=home win, 1=draw, 2=away win) onto output columns
+        self.class_columns = [(j, int(c)) for j, c in enumerate(model.classes_) if c in (0, 1, 2)]
+
+    def indices(self, teams):
+        unknown = len(self.team_index)
+        return np.array([self.team_index.get(t, unknown) for t in teams], dtype=np.int64)
+
+    def feature_matrix(self, home_idx, away_idx):
+        h2h = np.broadcast_to(NEUTRAL_H2H, (len(home_idx), 3))
+        return np.hstack([self.features[home_idx], self.features[away_idx], h2h])
+
+    def raw_probabilities(self, features):
+        """predict_proba mapped onto [home, draw, away], 0.33 for classes the model lacks"""
+        probs = self.model.predict_proba(features)
+        raw = np.full((len(features), 3), 0.33)
+        for j, c in self.class_columns:
+            raw[:, c] = probs[:, j]
+        return raw
+
+    def probabilities(self, homes, aways):
+        """Calibrated (N x 3) percentages, from the precomputed matrix where it covers the pair"""
+        if self.matrix is None:
+            return self.live_probabilities(homes, aways)
+
+        with span("predict.matrix"):
+            probs, found = self.matrix.lookup(homes, aways)
+        if not found.all():
+            missing = np.flatnonzero(~found)
+            probs[missing] = self.live_probabilities([homes[i] for i in missing],
+                                                     [aways[i] for i in missing])
+        return probs
+
+    def live_probabilities(self, homes, aways):
+        """Calibrated (N x 3) percentages for home win / draw / away win from the model"""
+        home_idx = self.indices(homes)
+        away_idx = self.indices(aways)
+        with span("predict.features"):
+            features = self.feature_matrix(home_idx, away_idx)
+        with span("predict.inference"):
+            raw = self.raw_probabilities(features)
+        with span("predict.calibrate"):
+            return calibrate(raw, self.power[home_idx] - self.power[away_idx])
+
+    def predict(self, fixtures):
+        """Full response dicts for a list of (home, away) pairs"""
+        if not fixtures:
+            return []
+        homes = [home for home, _ in fixtures]
+        aways = [away for _, away in fixtures]
+        probs = self.probabilities(homes, aways)
+        with span("predict.format"):
+            return [
+                {
+                    "home_team": home,
+                    "away_team": away,
+                    **describe(home, away, row),
+                    "home_stats": format_stats(home, self.team_stats),
+                    "away_stats": format_stats(away, self.team_stats),
+                }
+                for home, away, row in zip(homes, aways, probs)
+            ]
@@ -0,0 +1,180 @@
+import contextvars
+import cProfile
+import functools
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# On-demand profiling of single requests. A request is profiled when it
+# carries PROFILE_TOKEN in the X-Profile-Token header (never the query
+# string, which access logs and browser history keep) or is picked by
+# PROFILE_SAMPLE_RATE. main.py's middleware marks the request in a context
+# variable; endpoints wrapped in @profiled check it in the worker thread
+# that runs them and record either
+#   - cprofile: deterministic cProfile stats (.prof, open with pstats/snakeviz)
+#   - collapsed: stacks sampled every PROFILE_INTERVAL_MS from that thread
+#     ("frame;frame;frame count" lines for flamegraph.pl / speedscope)
+# Work handed to another thread (the embedding micro-batcher) shows up as
+# the wait for its result. Profiles go to PROFILE_DIR, which keeps the
+# newest PROFILE_KEEP files, and are listed / downloaded at /admin/profiles
+# with main.py's ADMIN_TOKEN.
+#
+# With no token and a zero rate the middleware is not installed and
+# @profiled costs one context variable lookup.
+#
+# PROFILE_TOKEN        enables token-triggered profiling (default unset)
+# PROFILE_SAMPLE_RATE  share of requests profiled at random (default 0)
+# PROFILE_FORMAT       cprofile or collapsed (default cprofile, ?profile_format= overrides)
+# PROFILE_INTERVAL_MS  stack sampling interval for collapsed profiles (default 2)
+# PROFILE_DIR          where profiles are kept (default ../data/profiles)
+# PROFILE_KEEP         profiles kept on disk (default 50)
+
+TOKEN = os.getenv("PROFILE_TOKEN", "")
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+DEFAULT_FORMAT = os.getenv("PROFILE_FORMAT", "cprofile")
+INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "2"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "../data/profiles")
+KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+ENABLED = bool(TOKEN) or SAMPLE_RATE > 0
+FORMATS = {"cprofile": "prof", "collapsed": "collapsed"}
+NAME_PATTERN = re.compile(r"^(\d+)_([A-Z]+)_([\w.-]+)_(\d+)ms\.(prof|collapsed)$")
+
+current = contextvars.ContextVar("profile_capture", default=None)
+ring_lock = threading.Lock()
+
+
+def authorized(token):
+    return bool(TOKEN) and token is not None and hmac.compare_digest(token, TOKEN)
+
+
+def requested_capture(headers, query):
+    """A Capture for this request, or None: profile token first, then random sampling"""
+    token = headers.get("x-profile-token")
+    if token is not None and authorized(token):
+        reason = "requested"
+    elif SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        reason = "sampled"
+    else:
+        return None
+    fmt = query.get("profile_format") or headers.get("x-profile-format") or DEFAULT_FORMAT
+    return Capture(fmt if fmt in FORMATS else DEFAULT_FORMAT, reason)
+
+
+class Capture:
+    """Filled in by @profiled in the worker thread, saved by the middleware"""
+
+    def __init__(self, fmt, reason):
+        self.format = fmt
+        self.reason = reason
+        self.data = None
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack every interval into collapsed-stack counts"""
+
+    def __init__(self, thread_id, interval_ms=INTERVAL_MS):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = max(interval_ms, 0.1) / 1000
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+
+def profiled(endpoint):
+    """Run a sync endpoint under the profiler when its request was marked for profiling"""
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        capture = current.get()
+        if capture is None:
+            return endpoint(*args, **kwargs)
+        if capture.format == "collapsed":
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                capture.data = sampler.stop()
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(endpoint, *args, **kwargs)
+        finally:
+            capture.data = profile
+
+    return wrapper
+
+
+# ── On-disk Ring ──
+def save(capture, method, path, seconds):
+    """Write the captured profile and drop the oldest beyond KEEP; returns its name"""
+    slug = re.sub(r"[^\w.-]+", "-", path.strip("/").replace("/", ".")) or "root"
+    name = f"{time.time_ns()}_{method}_{slug}_{round(seconds * 1000)}ms.{FORMATS[capture.format]}"
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    target = os.path.join(PROFILE_DIR, name)
+    if capture.format == "collapsed":
+        with open(target, 'w') as f:
+            f.write(capture.data)
+    else:
+        capture.data.dump_stats(target)
+
+    with ring_lock:
+        for old in [p["name"] for p in list_profiles()][KEEP:]:
+            try:
+                os.remove(os.path.join(PROFILE_DIR, old))
+            except OSError:
+                pass
+    return name
+
+
+def list_profiles():
+    """Newest first: name, endpoint, duration, format, size"""
+    try:
+        entries = list(os.scandir(PROFILE_DIR))
+    except OSError:
+        return []
+    profiles = []
+    for entry in entries:
+        match = NAME_PATTERN.match(entry.name)
+        if match is None:
+            continue
+        created_ns, method, slug, ms, ext = match.groups()
+        profiles.append({
+            "name": entry.name,
+            "created_at": int(created_ns) / 1e9,
+            "endpoint": f"{method} /{slug.replace('.', '/')}",
+            "duration_ms": int(ms),
+            "format": "collapsed" if ext == "collapsed" else "cprofile",
+            "bytes": entry.stat().st_size,
+        })
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(name):
+    """Path of a stored profile, or None for anything that is not one (no path traversal)"""
+    if NAME_PATTERN.match(name) is None:
+        return None
+    path = os.path.join(PROFILE_DIR, name)
+    return path if os.path.isfile(path) else None
@@ -1,38 +1,339 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
-from groq import Groq
 from dotenv import load_dotenv
+from llm import get_llm
+from lazy import LazyResource
+from embedding_cache import EmbeddingCache
+from embedding_batcher import MicroBatcher
+from answer_cache import AnswerCache
+from fact_engine import load_fact_engine
+from context_builder import build_context, count_tokens
+from vector_index import VectorIndex, export_collection, collection_records
+from lexical_index import (LexicalIndex, write_lexical_index, where_filter, reciprocal_rank_fusion, fold,
+                           YEAR_PATTERN)
+import metrics
+from metrics import span, observe, count
+import asyncio
+import json
 import os
+import threading
+import time
+import numpy as np
 
 load_dotenv('../.env')
 
-print("Loading models...")
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-chroma_client = chromadb.PersistentClient(path="../data/chromadb")
-collection = chroma_client.get_collection("fifa_data")
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-print(f"✅ Ready — {collection.count()} chunks loaded")
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+COLLECTION_NAME = "fifa_data"
+CHROMA_PATH = "../data/chromadb"
+# Written by scripts/ingest_to_chromadb.py when a new collection goes live
+ACTIVE_PATH = os.path.join(CHROMA_PATH, "active.json")
+# Exact NumPy indexes, one directory per collection (see vector_index.py)
+VECTOR_INDEX_PATH = "../data/vector_index"
+# chroma: query the ChromaDB collection; numpy: exact in-process search
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")
+# BM25 indexes, one file per collection (see lexical_index.py)
+LEXICAL_INDEX_PATH = "../data/lexical_index"
+# Fuse BM25 with dense results; keyword questions skip the embedding (0 disables)
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "1") != "0"
+# Non-entity words a question may have and still be answered lexically
+LEXICAL_MAX_EXTRA_TERMS = int(os.getenv("LEXICAL_MAX_EXTRA_TERMS", "2"))
+# Candidates taken from each ranking before fusion, per requested result
+CANDIDATE_FACTOR = 4
+# Server-side cap on chunks retrieved per question
+MAX_N_RESULTS = int(os.getenv("MAX_N_RESULTS", "10"))
 
 
-def query_fifa(question: str, n_results: int = 5) -> dict:
+def active_collection_name() -> str:
+    """Collection the last ingest published, or the legacy fixed name"""
+    try:
+        with open(ACTIVE_PATH, 'r') as f:
+            return json.load(f)["collection"]
+    except (OSError, ValueError, KeyError):
+        return COLLECTION_NAME
+
+
+# ── Lazily Loaded Resources ──
+# sentence_transformers (torch) and chromadb are imported inside the loaders,
+# so importing this module is cheap; main.py warms them up in the background.
+def load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def load_chroma_client():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+
+def open_collection():
+    opened = chroma_client.get().get_collection(active_collection_name())
+    print(f"✅ Ready — {opened.count()} chunks loaded from {opened.name}")
+    return opened
+
+
+embedding_model = LazyResource("embedding_model", load_embedding_model)
+chroma_client = LazyResource("chroma_client", load_chroma_client)
+collection = LazyResource("collection", open_collection)
+llm = LazyResource("llm", get_llm)
+facts = LazyResource("facts", load_fact_engine)
+# Cache misses from concurrent requests are encoded together in one call
+embedding_batcher = MicroBatcher(
+    lambda texts: embedding_model.get().encode(texts, batch_size=len(texts), show_progress_bar=False))
+embedding_cache = EmbeddingCache(embedding_batcher.encode, EMBEDDING_MODEL)
+answer_cache = AnswerCache()
+
+metrics.registry.describe("prompt_tokens", "Prompt tokens with every retrieved chunk vs after packing",
+                          buckets=(128, 256, 512, 1024, 1536, 2048, 3072, 4096, 8192))
+metrics.registry.describe("prompt_chunks_dropped", "Retrieved chunks left out of the prompt (duplicates, budget)",
+                          buckets=(0, 1, 2, 3, 5, 10, 20))
+
+# How often to check whether the collection was re-ingested
+FINGERPRINT_INTERVAL = 5.0
+_live_collection = None
+_fingerprint = None
+_fingerprint_checked = 0.0
+_fingerprint_lock = threading.Lock()
+
+
+def collection_fingerprint() -> str:
+    """Id + size of the live collection; changes whenever it is re-ingested"""
+    global _live_collection, _fingerprint, _fingerprint_checked
+    with _fingerprint_lock:
+        if _live_collection is None:
+            _live_collection = collection.get()
+            _fingerprint_checked = 0.0
+        if time.monotonic() - _fingerprint_checked >= FINGERPRINT_INTERVAL:
+            # Re-ingests publish a new collection; switch once the pointer moves
+            name = active_collection_name()
+            if name != _live_collection.name:
+                _live_collection = chroma_client.get().get_collection(name)
+            _fingerprint = f"{_live_collection.id}:{_live_collection.count()}"
+            _fingerprint_checked = time.monotonic()
+        return _fingerprint
+
+
+def get_collection():
+    collection_fingerprint()
+    return _live_collection
+
+
+# ── Retrieval Backends ──
+# Both take Chroma's query arguments and return Chroma's result shape;
+# fingerprint() changes whenever a re-ingest goes live.
+class ChromaRetriever:
+    name = "chroma"
+
+    def query(self, query_embeddings, n_results=5, where=None):
+        return get_collection().query(
+            query_embeddings=[np.asarray(e, dtype=np.float32).tolist() for e in query_embeddings],
+            n_results=n_results,
+            where=where or None
+        )
+
+    def fingerprint(self):
+        return collection_fingerprint()
+
+    def version(self):
+        return _live_collection.name if _live_collection is not None else None
+
+
+class ActiveIndex:
+    """A per-collection index that follows active.json (checked every FINGERPRINT_INTERVAL).
+
+    A newly published collection is opened in a background thread while the
+    old index keeps answering, then swapped in with one assignment, so a
+    re-ingest never stalls requests; if it fails to open the old one stays.
+    """
+
+    def __init__(self, kind, opener):
+        self.kind = kind
+        self.opener = opener
+        self.lock = threading.Lock()
+        self.live = None          # (collection name, index)
+        self.loading = None
+        self.failed = None
+        self.checked = 0.0
+
+    def served(self):
+        live = self.live
+        if live is None:
+            with self.lock:
+                if self.live is None:
+                    name = active_collection_name()
+                    self.live = (name, self.opener(name))
+                    self.checked = time.monotonic()
+                live = self.live
+        elif time.monotonic() - self.checked >= FINGERPRINT_INTERVAL and self.lock.acquire(blocking=False):
+            try:
+                self.checked = time.monotonic()
+                name = active_collection_name()
+                if name not in (live[0], self.loading, self.failed):
+                    self.loading = name
+                    threading.Thread(target=self.swap, args=(name,), name=f"open-{self.kind}", daemon=True).start()
+            finally:
+                self.lock.release()
+        return live
+
+    def swap(self, name):
+        previous = self.live[0]
+        try:
+            index = self.opener(name)
+        except Exception as e:
+            self.failed = name
+            count("artifact_reloads_total", kind=self.kind, result="failed")
+            print(f"⚠️ {self.kind} for {name} failed to open, still serving {previous}: {e}")
+        else:
+            self.live = (name, index)
+            self.failed = None
+            count("artifact_reloads_total", kind=self.kind, result="swapped")
+            print(f"🔄 {self.kind} {previous} → {name}")
+        finally:
+            self.loading = None
+
+    def current(self):
+        return self.served()[1]
+
+    @property
+    def collection_name(self):
+        return self.live[0] if self.live is not None else None
+
+
+class NumpyRetriever:
+    name = "numpy"
+
+    def __init__(self):
+        self.active = ActiveIndex("vector_index", open_vector_index)
+
+    def query(self, query_embeddings, n_results=5, where=None):
+        return self.active.current().query(query_embeddings, n_results, where)
+
+    def fingerprint(self):
+        name, index = self.active.served()
+        return f"{name}:{len(index)}"
+
+    def version(self):
+        return self.active.collection_name
+
+
+def open_vector_index(name):
+    directory = os.path.join(VECTOR_INDEX_PATH, name)
+    if not os.path.exists(directory):
+        # Ingest writes the index; export it here for collections built before that
+        print(f"⚠️ No vector index for {name} — exporting it from ChromaDB")
+        export_collection(chroma_client.get().get_collection(name), directory)
+    index = VectorIndex(directory)
+    print(f"✅ Vector index ready — {len(index)} chunks from {name}")
+    return index
+
+
+def open_lexical_index(name):
+    path = os.path.join(LEXICAL_INDEX_PATH, f"{name}.json")
+    if not os.path.exists(path):
+        print(f"⚠️ No BM25 index for {name} — building it from ChromaDB")
+        ids, documents, metadatas, _ = collection_records(chroma_client.get().get_collection(name))
+        write_lexical_index(path, ids, documents, metadatas)
+    index = LexicalIndex(path)
+    print(f"✅ BM25 index ready — {len(index)} chunks, {len(index.postings)} terms")
+    return index
+
+
+def load_lexical():
+    active = ActiveIndex("lexical_index", open_lexical_index)
+    active.current()
+    return active
+
 
-    # Step 1: Embed the question
-    question_embedding = embedding_model.encode(question).tolist()
+RETRIEVERS = {"chroma": ChromaRetriever, "numpy": NumpyRetriever}
 
-    # Step 2: Retrieve relevant chunks from ChromaDB
-    results = collection.query(
-        query_embeddings=[question_embedding],
-        n_results=n_results
-    )
 
-    retrieved_docs = results['documents'][0]
-    retrieved_metadata = results['metadatas'][0]
+def load_retriever():
+    if RETRIEVAL_BACKEND not in RETRIEVERS:
+        raise ValueError(f"RETRIEVAL_BACKEND must be one of {', '.join(RETRIEVERS)}, got {RETRIEVAL_BACKEND!r}")
+    backend = RETRIEVERS[RETRIEVAL_BACKEND]()
+    backend.fingerprint()   # opens the collection / index
+    return backend
+
+
+retriever = LazyResource("retriever", load_retriever)
+lexical = LazyResource("lexical", load_lexical)
+
+
+def index_version():
+    """Collection the retriever (or, before it is loaded, the BM25 index) is serving; None before either"""
+    if retriever.loaded:
+        return retriever.value.version()
+    if lexical.loaded:
+        return lexical.value.collection_name
+    return None
+
+
+def lexical_lookup(question: str, n_results: int = 5):
+    """BM25 hits, entity pre-filter and whether the lexical ranking can answer alone; None when off"""
+    if not HYBRID_RETRIEVAL:
+        return None
+    try:
+        index = lexical.get().current()
+    except Exception:
+        return None
+    teams, years = index.entities(question)
+    hits = index.search(question, max(n_results * CANDIDATE_FACTOR, 20))
+    confident = (bool(hits) and bool(teams or years) and index.covers(hits[0][0], teams, years)
+                 and len(index.extra_terms(question, teams, years)) <= LEXICAL_MAX_EXTRA_TERMS)
+    return {"index": index, "hits": hits, "where": where_filter(teams, years), "confident": confident}
+
+
+def lexical_results(lookup, n_results: int = 5):
+    """Top BM25 chunks and their metadata"""
+    index = lookup["index"]
+    rows = [row for row, _ in lookup["hits"][:n_results]]
+    return [index.documents[r] for r in rows], [index.metadatas[r] for r in rows]
+
+
+def search(question_embedding, n_results: int = 5, lookup=None):
+    """Top chunks and their metadata for an already embedded question"""
+    backend = retriever.get()
+    if lookup is None:
+        # Step 2: Retrieve relevant chunks from the configured backend
+        results = backend.query([question_embedding], n_results)
+        return results['documents'][0], results['metadatas'][0]
+
+    # Hybrid: dense candidates (pre-filtered on the teams/years mentioned), fused with BM25
+    depth = max(n_results * CANDIDATE_FACTOR, 20)
+    chunks = {}
+    dense = []
+    for where in ([lookup["where"], None] if lookup["where"] else [None]):
+        results = backend.query([question_embedding], depth, where)
+        for chunk_id, doc, meta in zip(results['ids'][0], results['documents'][0], results['metadatas'][0]):
+            if chunk_id not in chunks:
+                chunks[chunk_id] = (doc, meta)
+                dense.append(chunk_id)
+        if len(dense) >= n_results:
+            break   # the filter left enough candidates
+
+    index = lookup["index"]
+    lexical_ids = []
+    for row, _ in lookup["hits"]:
+        chunks.setdefault(index.ids[row], (index.documents[row], index.metadatas[row]))
+        lexical_ids.append(index.ids[row])
+
+    top = reciprocal_rank_fusion([dense, lexical_ids])[:n_results]
+    return [chunks[i][0] for i in top], [chunks[i][1] for i in top]
+
+
+def retrieve(question: str, n_results: int = 5):
+    """Top chunks with their metadata: lexical only for keyword questions, otherwise hybrid"""
+    lookup = lexical_lookup(question, n_results)
+    if lookup is not None and lookup["confident"]:
+        return lexical_results(lookup, n_results)
+
+    # Step 1: Embed the question (cached on normalized text)
+    return search(embedding_cache.get(question), n_results, lookup)
+
+
+def build_prompt(question: str, retrieved_docs: list) -> str:
 
     # Step 3: Build context string
     context = "\n\n---\n\n".join(retrieved_docs)
 
-    # Step 4: Call Groq LLM with context
-    prompt = f"""You are a FIFA World Cup expert analyst.
+    return f"""You are a FIFA World Cup expert analyst.
 Answer the user's question using ONLY the context provided below.
 If the context doesn't contain enough information, say so honestly.
 Do not make up statistics or results.
@@ -44,19 +345,154 @@ QUESTION: {question}
 
 ANSWER:"""
 
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.1,
-        max_tokens=500
-    )
 
+def assemble_prompt(question: str, retrieved_docs: list, retrieved_metadata: list):
+    """Prompt from the cleaned, deduplicated, budget-packed chunks, and the sources that made it in"""
+    docs, metadata = build_context(retrieved_docs, retrieved_metadata)
+    prompt = build_prompt(question, docs)
+    if metrics.ENABLED:
+        observe("prompt_tokens", count_tokens(build_prompt(question, retrieved_docs)), stage="retrieved")
+        observe("prompt_tokens", count_tokens(prompt), stage="packed")
+        observe("prompt_chunks_dropped", len(retrieved_docs) - len(docs))
+    return prompt, metadata
+
+
+def question_entities(question: str):
+    """(years, teams) a question names; an answer cache hit must name exactly the same"""
+    years = frozenset(YEAR_PATTERN.findall(fold(question)))
+    try:
+        teams, _ = lexical.get().current().entities(question)
+    except Exception:
+        engine = facts.value if facts.loaded else None
+        teams = engine.entities(question)[2] if engine is not None else []
+    return years, frozenset(frozenset(group) for group in teams)
+
+
+def cached_answer(question: str, n_results: int):
+    """(question embedding, answer cache key, tagged cached response or None)"""
+    with span("rag.embed"):
+        question_embedding = embedding_cache.get(question)
+    with span("rag.answer_cache"):
+        key = (retriever.get().fingerprint(), question_entities(question))
+        cached = answer_cache.lookup(question_embedding, n_results, *key)
+    return question_embedding, key, cached
+
+
+def structured_answer(question: str):
+    """Answer from the in-memory fact engine, or None to fall through to RAG"""
+    try:
+        engine = facts.get()
+    except Exception:
+        return None
+    result = engine.answer(question) if engine is not None else None
+    if result is not None:
+        result["route"] = "structured"
+    return result
+
+
+def query_fifa(question: str, n_results: int = 5) -> dict:
+    n_results = max(1, min(n_results, MAX_N_RESULTS))
+
+    # Pure lookups ("who won the 2014 world cup") skip embedding, retrieval and the LLM
+    with span("rag.structured"):
+        fast = structured_answer(question)
+    if fast is not None:
+        return fast
+
+    # Keyword questions ("France vs Croatia final") skip the embedding
+    with span("rag.lexical"):
+        lookup = lexical_lookup(question, n_results)
+    if lookup is not None and lookup["confident"]:
+        with span("rag.prompt"):
+            prompt, sources = assemble_prompt(question, *lexical_results(lookup, n_results))
+        with span("rag.llm"):
+            answer = llm.get().complete(prompt)
+        return {
+            "answer": answer,
+            "sources": sources,
+            "route": "lexical"
+        }
+
+    question_embedding, cache_key, cached = cached_answer(question, n_results)
+    if cached is not None:
+        cached["route"] = "answer_cache"
+        return cached
+
+    with span("rag.retrieve"):
+        retrieved_docs, retrieved_metadata = search(question_embedding, n_results, lookup)
+    with span("rag.prompt"):
+        prompt, sources = assemble_prompt(question, retrieved_docs, retrieved_metadata)
+
+    # Step 4: Call the LLM with context
+    with span("rag.llm"):
+        answer = llm.get().complete(prompt)
+    answer_cache.put(question, question_embedding, n_results, answer, sources, *cache_key)
     return {
-        "answer": response.choices[0].message.content,
-        "sources": retrieved_metadata
+        "answer": answer,
+        "sources": sources,
+        "route": "rag"
     }
 
 
+async def stream_llm(prompt):
+    """LLM tokens, timing the wait for the first one and the whole answer"""
+    start = time.perf_counter()
+    first = True
+    with span("rag.llm"):
+        async for token in llm.get().stream(prompt):
+            if first:
+                observe("stage_seconds", time.perf_counter() - start, stage="rag.llm_first_token")
+                first = False
+            yield token
+
+
+async def stream_fifa(question: str, n_results: int = 5):
+    """Async generator of ("route", str), ("sources", list), an optional ("cache", dict), then ("token", str)
+    events; route is query_fifa's route name, for the caller's metrics"""
+    n_results = max(1, min(n_results, MAX_N_RESULTS))
+
+    with span("rag.structured"):
+        fast = structured_answer(question)
+    if fast is not None:
+        yield "route", "structured"
+        yield "sources", fast["sources"]
+        yield "token", fast["answer"]
+        return
+
+    with span("rag.lexical"):
+        lookup = await asyncio.to_thread(lexical_lookup, question, n_results)
+    if lookup is not None and lookup["confident"]:
+        with span("rag.prompt"):
+            prompt, sources = assemble_prompt(question, *lexical_results(lookup, n_results))
+        yield "route", "lexical"
+        yield "sources", sources
+        async for token in stream_llm(prompt):
+            yield "token", token
+        return
+
+    # Embedding + Chroma are blocking, keep them off the event loop
+    question_embedding, cache_key, cached = await asyncio.to_thread(cached_answer, question, n_results)
+    if cached is not None:
+        yield "route", "answer_cache"
+        yield "sources", cached["sources"]
+        yield "cache", cached["cache"]
+        yield "token", cached["answer"]
+        return
+
+    with span("rag.retrieve"):
+        retrieved_docs, retrieved_metadata = await asyncio.to_thread(search, question_embedding, n_results, lookup)
+    with span("rag.prompt"):
+        prompt, sources = assemble_prompt(question, retrieved_docs, retrieved_metadata)
+    yield "route", "rag"
+    yield "sources", sources
+
+    tokens = []
+    async for token in stream_llm(prompt):
+        tokens.append(token)
+        yield "token", token
+    answer_cache.put(question, question_embedding, n_results, "".join(tokens), sources, *cache_key)
+
+
 # Test when run directly
 if __name__ == "__main__":
     questions = [
@@ -69,4 +505,4 @@ if __name__ == "__main__":
         print(f"\n❓ {q}")
         result = query_fifa(q)
         print(f"🤖 {result['answer']}")
-        print("-" * 60)
\ No newline at end of file
+        print("-" * 60)
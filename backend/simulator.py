@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Monte Carlo World Cup simulator.
+# Match probabilities come from the predictor once, as a pair table over the
+# entrants; every simulation of a chunk is then sampled at once with NumPy.
+# Chunks get their own child seed from one SeedSequence, so a seed gives the
+# same result whether the chunks run in one process or across a pool.
+#
+# Formats (teams are listed group by group, four per group):
+#   32 teams — 8 groups, top two reach the round of 16
+#   48 teams — 12 groups, top two plus the 8 best third-placed teams reach
+#              a round of 32 (winners meet third-placed teams / runners-up)
+
+CHUNK_SIZE = 10_000
+GROUP_SIZE = 4
+GROUP_MATCHES = [(0, 1), (2, 3), (0, 2), (1, 3), (0, 3), (1, 2)]
+KNOCKOUT_STAGES = ['round_of_32', 'round_of_16', 'quarter_final', 'semi_final', 'final', 'champion']
+
+
+def pair_table(predictor, teams):
+    """(K x K x 2) neutral-venue [win, draw] probabilities for the entrants
+
+    The model is home-oriented, so both orientations of a pair are averaged.
+    """
+    homes = [home for home in teams for _ in teams]
+    aways = [away for _ in teams for away in teams]
+    probs = predictor.probabilities(homes, aways).reshape(len(teams), len(teams), 3) / 100
+    win = (probs[:, :, 0] + probs[:, :, 2].T) / 2
+    draw = (probs[:, :, 1] + probs[:, :, 1].T) / 2
+    table = np.stack([win, draw], axis=-1)
+    table[np.arange(len(teams)), np.arange(len(teams))] = 0
+    return table
+
+
+def bracket(n_groups):
+    """Qualifier slots meeting in the first knockout round, in bracket order
+
+    Slots are group winners, then runners-up, then best third-placed teams.
+    """
+    if n_groups == 8:
+        winners, runners_up = range(0, 8), range(8, 16)
+        return [(winners[g], runners_up[g ^ 1]) for g in (0, 2, 4, 6, 1, 3, 5, 7)]
+    if n_groups == 12:
+        # 12 winners vs slots 31..20 (8 thirds, 4 runners-up), 8 runners-up among themselves
+        return [(k, 31 - k) for k in range(12)] + [(12 + j, 19 - j) for j in range(4)]
+    raise ValueError("Only 32- and 48-team formats are supported")
+
+
+def simulate_chunk(table, n_groups, n_sims, seed):
+    """Stage-reach counts (K x stages) for one chunk of simulations"""
+    rng = np.random.default_rng(seed)
+    n_teams = n_groups * GROUP_SIZE
+    group_teams = np.arange(n_teams).reshape(n_groups, GROUP_SIZE)
+
+    # ── Group stage: every match of every group of every simulation at once ──
+    home = group_teams[:, [a for a, _ in GROUP_MATCHES]]
+    away = group_teams[:, [b for _, b in GROUP_MATCHES]]
+    p_win = table[home, away, 0]
+    p_draw = table[home, away, 1]
+    u = rng.random((n_sims, n_groups, len(GROUP_MATCHES)))
+    home_won = u < p_win
+    drawn = ~home_won & (u < p_win + p_draw)
+    away_won = ~(home_won | drawn)
+
+    points = np.zeros((n_sims, n_groups, GROUP_SIZE))
+    for m, (a, b) in enumerate(GROUP_MATCHES):
+        points[:, :, a] += 3 * home_won[:, :, m] + drawn[:, :, m]
+        points[:, :, b] += 3 * away_won[:, :, m] + drawn[:, :, m]
+    # No goals are simulated, so ties on points are broken at random
+    points += rng.random(points.shape) * 0.5
+
+    order = np.argsort(-points, axis=2)
+    ranked = np.take_along_axis(np.broadcast_to(group_teams, points.shape), order, axis=2)
+    ranked_points = np.take_along_axis(points, order, axis=2)
+
+    slots = [ranked[:, :, 0], ranked[:, :, 1]]
+    if n_groups == 12:
+        best_thirds = np.argsort(-ranked_points[:, :, 2], axis=1)[:, :8]
+        slots.append(np.take_along_axis(ranked[:, :, 2], best_thirds, axis=1))
+    qualified = np.concatenate(slots, axis=1)
+
+    # ── Knockout rounds: draws go to a coin-flip shoot-out ──
+    pairs = bracket(n_groups)
+    a = qualified[:, [x for x, _ in pairs]]
+    b = qualified[:, [y for _, y in pairs]]
+    stages = KNOCKOUT_STAGES if n_groups == 12 else KNOCKOUT_STAGES[1:]
+    counts = np.zeros((n_teams, len(stages)), dtype=np.int64)
+    for s in range(len(stages) - 1):
+        counts[:, s] = np.bincount(np.concatenate([a, b], axis=1).ravel(), minlength=n_teams)
+        p_a = table[a, b, 0] + 0.5 * table[a, b, 1]
+        winners = np.where(rng.random(a.shape) < p_a, a, b)
+        a, b = winners[:, 0::2], winners[:, 1::2]
+    counts[:, -1] = np.bincount(winners.ravel(), minlength=n_teams)
+    return counts
+
+
+def simulate(table, n_sims, seed=None, workers=1):
+    """Per-team stage-reach probabilities over n_sims tournaments"""
+    n_teams = table.shape[0]
+    if n_teams % GROUP_SIZE:
+        raise ValueError("Teams must fill groups of four")
+    n_groups = n_teams // GROUP_SIZE
+    bracket(n_groups)
+
+    sizes = [min(CHUNK_SIZE, n_sims - start) for start in range(0, n_sims, CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(table, n_groups, size, child) for size, child in zip(sizes, seeds)]
+
+    workers = max(1, min(workers, len(jobs), os.cpu_count() or 1))
+    if workers == 1:
+        results = [simulate_chunk(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_chunk, *zip(*jobs)))
+
+    stages = KNOCKOUT_STAGES if n_groups == 12 else KNOCKOUT_STAGES[1:]
+    probs = sum(results) / n_sims
+    return stages, probs
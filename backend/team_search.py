@@ -0,0 +1,62 @@
+import re
+from collections import defaultdict
+from fact_engine import ALIASES
+from lexical_index import fold
+
+# Prefix index behind the team autocomplete (/teams/search). A team is found
+# by the start of its name, of any later word in it ("korea" -> South Korea)
+# or of one of the fact engine's aliases ("holland" -> Netherlands), compared
+# without case, diacritics or punctuation ("cote d" -> Côte d'Ivoire). Every
+# prefix up to MAX_PREFIX characters is precomputed with its ranked teams, so
+# a lookup is one dict access; longer prefixes filter that list.
+
+MAX_PREFIX = 16
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Lower ranks come first: the name itself, then one of its later words, then an alias
+NAME, WORD, ALIAS = 0, 1, 2
+
+
+def search_key(text):
+    """Folded words joined by single spaces: "Côte d'Ivoire" -> "cote d ivoire" """
+    return " ".join(WORD_PATTERN.findall(fold(text)))
+
+
+class TeamIndex:
+    def __init__(self, teams):
+        self.teams = list(teams)
+        self.keys = defaultdict(list)        # team position -> [(rank, key)]
+        by_key = defaultdict(list)
+        for i, team in enumerate(self.teams):
+            key = search_key(team)
+            by_key[key].append(i)
+            words = key.split()
+            self.keys[i].append((NAME, key))
+            self.keys[i].extend((WORD, " ".join(words[j:])) for j in range(1, len(words)))
+        for alias, names in ALIASES.items():
+            for name in names:
+                for i in by_key.get(search_key(name), []):
+                    self.keys[i].append((ALIAS, search_key(alias)))
+
+        best = defaultdict(dict)             # prefix -> {team position: best rank}
+        for i, keys in self.keys.items():
+            for rank, key in keys:
+                for n in range(1, min(len(key), MAX_PREFIX) + 1):
+                    ranks = best[key[:n]]
+                    if rank < ranks.get(i, ALIAS + 1):
+                        ranks[i] = rank
+        self.prefixes = {
+            prefix: [i for i, _ in sorted(ranks.items(), key=lambda item: (item[1], self.teams[item[0]]))]
+            for prefix, ranks in best.items()
+        }
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """(teams starting with prefix, best matches first, at most limit; total matches)"""
+        key = search_key(prefix)
+        if not key:
+            return self.teams[:limit], len(self.teams)
+        matches = self.prefixes.get(key[:MAX_PREFIX], [])
+        if len(key) > MAX_PREFIX:
+            matches = [i for i in matches if any(k.startswith(key) for _, k in self.keys[i])]
+        return [self.teams[i] for i in matches[:limit]], len(matches)
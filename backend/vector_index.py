@@ -0,0 +1,154 @@
+import json
+import os
+import shutil
+import numpy as np
+
+# Exact in-process vector index, an alternative to querying ChromaDB.
+# At our corpus size (~1k chunks) one float32 matrix product over all
+# normalized embeddings is faster than HNSW plus the SQLite round trip, and
+# the results are exact. An index directory holds:
+#   embeddings.npy  float32 (N, dim), L2-normalized, opened memory-mapped
+#   table.json      ids, documents and the metadata as a columnar side
+#                   table: per field, the distinct values and an int code per row
+# query() takes Chroma's arguments (query_embeddings, n_results, where) and
+# returns Chroma's result shape, so rag.py can swap backends freely. `where`
+# supports field equality, $eq/$ne/$in/$nin and $and/$or, applied as a
+# boolean mask before ranking.
+
+EMBEDDINGS_FILE = "embeddings.npy"
+TABLE_FILE = "table.json"
+EXPORT_BATCH_SIZE = 5000
+
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def columnar(metadatas):
+    """{field: {"values": distinct values, "codes": per-row index or -1}}"""
+    fields = sorted({field for m in metadatas for field in m})
+    columns = {}
+    for field in fields:
+        values, codes, lookup = [], [], {}
+        for m in metadatas:
+            if field not in m:
+                codes.append(-1)
+                continue
+            value = m[field]
+            if value not in lookup:
+                lookup[value] = len(values)
+                values.append(value)
+            codes.append(lookup[value])
+        columns[field] = {"values": values, "codes": codes}
+    return columns
+
+
+def write_index(directory, ids, documents, metadatas, embeddings):
+    """Write an index directory atomically (build next to it, then rename)"""
+    tmp_dir = f"{directory}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    np.save(os.path.join(tmp_dir, EMBEDDINGS_FILE), normalize_rows(embeddings))
+    with open(os.path.join(tmp_dir, TABLE_FILE), 'w') as f:
+        json.dump({"ids": list(ids), "documents": list(documents), "columns": columnar(metadatas)}, f)
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.replace(tmp_dir, directory)
+
+
+def collection_records(collection):
+    """(ids, documents, metadatas, embeddings) of a whole Chroma collection, read in batches"""
+    ids, documents, metadatas, embeddings = [], [], [], []
+    total = collection.count()
+    for offset in range(0, total, EXPORT_BATCH_SIZE):
+        batch = collection.get(include=["embeddings", "documents", "metadatas"],
+                               limit=EXPORT_BATCH_SIZE, offset=offset)
+        ids.extend(batch['ids'])
+        documents.extend(batch['documents'])
+        metadatas.extend(batch['metadatas'])
+        embeddings.extend(np.asarray(batch['embeddings'], dtype=np.float32))
+    return ids, documents, metadatas, np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1)
+
+
+def export_collection(collection, directory):
+    """Snapshot a Chroma collection into an index directory"""
+    write_index(directory, *collection_records(collection))
+
+
+class VectorIndex:
+    def __init__(self, directory):
+        self.directory = directory
+        self.embeddings = np.load(os.path.join(directory, EMBEDDINGS_FILE), mmap_mode='r')
+        with open(os.path.join(directory, TABLE_FILE), 'r') as f:
+            table = json.load(f)
+        self.ids = table["ids"]
+        self.documents = table["documents"]
+        self.values = {field: column["values"] for field, column in table["columns"].items()}
+        self.codes = {field: np.asarray(column["codes"], dtype=np.int32)
+                      for field, column in table["columns"].items()}
+        self.code_of = {field: {v: i for i, v in enumerate(values)} for field, values in self.values.items()}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def metadata(self, row):
+        return {field: self.values[field][codes[row]] for field, codes in self.codes.items() if codes[row] >= 0}
+
+    # ── Filters ──
+    def field_mask(self, field, condition):
+        codes = self.codes.get(field)
+        if codes is None:
+            return np.zeros(len(self), dtype=bool)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        (op, value), = condition.items()
+        lookup = self.code_of[field]
+        if op in ("$eq", "$ne"):
+            hit = codes == lookup.get(value, -2)
+            return hit if op == "$eq" else ~hit
+        if op in ("$in", "$nin"):
+            hit = np.isin(codes, [lookup[v] for v in value if v in lookup])
+            return hit if op == "$in" else ~hit
+        raise ValueError(f"Unsupported filter operator {op}")
+
+    def mask(self, where):
+        """Boolean row mask for a Chroma-style where clause"""
+        result = np.ones(len(self), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    result &= self.mask(clause)
+            elif key == "$or":
+                result &= np.logical_or.reduce([self.mask(clause) for clause in condition])
+            else:
+                result &= self.field_mask(key, condition)
+        return result
+
+    # ── Search ──
+    def query(self, query_embeddings, n_results=5, where=None):
+        """Exact cosine top-k for a batch of queries, in Chroma's result format"""
+        scores = normalize_rows(np.atleast_2d(query_embeddings)) @ self.embeddings.T
+        candidates = len(self)
+        if where:
+            allowed = self.mask(where)
+            scores[:, ~allowed] = -np.inf
+            candidates = int(allowed.sum())
+        k = min(n_results, candidates)
+
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for row in scores:
+            if k <= 0:
+                top = np.empty(0, dtype=np.int64)
+            elif k < len(row):
+                top = np.argpartition(-row, k - 1)[:k]
+                top = top[np.argsort(-row[top], kind='stable')]
+            else:
+                top = np.argsort(-row, kind='stable')
+            result["ids"].append([self.ids[i] for i in top])
+            result["documents"].append([self.documents[i] for i in top])
+            result["metadatas"].append([self.metadata(i) for i in top])
+            result["distances"].append((1.0 - row[top]).tolist())
+        return result
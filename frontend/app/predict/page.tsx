@@ -24,22 +24,68 @@ interface PredictResponse {
   }
 }
 
+const API_URL = 'https://cover12-fifa-ai-backend.hf.space'
+
+// Autocomplete backed by /teams/search: only the few matching teams are fetched
+function TeamPicker({ label, team, onSelect }: { label: string, team: string, onSelect: (team: string) => void }) {
+  const [query, setQuery] = useState(team)
+  const [options, setOptions] = useState<string[]>([])
+  const [open, setOpen] = useState(false)
+
+  // Follow selections made outside the picker (quick matchups, reset); while typing,
+  // the selection is cleared without wiping the text, which is dropped on blur if unpicked
+  useEffect(() => {
+    if (team || !open) setQuery(team)
+  }, [team, open])
+
+  useEffect(() => {
+    if (!open) return
+    const controller = new AbortController()
+    const timer = setTimeout(() => {
+      fetch(`${API_URL}/teams/search?prefix=${encodeURIComponent(query)}&limit=8`, { signal: controller.signal })
+        .then(r => r.json())
+        .then(data => setOptions(data.teams ?? []))
+        .catch(() => {})
+    }, 150)
+    return () => { clearTimeout(timer); controller.abort() }
+  }, [query, open])
+
+  return (
+    <div className="relative bg-gray-800 rounded-xl p-4 border border-gray-700">
+      <p className="text-xs text-gray-400 mb-2 font-semibold uppercase tracking-wide">{label}</p>
+      <input
+        value={query}
+        onChange={e => { setQuery(e.target.value); onSelect(''); setOpen(true) }}
+        onFocus={() => setOpen(true)}
+        onBlur={() => setTimeout(() => setOpen(false), 150)}
+        placeholder="Search team..."
+        className="w-full bg-transparent text-white outline-none text-sm placeholder-gray-500"
+      />
+      {open && options.length > 0 && (
+        <ul className="absolute left-0 right-0 top-full mt-1 z-10 bg-gray-800 border border-gray-700 rounded-xl overflow-hidden">
+          {options.map(t => (
+            <li key={t}>
+              <button
+                onMouseDown={() => { onSelect(t); setQuery(t); setOpen(false) }}
+                className="w-full text-left px-4 py-2 text-sm hover:bg-gray-700"
+              >
+                {t}
+              </button>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  )
+}
+
 export default function PredictPage() {
-  const [teams, setTeams] = useState<string[]>([])
   const [homeTeam, setHomeTeam] = useState('')
   const [awayTeam, setAwayTeam] = useState('')
   const [result, setResult] = useState<PredictResponse | null>(null)
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
 
-  // Load teams list on mount
-  useEffect(() => {
-    fetch('https://cover12-fifa-ai-backend.hf.space/teams')
-      .then(r => r.json())
-      .then(data => setTeams(data.teams))
-      .catch(() => setError('Could not load teams list'))
-  }, [])
-
   const predict = async () => {
     if (!homeTeam || !awayTeam) return
     if (homeTeam === awayTeam) {
@@ -51,11 +97,9 @@ export default function PredictPage() {
     setError('')
 
     try {
-      const res = await fetch('https://cover12-fifa-ai-backend.hf.space/predict', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ home_team: homeTeam, away_team: awayTeam })
-      })
+      // GET so the browser / CDN can reuse the answer until the model changes
+      const params = new URLSearchParams({ home_team: homeTeam, away_team: awayTeam })
+      const res = await fetch(`${API_URL}/predict?${params}`)
       const data = await res.json()
       setResult(data)
     } catch {
@@ -103,19 +147,7 @@ export default function PredictPage() {
         <div className="grid grid-cols-3 gap-4 mb-6 items-center">
 
           {/* Home Team */}
-          <div className="bg-gray-800 rounded-xl p-4 border border-gray-700">
-            <p className="text-xs text-gray-400 mb-2 font-semibold uppercase tracking-wide">Home Team</p>
-            <select
-              value={homeTeam}
-              onChange={e => setHomeTeam(e.target.value)}
-              className="w-full bg-transparent text-white outline-none text-sm"
-            >
-              <option value="" className="bg-gray-800">Select team...</option>
-              {teams.map(t => (
-                <option key={t} value={t} className="bg-gray-800">{t}</option>
-              ))}
-            </select>
-          </div>
+          <TeamPicker label="Home Team" team={homeTeam} onSelect={setHomeTeam} />
 
           {/* VS */}
           <div className="text-center">
@@ -123,19 +155,7 @@ export default function PredictPage() {
           </div>
 
           {/* Away Team */}
-          <div className="bg-gray-800 rounded-xl p-4 border border-gray-700">
-            <p className="text-xs text-gray-400 mb-2 font-semibold uppercase tracking-wide">Away Team</p>
-            <select
-              value={awayTeam}
-              onChange={e => setAwayTeam(e.target.value)}
-              className="w-full bg-transparent text-white outline-none text-sm"
-            >
-              <option value="" className="bg-gray-800">Select team...</option>
-              {teams.map(t => (
-                <option key={t} value={t} className="bg-gray-800">{t}</option>
-              ))}
-            </select>
-          </div>
+          <TeamPicker label="Away Team" team={awayTeam} onSelect={setAwayTeam} />
         </div>
 
         {/* Predict Button */}
@@ -0,0 +1,173 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from stats_engine import TeamStatsEngine
+
+# Parity check + timing of stats_engine against the original iterrows code.
+#   python scripts/benchmark_team_stats.py                  (data/results.csv)
+#   python scripts/benchmark_team_stats.py --synthetic 50000
+
+
+# ── Reference implementation (the loops train_model.py used to run) ──
+def legacy_build_team_stats(df, before_date=None):
+    if before_date:
+        df = df[df['date'] < before_date]
+
+    stats = {}
+    for _, row in df.iterrows():
+        home = row['home_team']
+        away = row['away_team']
+        hg = row['home_score']
+        ag = row['away_score']
+
+        for team in [home, away]:
+            if team not in stats:
+                stats[team] = {
+                    'played': 0, 'wins': 0, 'draws': 0,
+                    'losses': 0, 'goals_scored': 0, 'goals_conceded': 0
+                }
+
+        stats[home]['played'] += 1
+        stats[home]['goals_scored'] += hg
+        stats[home]['goals_conceded'] += ag
+        if hg > ag:
+            stats[home]['wins'] += 1
+        elif hg == ag:
+            stats[home]['draws'] += 1
+        else:
+            stats[home]['losses'] += 1
+
+        stats[away]['played'] += 1
+        stats[away]['goals_scored'] += ag
+        stats[away]['goals_conceded'] += hg
+        if ag > hg:
+            stats[away]['wins'] += 1
+        elif ag == hg:
+            stats[away]['draws'] += 1
+        else:
+            stats[away]['losses'] += 1
+
+    for team in stats:
+        p = stats[team]['played']
+        stats[team]['win_rate'] = stats[team]['wins'] / p
+        stats[team]['draw_rate'] = stats[team]['draws'] / p
+        stats[team]['loss_rate'] = stats[team]['losses'] / p
+        stats[team]['avg_goals_scored'] = stats[team]['goals_scored'] / p
+        stats[team]['avg_goals_conceded'] = stats[team]['goals_conceded'] / p
+    return stats
+
+
+def legacy_h2h(df):
+    h2h_dict = {}
+    for _, row in df.iterrows():
+        t1, t2 = sorted([row['home_team'], row['away_team']])
+        if (t1, t2) not in h2h_dict:
+            h2h_dict[(t1, t2)] = {'t1_wins': 0, 'draws': 0, 't2_wins': 0, 'total': 0}
+
+        h2h_dict[(t1, t2)]['total'] += 1
+        if row['home_score'] > row['away_score']:
+            if row['home_team'] == t1:
+                h2h_dict[(t1, t2)]['t1_wins'] += 1
+            else:
+                h2h_dict[(t1, t2)]['t2_wins'] += 1
+        elif row['home_score'] < row['away_score']:
+            if row['home_team'] == t1:
+                h2h_dict[(t1, t2)]['t2_wins'] += 1
+            else:
+                h2h_dict[(t1, t2)]['t1_wins'] += 1
+        else:
+            h2h_dict[(t1, t2)]['draws'] += 1
+    return h2h_dict
+
+
+def legacy_feature_matrix(df, stats, h2h_dict):
+    def get_team_features(team):
+        s = stats[team]
+        return [s['win_rate'], s['draw_rate'], s['loss_rate'],
+                s['avg_goals_scored'], s['avg_goals_conceded'], s['played']]
+
+    def get_head_to_head(team1, team2):
+        t1, t2 = sorted([team1, team2])
+        s = h2h_dict[(t1, t2)]
+        total = s['total']
+        if team1 == t1:
+            return [s['t1_wins']/total, s['draws']/total, s['t2_wins']/total]
+        return [s['t2_wins']/total, s['draws']/total, s['t1_wins']/total]
+
+    X, y = [], []
+    for _, row in df.iterrows():
+        home, away = row['home_team'], row['away_team']
+        hf, af = get_team_features(home), get_team_features(away)
+        X.append(hf + af + get_head_to_head(home, away))
+        y.append(0 if row['home_score'] > row['away_score'] else 1 if row['home_score'] == row['away_score'] else 2)
+        X.append(af + hf + get_head_to_head(away, home))
+        y.append(0 if row['away_score'] > row['home_score'] else 1 if row['away_score'] == row['home_score'] else 2)
+    return np.array(X), np.array(y)
+
+
+def synthetic_results(n, n_teams=300, seed=0):
+    """Random fixtures shaped like results.csv"""
+    rng = np.random.default_rng(seed)
+    teams = np.array([f"Team {i:03d}" for i in range(n_teams)], dtype=object)
+    home = rng.integers(0, n_teams, n)
+    away = (home + rng.integers(1, n_teams, n)) % n_teams
+    days = np.sort(rng.integers(0, 150 * 365, n)) + np.datetime64('1872-11-30', 'D')
+    return pd.DataFrame({
+        'date': days.astype(str),
+        'home_team': teams[home],
+        'away_team': teams[away],
+        'home_score': rng.poisson(1.5, n),
+        'away_score': rng.poisson(1.1, n),
+    })
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help='Use N random fixtures instead of data/results.csv')
+    parser.add_argument('--before-date', default='2000-01-01')
+    args = parser.parse_args()
+
+    results = synthetic_results(args.synthetic) if args.synthetic else pd.read_csv('data/results.csv')
+    print(f"Matches: {len(results)}")
+
+    legacy_stats, t_legacy_stats = timed(legacy_build_team_stats, results)
+    legacy_slice, t_legacy_slice = timed(legacy_build_team_stats, results, args.before_date)
+    legacy_pairs, t_legacy_h2h = timed(legacy_h2h, results)
+    (legacy_X, legacy_y), t_legacy_X = timed(legacy_feature_matrix, results, legacy_stats, legacy_pairs)
+
+    engine, t_engine = timed(TeamStatsEngine, results)
+    stats, t_stats = timed(engine.team_stats)
+    sliced, t_slice = timed(engine.team_stats, args.before_date)
+    pairs, t_h2h = timed(engine.head_to_head)
+    (X, y), t_X = timed(engine.feature_matrix)
+
+    # ── Parity ──
+    assert stats == legacy_stats, "team stats differ"
+    assert sliced == legacy_slice, f"team stats before {args.before_date} differ"
+    assert pairs == legacy_pairs, "head to head counts differ"
+    assert np.array_equal(X, legacy_X), "feature matrix differs"
+    assert np.array_equal(y, legacy_y), "labels differ"
+    print(f"✅ Parity: {len(stats)} teams, {len(pairs)} pairs, X {X.shape} identical")
+
+    # ── Timing ──
+    rows = [
+        ("team stats", t_legacy_stats, t_engine + t_stats),
+        (f"stats before {args.before_date}", t_legacy_slice, t_slice),
+        ("head to head", t_legacy_h2h, t_h2h),
+        ("feature matrix", t_legacy_X, t_X),
+    ]
+    print(f"\n{'step':<28}{'iterrows':>12}{'engine':>12}{'speedup':>10}")
+    for name, old, new in rows:
+        print(f"{name:<28}{old:>11.3f}s{new:>11.4f}s{old / max(new, 1e-9):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
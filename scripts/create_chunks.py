@@ -1,135 +1,212 @@
-import pandas as pd
+import argparse
+import gzip
 import json
+import sys
+from collections import Counter
+from itertools import chain
+import pandas as pd
 
-matches = pd.read_csv('data/matches_clean.csv')
-cups = pd.read_csv('data/cups_clean.csv')
+# Builds the retrieval chunks from matches_clean.csv and cups_clean.csv.
+# Each chunk type is a generator over columns formatted once for the whole
+# frame; team aggregates come from one groupby over a long (team, side)
+# view of the matches. Chunks stream to newline-delimited JSON (.jsonl, or
+# .jsonl.gz with --gzip) that ingest_to_chromadb.py reads record by record.
+#
+# --check compares the generated chunks with an existing chunks.json from
+# the previous builder and exits non-zero on any difference.
 
-chunks = []
+MATCHES_PATH = 'data/matches_clean.csv'
+CUPS_PATH = 'data/cups_clean.csv'
+OUTPUT_PATH = 'data/chunks.jsonl'
+LEGACY_PATH = 'data/chunks.json'
 
-# --- Chunk Type 1: Individual match summaries ---
-for _, row in matches.iterrows():
-    text = f"""
-FIFA World Cup {row['Year']} - Stage: {row['Stage']}
-Match: {row['Home Team Name']} vs {row['Away Team Name']}
-Score: {row['Home Team Goals']} - {row['Away Team Goals']}
-Result: {row['Result']}
-Venue: {row['Stadium']}, {row['City']}
-Attendance: {row['Attendance']}
-""".strip()
 
-    chunks.append({
-        "id": f"match_{row['MatchID']}",
-        "text": text,
-        "metadata": {
-            "type": "match",
-            "year": str(row['Year']),
-            "home_team": row['Home Team Name'],
-            "away_team": row['Away Team Name'],
-            "stage": row['Stage']
-        }
-    })
+def text_column(series):
+    # str() per value, like the f-strings it replaces: missing values become 'nan'
+    # (astype(str) keeps them missing on newer pandas and blanks the whole chunk)
+    return series.map(str)
 
-# --- Chunk Type 2: Tournament summaries ---
-for _, row in cups.iterrows():
-    text = f"""
-FIFA World Cup {row['Year']} was held in {row['Country']}.
-Winner: {row['Winner']}
-Runner-up: {row['Runners-Up']}
-Third place: {row['Third']}
-Total goals scored: {row['GoalsScored']}
-Total matches played: {row['MatchesPlayed']}
-Total attendance: {row['Attendance']}
-""".strip()
 
-    chunks.append({
-        "id": f"tournament_{row['Year']}",
-        "text": text,
-        "metadata": {
-            "type": "tournament",
-            "year": str(row['Year']),
-            "winner": row['Winner'],
-            "host": row['Country']
+# --- Chunk Type 1: Individual match summaries ---
+def match_chunks(matches):
+    year = text_column(matches['Year'])
+    text = ("FIFA World Cup " + year + " - Stage: " + text_column(matches['Stage'])
+            + "\nMatch: " + text_column(matches['Home Team Name']) + " vs " + text_column(matches['Away Team Name'])
+            + "\nScore: " + text_column(matches['Home Team Goals']) + " - " + text_column(matches['Away Team Goals'])
+            + "\nResult: " + text_column(matches['Result'])
+            + "\nVenue: " + text_column(matches['Stadium']) + ", " + text_column(matches['City'])
+            + "\nAttendance: " + text_column(matches['Attendance'])).str.strip()
+    ids = "match_" + text_column(matches['MatchID'])
+
+    for chunk_id, chunk_text, y, home, away, stage in zip(ids, text, year, matches['Home Team Name'],
+                                                           matches['Away Team Name'], matches['Stage']):
+        yield {
+            "id": chunk_id,
+            "text": chunk_text,
+            "metadata": {
+                "type": "match",
+                "year": y,
+                "home_team": home,
+                "away_team": away,
+                "stage": stage
+            }
         }
-    })
 
-# --- Chunk Type 3: Team history summaries (with titles) ---
 
-# Count titles per team
-titles = {}
-for _, row in cups.iterrows():
-    winner = row['Winner']
-    if winner not in titles:
-        titles[winner] = []
-    titles[winner].append(str(row['Year']))
-
-# Build team stats from matches
-team_stats = {}
-
-for _, row in matches.iterrows():
-    for team, is_home in [(row['Home Team Name'], True), (row['Away Team Name'], False)]:
-        if team not in team_stats:
-            team_stats[team] = {
-                "years": set(),
-                "wins": 0,
-                "draws": 0,
-                "losses": 0,
-                "goals_scored": 0
+# --- Chunk Type 2: Tournament summaries ---
+def tournament_chunks(cups):
+    year = text_column(cups['Year'])
+    text = ("FIFA World Cup " + year + " was held in " + text_column(cups['Country']) + "."
+            + "\nWinner: " + text_column(cups['Winner'])
+            + "\nRunner-up: " + text_column(cups['Runners-Up'])
+            + "\nThird place: " + text_column(cups['Third'])
+            + "\nTotal goals scored: " + text_column(cups['GoalsScored'])
+            + "\nTotal matches played: " + text_column(cups['MatchesPlayed'])
+            + "\nTotal attendance: " + text_column(cups['Attendance'])).str.strip()
+
+    for y, chunk_text, winner, host in zip(year, text, cups['Winner'], cups['Country']):
+        yield {
+            "id": f"tournament_{y}",
+            "text": chunk_text,
+            "metadata": {
+                "type": "tournament",
+                "year": y,
+                "winner": winner,
+                "host": host
             }
+        }
 
-        team_stats[team]["years"].add(row['Year'])
-
-        goals_for = row['Home Team Goals'] if is_home else row['Away Team Goals']
-        goals_against = row['Away Team Goals'] if is_home else row['Home Team Goals']
-
-        team_stats[team]["goals_scored"] += goals_for
-
-        if goals_for > goals_against:
-            team_stats[team]["wins"] += 1
-        elif goals_for == goals_against:
-            team_stats[team]["draws"] += 1
-        else:
-            team_stats[team]["losses"] += 1
-
-# Create one chunk per team
-for team, stats in team_stats.items():
-    total = stats["wins"] + stats["draws"] + stats["losses"]
-    win_rate = round((stats["wins"] / total) * 100, 1) if total > 0 else 0
-
-    team_titles = titles.get(team, [])
-    title_text = (
-        f"Won {len(team_titles)} World Cup(s) in {', '.join(team_titles)}"
-        if team_titles
-        else "Has not won a World Cup"
-    )
 
-    text = f"""
+# --- Chunk Type 3: Team history summaries (with titles) ---
+def team_titles(cups):
+    """Winner -> title years (as strings), in tournament order"""
+    return text_column(cups['Year']).groupby(cups['Winner'], sort=False).agg(list).to_dict()
+
+
+def team_records(matches):
+    """One row per team in order of first appearance: years, wins, draws, losses, goals_scored"""
+    n = len(matches)
+    # Interleave home/away per match so groupby(sort=False) keeps first-appearance order
+    sides = pd.DataFrame({
+        "team": pd.concat([matches['Home Team Name'], matches['Away Team Name']], ignore_index=True),
+        "year": pd.concat([matches['Year'], matches['Year']], ignore_index=True),
+        "gf": pd.concat([matches['Home Team Goals'], matches['Away Team Goals']], ignore_index=True),
+        "ga": pd.concat([matches['Away Team Goals'], matches['Home Team Goals']], ignore_index=True),
+        "order": list(range(0, 2 * n, 2)) + list(range(1, 2 * n, 2)),
+    }).sort_values('order', kind='stable')
+    sides['wins'] = sides['gf'] > sides['ga']
+    sides['draws'] = sides['gf'] == sides['ga']
+    sides['losses'] = ~(sides['wins'] | sides['draws'])
+
+    grouped = sides.groupby('team', sort=False)
+    records = grouped[['wins', 'draws', 'losses']].sum()
+    records['goals_scored'] = grouped['gf'].sum()
+    records['years'] = grouped['year'].agg(lambda years: sorted(int(y) for y in years.unique()))
+    return records
+
+
+def team_chunks(matches, cups):
+    titles = team_titles(cups)
+    records = team_records(matches)
+    ids = "team_" + records.index.str.replace(' ', '_', regex=False).str.replace('/', '_', regex=False)
+
+    for chunk_id, team, years, wins, draws, losses, goals in zip(
+            ids, records.index, records['years'], records['wins'], records['draws'],
+            records['losses'], records['goals_scored']):
+        wins, draws, losses, goals = int(wins), int(draws), int(losses), int(goals)
+        total = wins + draws + losses
+        win_rate = round((wins / total) * 100, 1) if total > 0 else 0
+
+        won = titles.get(team, [])
+        title_text = (
+            f"Won {len(won)} World Cup(s) in {', '.join(won)}"
+            if won
+            else "Has not won a World Cup"
+        )
+
+        text = f"""
 {team} FIFA World Cup History:
 {title_text}
-Participated in {len(stats['years'])} World Cups: {sorted(stats['years'])}
-Overall record: {stats['wins']} wins, {stats['draws']} draws, {stats['losses']} losses
+Participated in {len(years)} World Cups: {years}
+Overall record: {wins} wins, {draws} draws, {losses} losses
 Win rate: {win_rate}%
-Total goals scored: {stats['goals_scored']}
+Total goals scored: {goals}
 """.strip()
 
-    chunks.append({
-        "id": f"team_{team.replace(' ', '_').replace('/', '_')}",
-        "text": text,
-        "metadata": {
-            "type": "team_history",
-            "team": team
+        yield {
+            "id": chunk_id,
+            "text": text,
+            "metadata": {
+                "type": "team_history",
+                "team": team
+            }
         }
-    })
-
-# --- Save all chunks ---
-with open('data/chunks.json', 'w') as f:
-    json.dump(chunks, f, indent=2)
 
-print(f"✅ Total chunks created: {len(chunks)}")
-print(f"   Match chunks:      {sum(1 for c in chunks if c['metadata']['type'] == 'match')}")
-print(f"   Tournament chunks: {sum(1 for c in chunks if c['metadata']['type'] == 'tournament')}")
-print(f"   Team chunks:       {sum(1 for c in chunks if c['metadata']['type'] == 'team_history')}")
 
-# Preview a few team chunks to verify titles
-print("\n--- Preview: Teams with World Cup titles ---")
-for team, year_list in titles.items():
-    print(f"  {team}: {', '.join(year_list)}")
\ No newline at end of file
+def build_chunks(matches, cups):
+    return chain(match_chunks(matches), tournament_chunks(cups), team_chunks(matches, cups))
+
+
+# --- Output ---
+def write_jsonl(chunks, path):
+    """Stream chunks to newline-delimited JSON; returns the count per chunk type"""
+    counts = Counter()
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk) + "\n")
+            counts[chunk['metadata']['type']] += 1
+    return counts
+
+
+def check_parity(chunks, legacy_path):
+    """Compare against a chunks.json written by the previous builder; True when identical"""
+    with open(legacy_path, 'r') as f:
+        legacy = json.load(f)
+    new = list(chunks)
+    legacy_by_id = {c['id']: c for c in legacy}
+    new_by_id = {c['id']: c for c in new}
+
+    missing = [i for i in legacy_by_id if i not in new_by_id]
+    extra = [i for i in new_by_id if i not in legacy_by_id]
+    different = [i for i in new_by_id if i in legacy_by_id and new_by_id[i] != legacy_by_id[i]]
+    same_order = [c['id'] for c in new] == [c['id'] for c in legacy]
+
+    print(f"Parity vs {legacy_path}: {len(new)} new / {len(legacy)} legacy chunks")
+    for label, ids in [("missing", missing), ("extra", extra), ("different", different)]:
+        if ids:
+            print(f"⚠️ {len(ids)} {label}: {', '.join(ids[:5])}{' ...' if len(ids) > 5 else ''}")
+    if not same_order and not (missing or extra):
+        print("⚠️ same chunks, different order")
+    ok = not (missing or extra or different) and same_order
+    if ok:
+        print("✅ Identical to the legacy output")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build retrieval chunks as JSONL")
+    parser.add_argument('--output', default=OUTPUT_PATH)
+    parser.add_argument('--gzip', action='store_true', help="write <output>.gz")
+    parser.add_argument('--check', nargs='?', const=LEGACY_PATH,
+                        help=f"compare with a legacy chunks.json (default {LEGACY_PATH}) instead of writing")
+    args = parser.parse_args()
+
+    matches = pd.read_csv(MATCHES_PATH)
+    cups = pd.read_csv(CUPS_PATH)
+
+    if args.check:
+        sys.exit(0 if check_parity(build_chunks(matches, cups), args.check) else 1)
+
+    output = args.output + '.gz' if args.gzip and not args.output.endswith('.gz') else args.output
+    counts = write_jsonl(build_chunks(matches, cups), output)
+
+    print(f"✅ Total chunks created: {sum(counts.values())} → {output}")
+    print(f"   Match chunks:      {counts['match']}")
+    print(f"   Tournament chunks: {counts['tournament']}")
+    print(f"   Team chunks:       {counts['team_history']}")
+
+    # Preview a few team chunks to verify titles
+    print("\n--- Preview: Teams with World Cup titles ---")
+    for team, year_list in team_titles(cups).items():
+        print(f"  {team}: {', '.join(year_list)}")
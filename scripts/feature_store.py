@@ -0,0 +1,270 @@
+import argparse
+import os
+import pickle
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+from stats_engine import STAT_COLUMNS, to_days, side_outcomes, prior_totals, stats_to_dict
+
+# Point-in-time feature store for team form and head to head.
+# Running per-team and per-pair totals are kept in date order, so every match
+# only sees results from the days before kickoff, and newly appended rows of
+# results.csv are folded in without touching the rows already counted.
+#
+#   python scripts/feature_store.py            fold new rows of data/results.csv
+#   python scripts/feature_store.py --rebuild  start again from an empty store
+#
+# When scripts/train_model.py has published a model version, the new snapshot
+# is published as the next version (same model files) so the API picks it up.
+
+RESULTS_PATH = 'data/results.csv'
+CHECKPOINT_PATH = 'data/features/checkpoint.pkl'
+SNAPSHOT_PATH = 'data/features/snapshot.pkl'
+MODEL_REGISTRY = 'data/model'
+# The matrix was computed from the old snapshot, so it stays behind
+MODEL_FILES = ['match_predictor.pkl', 'match_predictor.npz', 'team_stats.pkl', 'teams_list.json']
+
+NEUTRAL_TEAM = [0.33, 0.33, 0.33, 1.0, 1.0, 0]
+H2H_COLUMNS = ['t1_wins', 'draws', 't2_wins', 'total']
+
+
+def team_feature_rows(totals):
+    """get_team_features() for an array of totals, neutral when a team has no history"""
+    played = totals[:, 0].astype(np.float64)
+    safe = np.where(played > 0, played, 1)
+    features = np.column_stack([
+        totals[:, 1] / safe, totals[:, 2] / safe, totals[:, 3] / safe,
+        totals[:, 4] / safe, totals[:, 5] / safe, played
+    ])
+    features[played == 0] = NEUTRAL_TEAM
+    return features
+
+
+def training_matrix(home_features, away_features, h2h, home_score, away_score):
+    """X / y with every match followed by its home/away-swapped copy"""
+    n = len(home_features)
+    X = np.empty((2 * n, 15), dtype=np.float64)
+    X[0::2] = np.hstack([home_features, away_features, h2h])
+    X[1::2] = np.hstack([away_features, home_features, h2h[:, ::-1]])
+
+    home_win, draw, _ = side_outcomes(home_score, away_score)
+    away_win, _, _ = side_outcomes(away_score, home_score)
+    y = np.empty(2 * n, dtype=np.int64)
+    y[0::2] = np.where(home_win, 0, np.where(draw, 1, 2))
+    y[1::2] = np.where(away_win, 0, np.where(draw, 1, 2))
+    return X, y
+
+
+def grow(array, size):
+    """Pad an accumulator with zero rows for newly seen teams or pairs"""
+    if len(array) >= size:
+        return array
+    return np.vstack([array, np.zeros((size - len(array), array.shape[1]), dtype=array.dtype)])
+
+
+class FeatureStore:
+    """Running team / pair accumulators over results in date order"""
+
+    def __init__(self):
+        self.teams = []
+        self.team_index = {}
+        self.team_totals = np.zeros((0, len(STAT_COLUMNS)), dtype=np.int64)
+        self.pairs = []
+        self.pair_index = {}
+        self.pair_totals = np.zeros((0, len(H2H_COLUMNS)), dtype=np.int64)
+
+        # Matches on the latest folded day are tracked separately so a late row
+        # for that same day still gets features from the days before it
+        self.last_day = None
+        self.last_day_team_totals = np.zeros_like(self.team_totals)
+        self.last_day_pair_totals = np.zeros_like(self.pair_totals)
+        self.rows_seen = 0
+
+    # ── Encoding ──
+    def _codes(self, names, index, labels):
+        codes, uniques = pd.factorize(names)
+        mapping = np.empty(len(uniques), dtype=np.int64)
+        for i, name in enumerate(uniques):
+            if name not in index:
+                index[name] = len(labels)
+                labels.append(name)
+            mapping[i] = index[name]
+        return mapping[codes]
+
+    def _resize(self):
+        self.team_totals = grow(self.team_totals, len(self.teams))
+        self.last_day_team_totals = grow(self.last_day_team_totals, len(self.teams))
+        self.pair_totals = grow(self.pair_totals, len(self.pairs))
+        self.last_day_pair_totals = grow(self.last_day_pair_totals, len(self.pairs))
+
+    def _base(self, totals, last_day_totals, codes, days):
+        """Accumulated totals as of the day before each row"""
+        base = totals[codes]
+        if self.last_day is not None:
+            same_day = days == self.last_day
+            base[same_day] -= last_day_totals[codes[same_day]]
+        return base
+
+    def _fold(self, totals, last_day_totals, codes, days, values, last_day):
+        np.add.at(totals, codes, values)
+        if last_day != self.last_day:
+            last_day_totals[:] = 0
+        on_last_day = days == last_day
+        np.add.at(last_day_totals, codes[on_last_day], values[on_last_day])
+
+    # ── Updates ──
+    def update(self, df):
+        """Fold new results in; returns (home, away, h2h) features as of the day before each match"""
+        n = len(df)
+        if n == 0:
+            return np.zeros((0, 6)), np.zeros((0, 6)), np.zeros((0, 3))
+
+        days = to_days(df['date'])
+        if self.last_day is not None and days.min() < self.last_day:
+            raise ValueError(
+                f"Results dated before {self.as_of()} cannot be appended — rebuild the store instead"
+            )
+
+        home_names = df['home_team'].to_numpy(dtype=object)
+        away_names = df['away_team'].to_numpy(dtype=object)
+        home_score = df['home_score'].to_numpy()
+        away_score = df['away_score'].to_numpy()
+        home = self._codes(home_names, self.team_index, self.teams)
+        away = self._codes(away_names, self.team_index, self.teams)
+
+        home_first = home_names <= away_names
+        t1 = np.where(home_first, home_names, away_names)
+        t2 = np.where(home_first, away_names, home_names)
+        pair = self._codes(pd.MultiIndex.from_arrays([t1, t2]).to_flat_index(), self.pair_index, self.pairs)
+        self._resize()
+
+        # Team accumulators: one long row per (match, side)
+        team = np.concatenate([home, away])
+        team_days = np.concatenate([days, days])
+        goals_for = np.concatenate([home_score, away_score])
+        goals_against = np.concatenate([away_score, home_score])
+        win, draw, loss = side_outcomes(goals_for, goals_against)
+        team_values = np.column_stack([
+            np.ones(2 * n, dtype=np.int64), win, draw, loss, goals_for, goals_against
+        ]).astype(self.team_totals.dtype)
+        team_prior = (self._base(self.team_totals, self.last_day_team_totals, team, team_days)
+                      + prior_totals(team, team_days, team_values))
+
+        # Pair accumulators, oriented by the name-sorted pair
+        home_won = home_score > away_score
+        away_won = home_score < away_score
+        pair_values = np.column_stack([
+            (home_won & home_first) | (away_won & ~home_first),
+            ~(home_won | away_won),
+            (home_won & ~home_first) | (away_won & home_first),
+            np.ones(n, dtype=bool),
+        ]).astype(np.int64)
+        pair_prior = (self._base(self.pair_totals, self.last_day_pair_totals, pair, days)
+                      + prior_totals(pair, days, pair_values))
+
+        last_day = int(days.max())
+        self._fold(self.team_totals, self.last_day_team_totals, team, team_days, team_values, last_day)
+        self._fold(self.pair_totals, self.last_day_pair_totals, pair, days, pair_values, last_day)
+        self.last_day = last_day
+        self.rows_seen += n
+
+        home_features = team_feature_rows(team_prior[:n])
+        away_features = team_feature_rows(team_prior[n:])
+        return home_features, away_features, self.h2h_features(pair_prior, home_first)
+
+    @staticmethod
+    def h2h_features(pair_prior, home_first):
+        """[home wins, draws, away wins] ratios from the home side, zeros without history"""
+        total = pair_prior[:, 3].astype(np.float64)
+        safe = np.where(total > 0, total, 1)
+        t1 = pair_prior[:, 0] / safe
+        draws = pair_prior[:, 1] / safe
+        t2 = pair_prior[:, 2] / safe
+        return np.column_stack([np.where(home_first, t1, t2), draws, np.where(home_first, t2, t1)])
+
+    def update_from_csv(self, path=RESULTS_PATH):
+        """Fold only the rows appended to results.csv since the last checkpoint"""
+        new_rows = pd.read_csv(path, skiprows=range(1, self.rows_seen + 1))
+        return new_rows, self.update(new_rows)
+
+    # ── Snapshots ──
+    def as_of(self):
+        if self.last_day is None:
+            return None
+        return str(np.datetime64(self.last_day, 'D'))
+
+    def team_stats(self):
+        """Latest stats in the team_stats.pkl format"""
+        return stats_to_dict(self.teams, self.team_totals)
+
+    def head_to_head(self):
+        """Latest counts in the h2h_dict format"""
+        rows = self.pair_totals.tolist()
+        return {pair: dict(zip(H2H_COLUMNS, row)) for pair, row in zip(self.pairs, rows)}
+
+    def snapshot(self):
+        return {
+            'as_of': self.as_of(),
+            'rows': self.rows_seen,
+            'team_stats': self.team_stats(),
+            'h2h': self.head_to_head(),
+        }
+
+    # ── Persistence ──
+    def save(self, checkpoint_path=CHECKPOINT_PATH, snapshot_path=SNAPSHOT_PATH):
+        """Write the checkpoint and the latest snapshot, each via an atomic rename"""
+        write_pickle(checkpoint_path, self.__dict__)
+        write_pickle(snapshot_path, self.snapshot())
+
+    @classmethod
+    def load(cls, checkpoint_path=CHECKPOINT_PATH):
+        store = cls()
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'rb') as f:
+                store.__dict__.update(pickle.load(f))
+        return store
+
+
+def publish_snapshot(store, snapshot_path=SNAPSHOT_PATH, registry=MODEL_REGISTRY):
+    """Publish the active model with the latest snapshot as a new version; None without a registry"""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+    import artifacts
+
+    active = artifacts.active_version(registry)
+    if active is None:
+        return None
+    source = artifacts.version_dir(registry, active)
+    metadata = artifacts.verify(source)["metadata"]
+    staging = artifacts.stage(registry)
+    for name in MODEL_FILES:
+        if os.path.exists(os.path.join(source, name)):
+            shutil.copyfile(os.path.join(source, name), os.path.join(staging, name))
+    shutil.copyfile(snapshot_path, os.path.join(staging, 'snapshot.pkl'))
+    return artifacts.publish(registry, staging, dict(metadata, features_as_of=store.as_of(), model_from=active))
+
+
+def write_pickle(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(obj, f)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rebuild', action='store_true', help='Ignore the checkpoint and start from scratch')
+    args = parser.parse_args()
+
+    store = FeatureStore() if args.rebuild else FeatureStore.load()
+    before = store.rows_seen
+    new_rows, _ = store.update_from_csv()
+    store.save()
+
+    print(f"✅ Folded {len(new_rows)} new results ({before} already in the checkpoint)")
+    print(f"✅ Snapshot as of {store.as_of()} — {len(store.teams)} teams, {len(store.pairs)} pairs")
+    if len(new_rows):
+        version = publish_snapshot(store)
+        if version is not None:
+            print(f"✅ Published {version} with the new snapshot")
@@ -1,51 +1,417 @@
+import argparse
+import gzip
+import hashlib
 import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime, timezone
 import chromadb
+import numpy as np
 from sentence_transformers import SentenceTransformer
 
-# Load chunks
-with open('data/chunks.json', 'r') as f:
-    chunks = json.load(f)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from vector_index import collection_records, write_index
+from lexical_index import write_lexical_index
 
-print(f"Loaded {len(chunks)} chunks")
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
 
-# Load embedding model (downloads ~90MB first time, cached after)
-print("Loading embedding model... (first time takes 1-2 mins)")
-model = SentenceTransformer('all-MiniLM-L6-v2')
-print("✅ Model loaded")
+# Incremental, streaming ingestion of the chunk file into ChromaDB.
+#
+# Every chunk id gets a content hash (text + metadata). Only new or changed
+# chunks are embedded; unchanged ones reuse the stored embeddings, and ids
+# that disappeared are left out. The update is built in a fresh staging
+# collection (fifa_data_v<N>) and then published by atomically replacing
+# data/chromadb/active.json, so the running API keeps serving the previous,
+# complete collection until it sees the new pointer. The previous collection
+# is kept for readers that have not switched yet; older ones are dropped.
+#
+# data/chromadb/manifest.json records the hash of every chunk id, the
+# embedding model and the collection it was written to. Before the switch
+# the staging collection is also exported to data/vector_index/<name> for
+# the NumPy retrieval backend (RETRIEVAL_BACKEND=numpy), and its BM25 index
+# is written to data/lexical_index/<name>.json for hybrid retrieval.
+#
+# Chunks are streamed from JSONL (optionally .gz) and never held in memory
+# all at once. Encoding runs on a SentenceTransformer multi-process pool
+# (one worker per core by default) with a submit size that grows while
+# throughput improves; a writer thread upserts finished batches so encoding
+# and Chroma I/O overlap. Every committed batch is recorded in
+# data/chromadb/ingest_progress.json, and a re-run after a crash with the
+# same input continues in the same staging collection from that point.
+#
+# INGEST_WORKERS      encoding processes (default: all cores, 1 = in-process)
+# INGEST_BATCH_SIZE   initial chunks per submitted batch (default 256)
 
-# Setup ChromaDB (saves to disk, persists between runs)
-client = chromadb.PersistentClient(path="data/chromadb")
+CHUNKS_PATHS = ['data/chunks.jsonl.gz', 'data/chunks.jsonl', 'data/chunks.json']
+CHROMA_PATH = 'data/chromadb'
+ACTIVE_PATH = os.path.join(CHROMA_PATH, 'active.json')
+MANIFEST_PATH = os.path.join(CHROMA_PATH, 'manifest.json')
+VECTOR_INDEX_PATH = 'data/vector_index'
+LEXICAL_INDEX_PATH = 'data/lexical_index'
+PROGRESS_PATH = os.path.join(CHROMA_PATH, 'ingest_progress.json')
+COLLECTION_PREFIX = 'fifa_data'
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+MIN_BATCH_SIZE = 32
+MAX_BATCH_SIZE = 8192
+ENCODE_BATCH_SIZE = 64       # sentences per forward pass inside each worker
+COPY_BATCH_SIZE = 5000
+WRITE_QUEUE_SIZE = 4         # encoded batches waiting for the writer
 
-# Fresh start — delete if exists
-try:
-    client.delete_collection("fifa_data")
-    print("Deleted old collection")
-except:
-    pass
-
-collection = client.create_collection(
-    name="fifa_data",
-    metadata={"hnsw:space": "cosine"}
-)
-
-# Embed and store in batches of 100
-BATCH_SIZE = 100
-total = len(chunks)
-
-for i in range(0, total, BATCH_SIZE):
-    batch = chunks[i:i + BATCH_SIZE]
-    texts = [c['text'] for c in batch]
-    ids = [c['id'] for c in batch]
-    metadatas = [c['metadata'] for c in batch]
-
-    print(f"Processing batch {i // BATCH_SIZE + 1}/{(total + BATCH_SIZE - 1) // BATCH_SIZE}...")
-    embeddings = model.encode(texts, show_progress_bar=False).tolist()
-
-    collection.add(
-        documents=texts,
-        embeddings=embeddings,
-        ids=ids,
-        metadatas=metadatas
-    )
-
-print(f"\n✅ Done! {collection.count()} chunks stored in ChromaDB")
\ No newline at end of file
+
+# ── Helpers ──
+def chunk_hash(text, metadata):
+    payload = json.dumps({"text": text, "metadata": metadata}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def read_json(path, default=None):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def write_json_atomic(path, obj):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def iter_chunks(path):
+    """Chunks one at a time from .jsonl / .jsonl.gz; legacy .json arrays are loaded whole"""
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            yield from json.load(f)
+        return
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def default_chunks_path():
+    """The most recently written chunk file, so a stale format left behind is never picked"""
+    found = [path for path in CHUNKS_PATHS if os.path.exists(path)]
+    if found:
+        return max(found, key=os.path.getmtime)
+    raise FileNotFoundError(f"No chunk file found (tried {', '.join(CHUNKS_PATHS)}) — run create_chunks.py")
+
+
+def collection_names(client):
+    # list_collections() returns names on newer chromadb, objects on older
+    return [c if isinstance(c, str) else c.name for c in client.list_collections()]
+
+
+def live_hashes(collection):
+    """Hashes recomputed from a collection's own documents (for runs without a manifest)"""
+    hashes = {}
+    total = collection.count()
+    for offset in range(0, total, COPY_BATCH_SIZE):
+        batch = collection.get(include=["documents", "metadatas"], limit=COPY_BATCH_SIZE, offset=offset)
+        for chunk_id, text, metadata in zip(batch['ids'], batch['documents'], batch['metadatas']):
+            hashes[chunk_id] = chunk_hash(text, metadata)
+    return hashes
+
+
+def copy_unchanged(source, target, ids):
+    """Carry stored embeddings over for chunks whose content did not change"""
+    for i in range(0, len(ids), COPY_BATCH_SIZE):
+        batch = source.get(ids=ids[i:i + COPY_BATCH_SIZE], include=["embeddings", "documents", "metadatas"])
+        if batch['ids']:
+            target.upsert(ids=batch['ids'], embeddings=batch['embeddings'],
+                          documents=batch['documents'], metadatas=batch['metadatas'])
+
+
+def plan_digest(new_hashes, live_name):
+    """Identifies one ingest plan (input in file order), so a crashed run is only resumed for the same input"""
+    digest = hashlib.sha256(f"{EMBEDDING_MODEL}|{live_name}".encode('utf-8'))
+    for chunk_id, h in new_hashes.items():
+        digest.update(f"|{chunk_id}:{h}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_indexes(collection):
+    """NumPy vector index and BM25 index for a collection, from one read of it"""
+    ids, documents, metadatas, embeddings = collection_records(collection)
+    write_index(os.path.join(VECTOR_INDEX_PATH, collection.name), ids, documents, metadatas, embeddings)
+    write_lexical_index(os.path.join(LEXICAL_INDEX_PATH, f"{collection.name}.json"), ids, documents, metadatas)
+    print(f"✅ Wrote vector and BM25 indexes for {collection.name}")
+
+
+def peak_rss_mb(who):
+    if resource is None:
+        return None
+    return resource.getrusage(who).ru_maxrss / 1024   # KiB on Linux
+
+
+# ── Encoding ──
+class AdaptiveBatchSize:
+    """Doubles the submit size while chunks/sec keeps improving, then settles on the best one"""
+
+    def __init__(self, start=BATCH_SIZE, minimum=MIN_BATCH_SIZE, maximum=MAX_BATCH_SIZE):
+        self.size = max(minimum, min(start, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.best_rate = 0.0
+        self.best_size = self.size
+        self.growing = True
+
+    def record(self, n, seconds):
+        if n < self.size:
+            return   # a short final batch says nothing about the size
+        rate = n / max(seconds, 1e-9)
+        if rate > self.best_rate * 1.05:
+            self.best_rate, self.best_size = rate, self.size
+            if self.growing:
+                self.size = min(self.size * 2, self.maximum)
+        elif self.growing:
+            self.growing = False
+            self.size = self.best_size
+
+    def shrink(self):
+        self.size = max(self.size // 2, self.minimum)
+        self.best_size = min(self.best_size, self.size)
+        self.growing = False
+
+
+class Encoder:
+    def __init__(self, workers=WORKERS):
+        # Load embedding model (downloads ~90MB first time, cached after)
+        print("Loading embedding model... (first time takes 1-2 mins)")
+        self.model = SentenceTransformer(EMBEDDING_MODEL)
+        self.workers = workers
+        self.pool = self.model.start_multi_process_pool(['cpu'] * workers) if workers > 1 else None
+        print(f"✅ Model loaded ({workers} encoding process{'es' if workers != 1 else ''})")
+
+    def encode(self, texts):
+        if self.pool is None:
+            return self.model.encode(texts, batch_size=ENCODE_BATCH_SIZE, show_progress_bar=False)
+        chunk_size = max(1, -(-len(texts) // self.workers))
+        return self.model.encode_multi_process(texts, self.pool, batch_size=ENCODE_BATCH_SIZE,
+                                               chunk_size=chunk_size)
+
+    def close(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+
+def changed_batches(path, changed_ids, skip, batcher):
+    """Batches of new/changed chunks in file order, after the `skip` already committed"""
+    batch = []
+    seen = 0
+    for chunk in iter_chunks(path):
+        if chunk['id'] not in changed_ids:
+            continue
+        seen += 1
+        if seen <= skip:
+            continue
+        batch.append(chunk)
+        if len(batch) >= batcher.size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Writer(threading.Thread):
+    """Upserts encoded batches and records each committed batch in the progress file"""
+
+    def __init__(self, collection, progress):
+        super().__init__(daemon=True)
+        self.collection = collection
+        self.progress = progress
+        self.queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.error = None
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            if self.error is not None:
+                continue
+            batch, embeddings = item
+            try:
+                self.collection.upsert(
+                    documents=[c['text'] for c in batch],
+                    embeddings=embeddings.tolist(),
+                    ids=[c['id'] for c in batch],
+                    metadatas=[c['metadata'] for c in batch]
+                )
+                self.progress['committed'] += len(batch)
+                write_json_atomic(PROGRESS_PATH, self.progress)
+            except Exception as e:
+                self.error = e
+
+    def put(self, batch, embeddings):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((batch, embeddings))
+
+    def finish(self):
+        self.queue.put(None)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+
+def embed_changed(path, changed_ids, staging, progress):
+    total = len(changed_ids)
+    done = progress['committed']
+    if done:
+        print(f"Resuming after {done}/{total} committed chunks")
+
+    batcher = AdaptiveBatchSize()
+    encoder = Encoder()
+    writer = Writer(staging, progress)
+    writer.start()
+    start = time.perf_counter()
+    encoded = 0
+    try:
+        for batch in changed_batches(path, changed_ids, done, batcher):
+            texts = [c['text'] for c in batch]
+            t0 = time.perf_counter()
+            try:
+                embeddings = encoder.encode(texts)
+            except MemoryError:
+                # Large submits can exhaust memory on small machines: halve and retry in parts
+                if batcher.size <= batcher.minimum:
+                    raise
+                batcher.shrink()
+                print(f"⚠️ Out of memory — batch size down to {batcher.size}")
+                embeddings = np.concatenate([encoder.encode(texts[i:i + batcher.size])
+                                             for i in range(0, len(texts), batcher.size)])
+            else:
+                batcher.record(len(batch), time.perf_counter() - t0)
+            writer.put(batch, embeddings)
+            encoded += len(batch)
+            elapsed = time.perf_counter() - start
+            print(f"Embedded {done + encoded}/{total}  "
+                  f"{encoded / elapsed:.0f} chunks/sec  next batch {batcher.size}")
+        writer.finish()
+    finally:
+        encoder.close()
+
+    elapsed = time.perf_counter() - start
+    if encoded:
+        print(f"⏱️ Embedded {encoded} chunks in {elapsed:.1f}s ({encoded / elapsed:.0f} chunks/sec)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally ingest chunks into ChromaDB")
+    parser.add_argument('--chunks', help=f"chunk file (default: newest of {', '.join(CHUNKS_PATHS)})")
+    args = parser.parse_args()
+    chunks_path = args.chunks or default_chunks_path()
+
+    # ── Pass 1: hashes only ──
+    new_hashes = {c['id']: chunk_hash(c['text'], c['metadata']) for c in iter_chunks(chunks_path)}
+    print(f"Hashed {len(new_hashes)} chunks from {chunks_path}")
+
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    existing = collection_names(client)
+
+    # ── Current state ──
+    active = read_json(ACTIVE_PATH)
+    if active is None and COLLECTION_PREFIX in existing:
+        # First run against a collection built by the old delete-and-rebuild script
+        active = {"collection": COLLECTION_PREFIX, "version": 0, "embedding_model": EMBEDDING_MODEL}
+    live = client.get_collection(active['collection']) if active else None
+
+    manifest = read_json(MANIFEST_PATH)
+    if live is None or active.get('embedding_model') != EMBEDDING_MODEL:
+        old_hashes = {}
+    elif manifest and manifest.get('collection') == active['collection']:
+        old_hashes = manifest['chunks']
+    else:
+        old_hashes = live_hashes(live)
+
+    # ── Plan ──
+    unchanged = [cid for cid, h in new_hashes.items() if old_hashes.get(cid) == h]
+    changed_ids = {cid for cid, h in new_hashes.items() if old_hashes.get(cid) != h}
+    removed = [cid for cid in old_hashes if cid not in new_hashes]
+    print(f"Unchanged: {len(unchanged)}  New/changed: {len(changed_ids)}  Removed: {len(removed)}")
+
+    if live is not None and not changed_ids and not removed:
+        print(f"✅ Up to date — {active['collection']} already matches {chunks_path}")
+        if not (os.path.exists(os.path.join(VECTOR_INDEX_PATH, live.name))
+                and os.path.exists(os.path.join(LEXICAL_INDEX_PATH, f"{live.name}.json"))):
+            write_indexes(live)
+        return
+
+    # ── Build (or resume) the staging collection ──
+    version = (active['version'] if active else 0) + 1
+    staging_name = f"{COLLECTION_PREFIX}_v{version}"
+    digest = plan_digest(new_hashes, live.name if live else None)
+    progress = read_json(PROGRESS_PATH)
+    if progress and progress.get('collection') == staging_name and progress.get('plan') == digest \
+            and staging_name in existing:
+        staging = client.get_collection(staging_name)
+    else:
+        if staging_name in existing:
+            client.delete_collection(staging_name)   # left over from a run with other input
+        staging = client.create_collection(name=staging_name, metadata={"hnsw:space": "cosine"})
+        progress = {"collection": staging_name, "plan": digest, "copied": False, "committed": 0}
+        write_json_atomic(PROGRESS_PATH, progress)
+
+    if unchanged and not progress['copied']:
+        print(f"Copying {len(unchanged)} unchanged embeddings...")
+        copy_unchanged(live, staging, unchanged)
+        progress['copied'] = True
+        write_json_atomic(PROGRESS_PATH, progress)
+
+    if changed_ids:
+        embed_changed(chunks_path, changed_ids, staging, progress)
+
+    if staging.count() != len(new_hashes):
+        raise RuntimeError(f"{staging_name} has {staging.count()} chunks, expected {len(new_hashes)}")
+
+    write_indexes(staging)
+
+    # ── Publish: manifest first, then the pointer the API follows ──
+    updated_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    write_json_atomic(MANIFEST_PATH, {
+        "collection": staging_name,
+        "embedding_model": EMBEDDING_MODEL,
+        "updated_at": updated_at,
+        "chunks": new_hashes,
+    })
+    write_json_atomic(ACTIVE_PATH, {
+        "collection": staging_name,
+        "version": version,
+        "embedding_model": EMBEDDING_MODEL,
+        "updated_at": updated_at,
+    })
+    os.remove(PROGRESS_PATH)
+    print(f"✅ Switched to {staging_name} — {staging.count()} chunks")
+
+    # Keep the previous collection for readers that have not switched yet
+    previous = active['collection'] if active else None
+    for name in collection_names(client):
+        if name.startswith(COLLECTION_PREFIX) and name not in (staging_name, previous):
+            client.delete_collection(name)
+            shutil.rmtree(os.path.join(VECTOR_INDEX_PATH, name), ignore_errors=True)
+            if os.path.exists(os.path.join(LEXICAL_INDEX_PATH, f"{name}.json")):
+                os.remove(os.path.join(LEXICAL_INDEX_PATH, f"{name}.json"))
+            print(f"Dropped old collection {name}")
+
+    if resource is not None:
+        print(f"Peak RSS: {peak_rss_mb(resource.RUSAGE_SELF):.0f} MB main process, "
+              f"{peak_rss_mb(resource.RUSAGE_CHILDREN):.0f} MB largest encoding worker")
+
+
+if __name__ == "__main__":
+    main()
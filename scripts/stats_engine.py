@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+# Columnar team stats over results.csv.
+# Teams are factorized into integer codes once, every match is expanded into
+# one row per side, and all aggregates come from np.bincount / cumulative sums
+# over those codes instead of a Python loop over rows.
+
+STAT_COLUMNS = ['played', 'wins', 'draws', 'losses', 'goals_scored', 'goals_conceded']
+
+
+def to_days(dates):
+    """Convert ISO date strings (or a single string) to integer day numbers"""
+    if isinstance(dates, pd.Series):
+        dates = dates.to_numpy()
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def side_outcomes(goals_for, goals_against):
+    """Win / draw / loss flags for one side, mirroring the if/elif/else of the old loop"""
+    win = goals_for > goals_against
+    draw = goals_for == goals_against
+    loss = ~(win | draw)
+    return win, draw, loss
+
+
+def prior_totals(groups, days, values):
+    """Per-row sums of `values` over rows of the same group dated strictly earlier"""
+    if len(groups) == 0:
+        return np.zeros_like(values)
+    order = np.lexsort((days, groups))
+    day_min = int(days.min())
+    span = int(days.max()) - day_min + 1
+    sorted_groups = groups[order]
+    sorted_keys = sorted_groups * span + (days[order] - day_min)
+    cum = np.vstack([np.zeros((1, values.shape[1]), dtype=values.dtype),
+                     np.cumsum(values[order], axis=0)])
+    ends = np.searchsorted(sorted_keys, groups * span + (days - day_min), side='left')
+    starts = np.searchsorted(sorted_groups, groups, side='left')
+    return cum[ends] - cum[starts]
+
+
+def stats_to_dict(teams, totals):
+    """Turn a (teams x STAT_COLUMNS) totals array into the team_stats.pkl format"""
+    played = totals[:, 0]
+    safe = np.where(played > 0, played, 1)
+    rates = {
+        'win_rate': totals[:, 1] / safe,
+        'draw_rate': totals[:, 2] / safe,
+        'loss_rate': totals[:, 3] / safe,
+        'avg_goals_scored': totals[:, 4] / safe,
+        'avg_goals_conceded': totals[:, 5] / safe,
+    }
+    columns = {name: totals[:, i].tolist() for i, name in enumerate(STAT_COLUMNS)}
+    columns.update({name: values.tolist() for name, values in rates.items()})
+
+    stats = {}
+    for i in np.flatnonzero(played > 0):
+        stats[teams[i]] = {name: values[i] for name, values in columns.items()}
+    return stats
+
+
+class TeamStatsEngine:
+    """Per-team and per-pair aggregates for a results DataFrame"""
+
+    def __init__(self, df):
+        home = df['home_team'].to_numpy()
+        away = df['away_team'].to_numpy()
+
+        # Interleave home/away so codes follow first appearance, like the old dict
+        codes, uniques = pd.factorize(np.column_stack([home, away]).ravel())
+        codes = codes.reshape(-1, 2)
+        self.teams = list(uniques)
+        self.home = codes[:, 0]
+        self.away = codes[:, 1]
+        self.home_score = df['home_score'].to_numpy()
+        self.away_score = df['away_score'].to_numpy()
+        self.days = to_days(df['date'])
+
+        # Long format: one row per (match, side), sorted by team then date
+        team = np.concatenate([self.home, self.away])
+        day = np.concatenate([self.days, self.days])
+        goals_for = np.concatenate([self.home_score, self.away_score])
+        goals_against = np.concatenate([self.away_score, self.home_score])
+        win, draw, loss = side_outcomes(goals_for, goals_against)
+        values = np.column_stack([
+            np.ones(len(team), dtype=goals_for.dtype), win, draw, loss,
+            goals_for, goals_against
+        ])
+
+        order = np.lexsort((day, team))
+        n_teams = len(self.teams)
+        self.day_min = int(day.min()) if len(day) else 0
+        self.day_span = (int(day.max()) - self.day_min + 2) if len(day) else 2
+        self.keys = team[order] * self.day_span + (day[order] - self.day_min)
+        self.cum = np.vstack([np.zeros((1, values.shape[1]), dtype=values.dtype),
+                              np.cumsum(values[order], axis=0)])
+        self.team_starts = np.searchsorted(team[order], np.arange(n_teams), side='left')
+        self.team_ends = np.searchsorted(team[order], np.arange(n_teams), side='right')
+
+    # ── Team totals ──
+    def totals(self, before_date=None):
+        """(teams x STAT_COLUMNS) totals, optionally only for matches before a date"""
+        if before_date is None:
+            ends = self.team_ends
+        else:
+            offset = int(to_days(before_date)) - self.day_min
+            offset = min(max(offset, 0), self.day_span - 1)
+            targets = np.arange(len(self.teams)) * self.day_span + offset
+            ends = np.searchsorted(self.keys, targets, side='left')
+        return self.cum[ends] - self.cum[self.team_starts]
+
+    def team_stats(self, before_date=None):
+        """Same dict as the old build_team_stats — a binary search per team, not a re-scan"""
+        return stats_to_dict(self.teams, self.totals(before_date))
+
+    def team_features(self, stats=None):
+        """(teams x 6) feature matrix in get_team_features order"""
+        totals = self.totals() if stats is None else stats
+        played = totals[:, 0].astype(np.float64)
+        safe = np.where(played > 0, played, 1)
+        return np.column_stack([
+            totals[:, 1] / safe, totals[:, 2] / safe, totals[:, 3] / safe,
+            totals[:, 4] / safe, totals[:, 5] / safe, played
+        ])
+
+    # ── Head to head ──
+    def pair_codes(self):
+        """Unordered pair index per match and whether home is the alphabetically first team"""
+        name_rank = np.empty(len(self.teams), dtype=np.int64)
+        name_rank[np.argsort(np.array(self.teams, dtype=object))] = np.arange(len(self.teams))
+        home_first = name_rank[self.home] <= name_rank[self.away]
+        t1 = np.where(home_first, self.home, self.away)
+        t2 = np.where(home_first, self.away, self.home)
+        pairs, pair_index = np.unique(t1 * len(self.teams) + t2, return_inverse=True)
+        return pairs, pair_index.ravel(), home_first
+
+    def pair_totals(self):
+        """Pair keys plus (pairs x [t1_wins, draws, t2_wins, total]) counts"""
+        pairs, pair_index, home_first = self.pair_codes()
+        home_won = self.home_score > self.away_score
+        away_won = self.home_score < self.away_score
+        t1_won = (home_won & home_first) | (away_won & ~home_first)
+        t2_won = (home_won & ~home_first) | (away_won & home_first)
+        drawn = ~(home_won | away_won)
+
+        n_pairs = len(pairs)
+        counts = np.column_stack([
+            np.bincount(pair_index, weights=t1_won, minlength=n_pairs),
+            np.bincount(pair_index, weights=drawn, minlength=n_pairs),
+            np.bincount(pair_index, weights=t2_won, minlength=n_pairs),
+            np.bincount(pair_index, minlength=n_pairs),
+        ]).astype(np.int64)
+        return pairs, pair_index, home_first, counts
+
+    def head_to_head(self):
+        """Same dict as the old h2h_dict: (t1, t2) sorted by name -> counts"""
+        pairs, _, _, counts = self.pair_totals()
+        n_teams = len(self.teams)
+        rows = counts.tolist()
+        h2h = {}
+        for key, (t1_wins, draws, t2_wins, total) in zip(pairs.tolist(), rows):
+            t1, t2 = self.teams[key // n_teams], self.teams[key % n_teams]
+            h2h[(t1, t2)] = {'t1_wins': t1_wins, 'draws': draws, 't2_wins': t2_wins, 'total': total}
+        return h2h
+
+    # ── Training matrix ──
+    def feature_matrix(self):
+        """X / y with every match followed by its home/away-swapped copy"""
+        features = self.team_features()
+        _, pair_index, home_first, counts = self.pair_totals()
+        total = counts[pair_index, 3].astype(np.float64)
+        t1 = counts[pair_index, 0] / total
+        draws = counts[pair_index, 1] / total
+        t2 = counts[pair_index, 2] / total
+
+        # Only identical home/away names are "first" from both sides
+        away_first = ~home_first | (self.home == self.away)
+        h2h = np.column_stack([np.where(home_first, t1, t2), draws, np.where(home_first, t2, t1)])
+        h2h_swapped = np.column_stack([np.where(away_first, t1, t2), draws, np.where(away_first, t2, t1)])
+
+        home_features = features[self.home]
+        away_features = features[self.away]
+        n = len(self.home)
+        X = np.empty((2 * n, 15), dtype=np.float64)
+        X[0::2] = np.hstack([home_features, away_features, h2h])
+        X[1::2] = np.hstack([away_features, home_features, h2h_swapped])
+
+        y = np.empty(2 * n, dtype=np.int64)
+        y[0::2] = outcome_labels(self.home_score, self.away_score)
+        y[1::2] = outcome_labels(self.away_score, self.home_score)
+        return X, y
+
+
+def outcome_labels(goals_for, goals_against):
+    """0 = win, 1 = draw, 2 = loss from the first side's point of view"""
+    win, draw, _ = side_outcomes(goals_for, goals_against)
+    return np.where(win, 0, np.where(draw, 1, 2))
+
+
+def build_team_stats(df, before_date=None):
+    """Build win rate, goals scored/conceded per team"""
+    return TeamStatsEngine(df).team_stats(before_date)
@@ -0,0 +1,59 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from fact_engine import FactEngine
+
+# Questions the structured route must answer, and ones it must leave to RAG,
+# over a two-tournament dataset so it runs without the cleaned CSVs.
+#   python scripts/test_fact_engine.py
+
+CUPS = [
+    {"Year": "2014", "Country": "Brazil", "Winner": "Germany", "Runners-Up": "Argentina", "Third": "Netherlands"},
+    {"Year": "2018", "Country": "Russia", "Winner": "France", "Runners-Up": "Croatia", "Third": "Belgium"},
+]
+MATCHES = [
+    {"Year": "2014", "Stage": "Final", "Home Team Name": "Germany", "Away Team Name": "Argentina",
+     "Home Team Goals": "1", "Away Team Goals": "0", "Win conditions": "Germany win after extra time"},
+    {"Year": "2014", "Stage": "Play-off for third place", "Home Team Name": "Brazil",
+     "Away Team Name": "Netherlands", "Home Team Goals": "0", "Away Team Goals": "3"},
+    {"Year": "2018", "Stage": "Final", "Home Team Name": "France", "Away Team Name": "Croatia",
+     "Home Team Goals": "4", "Away Team Goals": "2"},
+]
+
+# question -> text the structured answer must contain, or None when it must fall through
+CASES = {
+    "Who won the 2014 World Cup?": "Germany won the 2014",
+    "which team won the world cup in 2018": "France won the 2018",
+    "2018 world cup champion": "France won the 2018",
+    "Who hosted the 2014 World Cup?": "held in Brazil",
+    "Where was the 2018 World Cup held?": "held in Russia",
+    "Who was runner-up at the 2018 World Cup?": "Croatia were runners-up",
+    "Who won the 2014 final?": "Germany won the 2014",
+    "What was the score of the 2018 final?": "France 4 - 2 Croatia",
+    "Who won the third place match in 2014?": None,
+    "Who won the golden ball in 2014?": None,
+    "Who won the golden boot in 2018?": None,
+    "Who won the best young player award in 2018?": None,
+    "Who scored the most goals in 2014?": None,
+    "Who won group C in 2014?": None,
+    "who won in 2018": None,
+    "Who won the Ballon d'Or in 2018?": None,
+    "Who won the Champions League in 2014?": None,
+    "Who won the Club World Cup in 2018?": None,
+    "Who won the women's world cup in 2014": None,
+    "Where was the 2014 final played?": None,
+}
+
+engine = FactEngine(MATCHES, CUPS)
+failures = 0
+for question, expected in CASES.items():
+    result = engine.answer(question)
+    answer = result["answer"] if result else None
+    ok = answer is None if expected is None else answer is not None and expected in answer
+    failures += not ok
+    print(f"{'✅' if ok else '❌'} {question!r} → {answer}")
+
+if failures:
+    sys.exit(f"\n{failures} of {len(CASES)} cases failed")
+print(f"\n✅ All {len(CASES)} cases passed")
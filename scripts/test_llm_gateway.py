@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from llm import LLMClient
+from llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable
+
+# A stream that stalls before its first token must end as a retryable timeout:
+# retried, counted toward the breaker and surfaced as LLMUnavailable (503 with
+# Retry-After), not as a raw asyncio.TimeoutError.
+#   python scripts/test_llm_gateway.py
+
+
+class StalledClient(LLMClient):
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, prompt, timeout=None):
+        raise NotImplementedError
+
+    async def stream(self, prompt, timeout=None):
+        self.calls += 1
+        await asyncio.sleep(3600)
+        yield "never"
+
+
+async def drain(gateway):
+    return [token async for token in gateway.stream("question", timeout=0.3)]
+
+
+client = StalledClient()
+gateway = LLMGateway(client, retries=2)
+gateway.breaker = CircuitBreaker(threshold=1, cooldown=60)
+try:
+    asyncio.run(drain(gateway))
+    error = None
+except Exception as e:
+    error = e
+
+checks = {
+    "raises LLMUnavailable": isinstance(error, LLMUnavailable),
+    "message names the timeout": "deadline" in str(error),
+    "has a Retry-After": getattr(error, "retry_after", 0) > 0,
+    "opens the breaker": gateway.breaker.state() == "open",
+}
+for name, ok in checks.items():
+    print(f"{'✅' if ok else '❌'} {name}")
+print(f"   {client.calls} attempt(s), {type(error).__name__}: {error}")
+
+failures = sum(not ok for ok in checks.values())
+if failures:
+    sys.exit(f"\n{failures} of {len(checks)} checks failed")
+print(f"\n✅ All {len(checks)} checks passed")
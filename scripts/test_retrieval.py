@@ -1,22 +1,50 @@
+import json
+import os
+import sys
 import chromadb
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from vector_index import collection_records
+from lexical_index import LexicalIndex, write_lexical_index, where_filter, reciprocal_rank_fusion
+
+# Dense vs hybrid (BM25 + dense, entity pre-filter, reciprocal-rank fusion)
+# top results for a few keyword-heavy questions.
+
+ACTIVE_PATH = "data/chromadb/active.json"
+LEXICAL_INDEX_PATH = "data/lexical_index"
+
 model = SentenceTransformer('all-MiniLM-L6-v2')
 client = chromadb.PersistentClient(path="data/chromadb")
-collection = client.get_collection("fifa_data")
+name = json.load(open(ACTIVE_PATH))["collection"] if os.path.exists(ACTIVE_PATH) else "fifa_data"
+collection = client.get_collection(name)
 
-print(f"Total chunks in DB: {collection.count()}\n")
+lexical_path = os.path.join(LEXICAL_INDEX_PATH, f"{name}.json")
+if not os.path.exists(lexical_path):
+    write_lexical_index(lexical_path, *collection_records(collection)[:3])
+lexical = LexicalIndex(lexical_path)
+
+print(f"Total chunks in DB: {collection.count()} ({name})\n")
 
 test_queries = [
     "Who won the 2014 World Cup?",
     "Brazil World Cup history",
-    "France vs Croatia final"
+    "France vs Croatia final",
+    "Brazil 1970"
 ]
 
 for query in test_queries:
     embedding = model.encode(query).tolist()
-    results = collection.query(query_embeddings=[embedding], n_results=2)
-    
+    dense = collection.query(query_embeddings=[embedding], n_results=20)
+
+    teams, years = lexical.entities(query)
+    where = where_filter(teams, years)
+    filtered = collection.query(query_embeddings=[embedding], n_results=20, where=where) if where else dense
+    bm25_ids = [lexical.ids[row] for row, _ in lexical.search(query, 20)]
+    hybrid_top = reciprocal_rank_fusion([filtered['ids'][0], bm25_ids])[0]
+    documents = dict(zip(lexical.ids, lexical.documents))
+
     print(f"Query: {query}")
-    print(f"Top result: {results['documents'][0][0][:200]}...")
-    print("-" * 60)
\ No newline at end of file
+    print(f"Dense top:  {dense['documents'][0][0][:200]}...")
+    print(f"Hybrid top: {documents[hybrid_top][:200]}...")
+    print("-" * 60)
@@ -1,176 +1,44 @@
 import pandas as pd
-import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import pickle
+import json
 import os
+import shutil
+import sys
+from feature_store import FeatureStore, training_matrix, SNAPSHOT_PATH
+
+# Prediction + calibration code is shared with the API
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from predictor import Predictor
+from prediction_matrix import write_matrix, artifact_fingerprint
+from forest import export_forest
+import artifacts
+
+MODEL_REGISTRY = 'data/model'
 
 # ── Load Data ──
 print("Loading data...")
 matches = pd.read_csv('data/matches_clean.csv')
 results = pd.read_csv('data/results.csv')
 
-# ── Build Team Stats from full historical results ──
-# This gives us a much richer dataset than just World Cup matches
-print("Building team stats...")
-
-def build_team_stats(df, before_date=None):
-    """Build win rate, goals scored/conceded per team"""
-    if before_date:
-        df = df[df['date'] < before_date]
-    
-    stats = {}
-    
-    for _, row in df.iterrows():
-        home = row['home_team']
-        away = row['away_team']
-        hg = row['home_score']
-        ag = row['away_score']
-        
-        for team in [home, away]:
-            if team not in stats:
-                stats[team] = {
-                    'played': 0, 'wins': 0, 'draws': 0,
-                    'losses': 0, 'goals_scored': 0, 'goals_conceded': 0
-                }
-        
-        # Home team
-        stats[home]['played'] += 1
-        stats[home]['goals_scored'] += hg
-        stats[home]['goals_conceded'] += ag
-        if hg > ag:
-            stats[home]['wins'] += 1
-        elif hg == ag:
-            stats[home]['draws'] += 1
-        else:
-            stats[home]['losses'] += 1
-        
-        # Away team
-        stats[away]['played'] += 1
-        stats[away]['goals_scored'] += ag
-        stats[away]['goals_conceded'] += hg
-        if ag > hg:
-            stats[away]['wins'] += 1
-        elif ag == hg:
-            stats[away]['draws'] += 1
-        else:
-            stats[away]['losses'] += 1
-    
-    # Convert to rates
-    for team in stats:
-        p = stats[team]['played']
-        if p > 0:
-            stats[team]['win_rate'] = stats[team]['wins'] / p
-            stats[team]['draw_rate'] = stats[team]['draws'] / p
-            stats[team]['loss_rate'] = stats[team]['losses'] / p
-            stats[team]['avg_goals_scored'] = stats[team]['goals_scored'] / p
-            stats[team]['avg_goals_conceded'] = stats[team]['goals_conceded'] / p
-        else:
-            stats[team]['win_rate'] = 0
-            stats[team]['draw_rate'] = 0
-            stats[team]['loss_rate'] = 0
-            stats[team]['avg_goals_scored'] = 0
-            stats[team]['avg_goals_conceded'] = 0
-    
-    return stats
-
-# ── Prepare Training Data from World Cup Matches ──
-print("Preparing features...")
-
-# Build overall team stats first
-all_stats = build_team_stats(results)
-
-def get_team_features(team, stats):
-    """Get feature vector for a team"""
-    if team in stats:
-        s = stats[team]
-        return [
-            s['win_rate'],
-            s['draw_rate'],
-            s['loss_rate'],
-            s['avg_goals_scored'],
-            s['avg_goals_conceded'],
-            s['played']
-        ]
-    else:
-        # Unknown team — use neutral values
-        return [0.33, 0.33, 0.33, 1.0, 1.0, 0]
-
-# Precompute H2H dictionary for O(1) lookups
-print("Precomputing H2H dictionary...")
-h2h_dict = {}
-for _, row in results.iterrows():
-    t1, t2 = sorted([row['home_team'], row['away_team']])
-    if (t1, t2) not in h2h_dict:
-        h2h_dict[(t1, t2)] = {'t1_wins': 0, 'draws': 0, 't2_wins': 0, 'total': 0}
-    
-    h2h_dict[(t1, t2)]['total'] += 1
-    if row['home_score'] > row['away_score']:
-        if row['home_team'] == t1:
-            h2h_dict[(t1, t2)]['t1_wins'] += 1
-        else:
-            h2h_dict[(t1, t2)]['t2_wins'] += 1
-    elif row['home_score'] < row['away_score']:
-        if row['home_team'] == t1:
-            h2h_dict[(t1, t2)]['t2_wins'] += 1
-        else:
-            h2h_dict[(t1, t2)]['t1_wins'] += 1
-    else:
-        h2h_dict[(t1, t2)]['draws'] += 1
-
-def get_head_to_head(team1, team2, df=None):
-    """Get head to head record between two teams in O(1)"""
-    t1, t2 = sorted([team1, team2])
-    if (t1, t2) not in h2h_dict:
-        return [0, 0, 0]
-    
-    stats = h2h_dict[(t1, t2)]
-    total = stats['total']
-    
-    if team1 == t1:
-        return [stats['t1_wins']/total, stats['draws']/total, stats['t2_wins']/total]
-    else:
-        return [stats['t2_wins']/total, stats['draws']/total, stats['t1_wins']/total]
-
-# ── Build Feature Matrix from All International Matches ──
-X = []
-y = []
-
-for _, row in results.iterrows():
-    home = row['home_team']
-    away = row['away_team']
-    
-    home_features = get_team_features(home, all_stats)
-    away_features = get_team_features(away, all_stats)
-    h2h = get_head_to_head(home, away)
-    
-    # Original Match
-    features = home_features + away_features + h2h
-    X.append(features)
-    
-    # Label: 0=home win, 1=draw, 2=away win
-    if row['home_score'] > row['away_score']:
-        y.append(0)
-    elif row['home_score'] == row['away_score']:
-        y.append(1)
-    else:
-        y.append(2)
-        
-    # Augmented Match (Swapped)
-    h2h_swapped = get_head_to_head(away, home)
-    features_swapped = away_features + home_features + h2h_swapped
-    X.append(features_swapped)
-    
-    if row['away_score'] > row['home_score']:
-        y.append(0)
-    elif row['away_score'] == row['home_score']:
-        y.append(1)
-    else:
-        y.append(2)
-
-X = np.array(X)
-y = np.array(y)
+# ── Build Point-in-Time Features from full historical results ──
+# This gives us a much richer dataset than just World Cup matches.
+# Every match only sees results dated before kickoff, so no future results
+# leak into its features.
+print("Building point-in-time features...")
+store = FeatureStore()
+home_features, away_features, h2h = store.update(results)
+
+# Latest stats (every result folded in) are what the API serves
+all_stats = store.team_stats()
+
+# ── Build Feature Matrix (original + home/away swapped rows) ──
+X, y = training_matrix(
+    home_features, away_features, h2h,
+    results['home_score'].to_numpy(), results['away_score'].to_numpy()
+)
 
 print(f"Training samples: {len(X)}")
 print(f"Label distribution: Home wins={sum(y==0)}, Draws={sum(y==1)}, Away wins={sum(y==2)}")
@@ -197,20 +65,54 @@ print("\nClassification Report:")
 print(classification_report(y_test, y_pred, target_names=['Home Win', 'Draw', 'Away Win']))
 
 # ── Save Model + Stats ──
-os.makedirs('data/model', exist_ok=True)
+# Everything goes into a staging directory that is published as the next
+# version of the registry (see backend/artifacts.py); the API swaps it in
+# without a restart once data/model/active.json moves.
+os.makedirs(MODEL_REGISTRY, exist_ok=True)
+staging = artifacts.stage(MODEL_REGISTRY)
 
-with open('data/model/match_predictor.pkl', 'wb') as f:
+with open(os.path.join(staging, 'match_predictor.pkl'), 'wb') as f:
     pickle.dump(model, f)
 
-with open('data/model/team_stats.pkl', 'wb') as f:
+# Flat node arrays for the API's sklearn-free inference path
+export_forest(model, os.path.join(staging, 'match_predictor.npz'))
+
+with open(os.path.join(staging, 'team_stats.pkl'), 'wb') as f:
     pickle.dump(all_stats, f)
 
+# Checkpoint so new results can be folded in with scripts/feature_store.py;
+# the version carries its own copy of the snapshot it was built with
+store.save()
+shutil.copyfile(SNAPSHOT_PATH, os.path.join(staging, 'snapshot.pkl'))
+
 # Save team list for frontend dropdown
-import json
 teams = sorted(all_stats.keys())
-with open('data/model/teams_list.json', 'w') as f:
+with open(os.path.join(staging, 'teams_list.json'), 'w') as f:
     json.dump(teams, f)
 
-print(f"\n✅ Model saved to data/model/match_predictor.pkl")
-print(f"✅ Team stats saved to data/model/team_stats.pkl")
-print(f"✅ {len(teams)} teams saved to data/model/teams_list.json")
\ No newline at end of file
+# ── Precompute All-Pairs Prediction Matrix ──
+# Calibrated probabilities for every ordered pair, memory-mapped by the API.
+# The fingerprint ties it to this model + snapshot so a stale matrix is ignored.
+print("\nPrecomputing all-pairs prediction matrix...")
+write_matrix(
+    os.path.join(staging, 'prediction_matrix.bin'),
+    Predictor(model, all_stats),
+    teams,
+    artifact_fingerprint([os.path.join(staging, 'match_predictor.pkl'), os.path.join(staging, 'snapshot.pkl')])
+)
+
+version = artifacts.publish(MODEL_REGISTRY, staging, {
+    "accuracy": round(float(accuracy), 4),
+    "training_samples": int(len(X)),
+    "features_as_of": str(store.as_of()),
+    "teams": len(teams),
+})
+directory = artifacts.version_dir(MODEL_REGISTRY, version)
+
+print(f"\n✅ Model saved to {directory}/match_predictor.pkl")
+print(f"✅ Flat forest saved to {directory}/match_predictor.npz")
+print(f"✅ Team stats saved to {directory}/team_stats.pkl")
+print(f"✅ Feature store checkpoint saved to data/features/ (as of {store.as_of()})")
+print(f"✅ {len(teams)} teams saved to {directory}/teams_list.json")
+print(f"✅ {len(teams)}x{len(teams)} prediction matrix saved to {directory}/prediction_matrix.bin")
+print(f"✅ Published {version} — {MODEL_REGISTRY}/active.json now points at it")